@@ -0,0 +1,151 @@
+import os
+from datetime import timedelta
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import tokens  # noqa: E402
+from tickets.models import ApiToken, Ticket, User  # noqa: E402
+
+
+class TokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('tok_staff', 'tok_staff@test.com', 'pass12345', role='it_staff')
+        cls.ticket = Ticket.objects.create(title='Disk full', description='...', created_by=cls.staff)
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, key, path='/api/tickets/'):
+        return self.client.get(path, HTTP_AUTHORIZATION=f'Token {key}')
+
+    def test_key_is_hashed_at_rest(self):
+        token, key = tokens.issue(self.staff, 'Monitoring')
+        token.refresh_from_db()
+        self.assertNotIn(key, (token.key_hash, token.prefix))
+        self.assertEqual(token.key_hash, tokens.hash_key(key))
+        self.assertEqual(token.prefix, key[:8])
+
+    def test_cached_token_authenticates_without_queries_for_auth(self):
+        _token, key = tokens.issue(self.staff, 'Monitoring')
+        self.assertEqual(self._get(key).status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(key, f'/api/tickets/{self.ticket.pk}/history/')
+        self.assertEqual(response.status_code, 200)
+        tables = ' '.join(q['sql'] for q in ctx.captured_queries)
+        self.assertNotIn('tickets_apitoken', tables)
+        self.assertNotIn('FROM "tickets_user"', tables)
+
+    def test_bearer_keyword_and_no_csrf(self):
+        _token, key = tokens.issue(self.staff, 'Automation', scope=ApiToken.SCOPE_WRITE)
+        client = self.client_class(enforce_csrf_checks=True)
+        response = client.post(
+            f'/api/tickets/{self.ticket.pk}/update_status/', {'status': 'in_progress'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {key}',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ticket.history.get().actor, self.staff)
+
+    def test_read_scope_rejects_writes(self):
+        _token, key = tokens.issue(self.staff, 'Dashboards')
+        response = self.client.post(
+            f'/api/tickets/{self.ticket.pk}/update_status/', {'status': 'closed'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {key}',
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_revoked_expired_and_unknown_tokens_fail(self):
+        token, key = tokens.issue(self.staff, 'Old')
+        self.assertEqual(self._get(key).status_code, 200)
+        tokens.revoke(token)
+        # Session authentication comes first, so DRF answers failed credentials with 403
+        self.assertEqual(self._get(key).json()['detail'], 'Invalid token.')
+
+        _token, key = tokens.issue(self.staff, 'Short', expires_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self._get(key).json()['detail'], 'Token has expired.')
+        self.assertEqual(self._get('not-a-key').status_code, 403)
+
+    def test_unknown_keys_are_not_cached_and_are_limited_per_ip(self):
+        with override_settings(AUTH_THROTTLE_RATES={'api_token.ip': '2/min'}):
+            for key in ('guess-1', 'guess-2'):
+                self.assertEqual(self._get(key).json()['detail'], 'Invalid token.')
+                self.assertIsNone(cache.get(tokens.token_cache_key(tokens.hash_key(key))))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self._get('guess-3')
+            self.assertEqual(response.status_code, 429)
+            self.assertNotIn('tickets_apitoken', ' '.join(q['sql'] for q in ctx.captured_queries))
+            self.assertEqual(self.client.get(
+                '/api/tickets/', HTTP_AUTHORIZATION='Token guess-4', REMOTE_ADDR='10.0.0.9',
+            ).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        _token, key = tokens.issue(self.staff, 'Monitoring')
+        self._get(key)
+        self.staff.is_active = False
+        self.staff.save()
+        self.assertEqual(self._get(key).json()['detail'], 'User inactive or deleted.')
+
+    def test_anonymous_requests_still_get_403(self):
+        self.assertEqual(self.client.get('/api/tickets/').status_code, 403)
+
+
+class TokenScreenTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_user('tok_hr', 'tok_hr@test.com', 'pass12345', role='hr')
+        cls.admin = User.objects.create_user('tok_admin', 'tok_admin@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('tok_emp', 'tok_emp@test.com', 'pass12345')
+
+    def test_hr_issues_and_revokes(self):
+        self.client.force_login(self.hr)
+        response = self.client.post(reverse('manage_api_tokens'), {
+            'username': 'tok_emp', 'name': 'Laptop inventory', 'scope': 'read',
+        })
+        key = response.context['new_key']
+        token = ApiToken.objects.get()
+        self.assertEqual((token.user, token.created_by), (self.employee, self.hr))
+        self.assertContains(response, key)
+
+        self.client.post(reverse('revoke_api_token', args=[token.pk]))
+        token.refresh_from_db()
+        self.assertIsNotNone(token.revoked_at)
+
+    def test_hr_cannot_issue_for_admins(self):
+        self.client.force_login(self.hr)
+        response = self.client.post(reverse('manage_api_tokens'), {
+            'username': 'tok_admin', 'name': 'Backdoor', 'scope': 'write',
+        })
+        self.assertIsNone(response.context['new_key'])
+        self.assertFalse(ApiToken.objects.exists())
+
+    def test_hr_cannot_issue_for_it_staff(self):
+        staff = User.objects.create_user('tok_it', 'tok_it@test.com', 'pass12345', role='it_staff')
+        self.client.force_login(self.hr)
+        response = self.client.post(reverse('manage_api_tokens'), {
+            'username': staff.username, 'name': 'Bulk closer', 'scope': 'write',
+        })
+        self.assertIsNone(response.context['new_key'])
+        self.assertFormError(response.context['form'], 'username', 'HR staff can only issue tokens for employees and HR staff.')
+        self.assertFalse(ApiToken.objects.exists())
+
+        # Administrators may still issue it
+        self.client.force_login(self.admin)
+        self.client.post(reverse('manage_api_tokens'), {'username': staff.username, 'name': 'Bulk closer', 'scope': 'write'})
+        self.assertEqual(ApiToken.objects.get().user, staff)
+
+    def test_employees_are_turned_away(self):
+        self.client.force_login(self.employee)
+        self.assertRedirects(self.client.get(reverse('manage_api_tokens')), reverse('dashboard'))
@@ -0,0 +1,63 @@
+import os
+import django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import User  # noqa: E402
+
+
+class CachedAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('ac_admin', 'ac_admin@test.com', 'pass12345', role='admin')
+        cls.staff = User.objects.create_user('ac_staff', 'ac_staff@test.com', 'pass12345', role='it_staff')
+
+    def _auth_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [
+            q['sql'] for q in ctx.captured_queries
+            if 'FROM "django_session"' in q['sql'] or q['sql'].startswith('SELECT "tickets_user"')
+        ]
+
+    def test_repeat_requests_skip_session_and_user_queries(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('profile'))
+        response, queries = self._auth_queries(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_role_change_applies_immediately(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('profile'))
+
+        self.staff.role = 'employee'
+        self.staff.save()
+        response = self.client.post('/api/tickets/bulk/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_deleted_user_is_logged_out(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('profile'))
+
+        admin_client = self.client_class()
+        admin_client.force_login(self.admin)
+        admin_client.get(reverse('delete_user', args=[self.staff.pk]))
+        response = self.client.get(reverse('profile'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('profile')}")
+
+    def test_password_change_still_ends_other_sessions(self):
+        self.client.force_login(self.staff)
+        self.client.get(reverse('profile'))
+
+        self.staff.set_password('new-pass-67890')
+        self.staff.save()
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 302)
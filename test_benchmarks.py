@@ -0,0 +1,42 @@
+import os
+import json
+import tempfile
+import django
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import StaffWorkload, Ticket, TicketDailyMetric, TicketSearchTerm, User  # noqa: E402
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_generate_and_benchmark(self):
+        call_command('generate_synthetic_data', tickets=60, users=20, batch_size=25, stdout=StringIO())
+        self.assertEqual(Ticket.objects.count(), 60)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(set(User.objects.values_list('role', flat=True)), {'employee', 'it_staff', 'hr', 'admin'})
+        # Timestamps are spread out rather than all "now"
+        self.assertGreater(Ticket.objects.values('created_at').distinct().count(), 1)
+        self.assertTrue(TicketSearchTerm.objects.exists())
+        self.assertTrue(TicketDailyMetric.objects.exists())
+        open_assigned = Ticket.objects.filter(status__in=('open', 'in_progress'), assigned_to__isnull=False).count()
+        self.assertEqual(sum(StaffWorkload.objects.values_list('open_tickets', flat=True)), open_assigned)
+        self.assertFalse(Ticket.objects.filter(status__in=('open', 'in_progress'), resolve_due_at__isnull=True).exists())
+        self.assertFalse(Ticket.objects.filter(status__in=('resolved', 'closed'), resolve_due_at__isnull=False).exists())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            call_command('benchmark', repeat=2, warmup=0, output=output, stdout=StringIO())
+            call_command('benchmark', repeat=2, warmup=0, compare=output, stdout=StringIO())
+            with open(output) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(report['dataset']['tickets'], 60)
+        row = report['results']['ticket_list [admin]']
+        self.assertEqual(row['status_codes'], [200])
+        self.assertEqual(set(row), {'url', 'p50_ms', 'p95_ms', 'queries', 'peak_memory_kb', 'status_codes'})
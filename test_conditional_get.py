@@ -0,0 +1,95 @@
+import os
+import django
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Comment, Ticket, User  # noqa: E402
+
+
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('cg_admin', 'cg_admin@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('cg_emp', 'cg_emp@test.com', 'pass12345')
+        cls.other = User.objects.create_user('cg_other', 'cg_other@test.com', 'pass12345')
+        cls.ticket = Ticket.objects.create(title='VPN down', description='No tunnel', created_by=cls.employee)
+        Comment.objects.create(ticket=cls.ticket, author=cls.admin, content='Looking into it')
+
+    def _revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('no-cache', first['Cache-Control'])
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        return first, second, ctx
+
+    def test_unchanged_api_ticket_is_304_after_one_ticket_query(self):
+        self.client.force_login(self.employee)
+        first, second, ctx = self._revalidate(f'/api/tickets/{self.ticket.pk}/')
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        ticket_queries = [q for q in ctx.captured_queries if 'tickets_ticket' in q['sql']]
+        self.assertEqual(len(ticket_queries), 1)
+
+    def test_new_comment_changes_the_validator(self):
+        self.client.force_login(self.employee)
+        url = f'/api/tickets/{self.ticket.pk}/'
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(ticket=self.ticket, author=self.admin, content='Fixed')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_api_list_and_if_modified_since(self):
+        self.client.force_login(self.admin)
+        first, second, _ctx = self._revalidate('/api/tickets/')
+        self.assertEqual(second.status_code, 304)
+        response = self.client.get('/api/tickets/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        # Another representation of the same tickets has its own validator
+        expanded = self.client.get('/api/tickets/?expand=comments', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(expanded.status_code, 200)
+
+    def test_html_detail_is_conditional_and_respects_permissions(self):
+        url = reverse('ticket_detail', args=[self.ticket.pk])
+        self.client.force_login(self.admin)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.force_login(self.other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertRedirects(response, reverse('dashboard'))
+
+    def test_html_validator_changes_with_the_csrf_token(self):
+        url = reverse('ticket_detail', args=[self.ticket.pk])
+        self.client.force_login(self.admin)
+        etag = self.client.get(url)['ETag']
+        # A new CSRF secret, as after logging out and in again, must re-render the forms
+        self.client.cookies.pop(settings.CSRF_COOKIE_NAME)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_validator_covers_the_served_page_only(self):
+        self.client.force_login(self.admin)
+        other = Ticket.objects.create(title='Broken chair', description='Wobbles', created_by=self.other)
+        url = '/api/tickets/?cursor=&search=vpn'
+        first, second, ctx = self._revalidate(url)
+        self.assertEqual(second.status_code, 304)
+        # One bounded read of the page, not an aggregate over every visible ticket
+        ticket_queries = [q['sql'] for q in ctx.captured_queries if 'tickets_ticket' in q['sql']]
+        self.assertEqual(len(ticket_queries), 1)
+        self.assertIn('LIMIT 11', ticket_queries[0])
+
+        # A change outside the served page keeps the validator
+        other.update_status('resolved', self.admin)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        # A change on it does not
+        self.ticket.update_status('in_progress', self.admin)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
@@ -0,0 +1,44 @@
+import os
+import django
+from django.test import TestCase
+from django.core.cache import cache
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Ticket, User  # noqa: E402
+from tickets.stats import get_dashboard_stats  # noqa: E402
+
+
+class DashboardStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('emp1', 'emp1@test.com', 'pass12345')
+        Ticket.objects.create(title='A', description='x', created_by=cls.employee, priority='urgent')
+        Ticket.objects.create(title='B', description='x', created_by=cls.admin, status='resolved', priority='low')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_in_a_single_query(self):
+        with self.assertNumQueries(1):
+            stats, priority_stats = get_dashboard_stats(self.admin)
+        self.assertEqual(stats, {'total': 2, 'open': 1, 'in_progress': 0, 'resolved': 1, 'closed': 0})
+        self.assertEqual(priority_stats, {'low': 1, 'medium': 0, 'high': 0, 'urgent': 1})
+
+    def test_snapshot_is_cached_per_scope(self):
+        get_dashboard_stats(self.admin)
+        with self.assertNumQueries(0):
+            get_dashboard_stats(self.admin)
+        stats, _ = get_dashboard_stats(self.employee)
+        self.assertEqual(stats['total'], 1)
+
+    def test_ticket_writes_invalidate_snapshot(self):
+        get_dashboard_stats(self.employee)
+        ticket = Ticket.objects.create(title='C', description='x', created_by=self.employee)
+        self.assertEqual(get_dashboard_stats(self.employee)[0]['total'], 2)
+        ticket.delete()
+        self.assertEqual(get_dashboard_stats(self.employee)[0]['total'], 1)
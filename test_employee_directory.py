@@ -0,0 +1,81 @@
+import os
+
+import django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import directory  # noqa: E402
+from tickets.models import User  # noqa: E402
+
+
+class EmployeeDirectoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = User.objects.create_user('dir_hr', 'dir_hr@test.com', 'pass12345', role='hr')
+        User.objects.bulk_create([
+            User(username=f'dir_user{i:02}', email=f'dir_user{i:02}@test.com', department='Finance' if i % 2 else 'Sales')
+            for i in range(30)
+        ])
+        cls.ada = User.objects.create_user(
+            'alovelace', 'ada@analytical.test', 'pass12345', full_name='Ada Lovelace', department='Research',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.hr)
+
+    def test_directory_is_paginated(self):
+        response = self.client.get(reverse('manage_employees'))
+        page = response.context['page_obj']
+        self.assertEqual(len(page.object_list), directory.PAGE_SIZE)
+        self.assertEqual(page.paginator.count, 32)
+        self.assertEqual(len(self.client.get(reverse('manage_employees'), {'page': 2}).context['page_obj']), 7)
+
+    def test_search_matches_every_word_across_fields(self):
+        response = self.client.get(reverse('manage_employees'), {'q': 'lovelace research'})
+        self.assertEqual(list(response.context['page_obj']), [self.ada])
+        response = self.client.get(reverse('manage_employees'), {'q': 'FINANCE'})
+        self.assertEqual(response.context['page_obj'].paginator.count, 15)
+
+    def test_only_listed_columns_are_read(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(directory.directory('ada'))
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('"password"', sql)
+        self.assertNotIn('"phone"', sql)
+
+    def test_saving_an_edit_keeps_the_search(self):
+        response = self.client.post(
+            reverse('manage_employees') + '?q=ada&page=1',
+            {'selected_user': self.ada.pk, 'first_name': 'Ada', 'last_name': 'King',
+             'email': self.ada.email, 'phone': '', 'department': 'Research'},
+        )
+        self.assertRedirects(response, reverse('manage_employees') + '?q=ada&page=1')
+        self.assertEqual(User.objects.get(pk=self.ada.pk).last_name, 'King')
+
+    def test_typeahead(self):
+        response = self.client.get(reverse('employee_lookup'), {'q': 'ada'})
+        self.assertEqual(response.json()['results'], [{
+            'id': self.ada.pk, 'username': 'alovelace', 'name': 'Ada Lovelace',
+            'email': 'ada@analytical.test', 'department': 'Research',
+        }])
+        results = self.client.get(reverse('employee_lookup'), {'q': 'dir_user'}).json()['results']
+        self.assertEqual(len(results), directory.TYPEAHEAD_LIMIT)
+        self.assertEqual(self.client.get(reverse('employee_lookup'), {'q': 'a'}).json()['results'], [])
+
+    def test_typeahead_ranks_username_prefixes_first(self):
+        User.objects.create_user('lovell', 'jim@test.com', 'pass12345', full_name='Jim Lovell')
+        User.objects.create_user('inactive_love', 'gone@test.com', 'pass12345', is_active=False)
+        usernames = [user['username'] for user in directory.typeahead('love')]
+        self.assertEqual(usernames, ['lovell', 'alovelace'])
+
+    def test_typeahead_is_for_hr_and_admins(self):
+        employee = User.objects.create_user('dir_emp', 'dir_emp@test.com', 'pass12345')
+        self.client.force_login(employee)
+        self.assertEqual(self.client.get(reverse('employee_lookup'), {'q': 'ada'}).status_code, 403)
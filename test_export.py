@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import os
+import django
+from django.core.management import call_command
+from django.test import TestCase
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Comment, Ticket, User  # noqa: E402
+
+
+class TicketExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('ex_admin', 'ex_admin@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('ex_emp', 'ex_emp@test.com', 'pass12345')
+        cls.other = User.objects.create_user('ex_other', 'ex_other@test.com', 'pass12345')
+        cls.mine = Ticket.objects.create(title='Laptop, "slow"', description='Fan noise\nand heat', created_by=cls.employee)
+        cls.urgent = Ticket.objects.create(
+            title='Server down', description='Rack 4', created_by=cls.employee, priority='urgent',
+        )
+        cls.theirs = Ticket.objects.create(title='Mouse', description='Broken', created_by=cls.other)
+        Comment.objects.create(ticket=cls.mine, author=cls.admin, content='On it')
+        Comment.objects.create(ticket=cls.mine, author=cls.employee, content='Thanks')
+
+    def _download(self, query):
+        response = self.client.get(f'/tickets/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_respects_role_scope_and_filters(self):
+        self.client.force_login(self.employee)
+        rows = list(csv.DictReader(io.StringIO(self._download('?format=csv'))))
+        self.assertEqual([row['title'] for row in rows], ['Laptop, "slow"', 'Server down'])
+        self.assertEqual(rows[0]['description'], 'Fan noise\nand heat')
+        self.assertEqual(rows[0]['created_by'], 'ex_emp')
+        self.assertEqual(rows[0]['assigned_to'], '')
+
+        rows = list(csv.DictReader(io.StringIO(self._download('?priority=urgent'))))
+        self.assertEqual([row['title'] for row in rows], ['Server down'])
+
+    def test_ndjson_nests_comments_in_order(self):
+        self.client.force_login(self.admin)
+        records = [json.loads(line) for line in self._download('?format=ndjson&comments=1').splitlines()]
+        self.assertEqual([r['id'] for r in records], [self.mine.pk, self.urgent.pk, self.theirs.pk])
+        self.assertEqual([c['content'] for c in records[0]['comments']], ['On it', 'Thanks'])
+        self.assertEqual(records[1]['comments'], [])
+
+    def test_csv_with_comments_has_a_row_per_comment(self):
+        self.client.force_login(self.employee)
+        rows = list(csv.DictReader(io.StringIO(self._download('?comments=1&search=laptop'))))
+        self.assertEqual([row['comment_author'] for row in rows], ['ex_admin', 'ex_emp'])
+        self.assertEqual({row['id'] for row in rows}, {str(self.mine.pk)})
+
+    def test_unknown_format_is_rejected(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/tickets/export/?format=xml').status_code, 400)
+
+    def test_management_command_scopes_to_user(self):
+        out = io.StringIO()
+        call_command('export_tickets', '--format=ndjson', '--user=ex_other', stdout=out)
+        self.assertEqual([json.loads(line)['title'] for line in out.getvalue().splitlines()], ['Mouse'])
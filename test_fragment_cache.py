@@ -0,0 +1,92 @@
+import os
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Comment, Ticket, User  # noqa: E402
+
+
+class FragmentCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('fc_staff', 'fc_staff@test.com', 'pass12345', role='it_staff')
+        cls.employee = User.objects.create_user('fc_emp', 'fc_emp@test.com', 'pass12345', role='employee')
+        cls.ticket = Ticket.objects.create(
+            title='Printer jam', description='Tray 2', created_by=cls.employee, priority='high',
+        )
+        cls.comment = Comment.objects.create(ticket=cls.ticket, author=cls.employee, content='Still jammed')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+        self.url = reverse('ticket_detail', args=[self.ticket.pk])
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries
+
+    def test_repeat_detail_view_skips_comment_query(self):
+        self._queries(self.url)
+        response, queries = self._queries(self.url)
+        self.assertContains(response, 'Still jammed')
+        self.assertFalse([q for q in queries if 'FROM "tickets_comment"' in q['sql']])
+
+    def test_status_change_is_never_served_stale(self):
+        self._queries(self.url)
+        self.ticket.update_status('resolved', self.staff)
+        response, _queries = self._queries(self.url)
+        self.assertContains(response, 'status-resolved me-2 ticket-status')
+
+    def test_new_and_edited_comments_appear_immediately(self):
+        self._queries(self.url)
+        comment = Comment.objects.create(ticket=self.ticket, author=self.staff, content='Replaced the roller')
+        response, _queries = self._queries(self.url)
+        self.assertContains(response, 'Replaced the roller')
+
+        comment.content = 'Replaced the pickup roller'
+        comment.save()
+        response, _queries = self._queries(self.url)
+        self.assertContains(response, 'Replaced the pickup roller')
+
+    def test_renamed_user_appears_immediately(self):
+        self._queries(self.url)
+        self.employee.username = 'fc_renamed'
+        self.employee.save()
+        response, _queries = self._queries(self.url)
+        self.assertContains(response, 'fc_renamed')
+
+    def test_login_does_not_retire_fragments(self):
+        self._queries(self.url)
+        self.client.logout()
+        self.client.login(username='fc_staff', password='pass12345')
+        _response, queries = self._queries(self.url)
+        self.assertFalse([q for q in queries if 'FROM "tickets_comment"' in q['sql']])
+
+    def test_dashboard_fragments_follow_ticket_changes(self):
+        self._queries(reverse('dashboard'))
+        response, queries = self._queries(reverse('dashboard'))
+        self.assertFalse([q for q in queries if 'FROM "tickets_ticket"' in q['sql']])
+
+        Ticket.objects.create(title='Monitor flicker', description='Desk 4', created_by=self.employee)
+        response, _queries = self._queries(reverse('dashboard'))
+        self.assertContains(response, 'Monitor flicker')
+
+    def test_dashboard_fragments_are_scoped_by_role(self):
+        other = User.objects.create_user('fc_other', 'fc_other@test.com', 'pass12345', role='employee')
+        Ticket.objects.create(title='Other laptop', description='Fan noise', created_by=other)
+        self._queries(reverse('dashboard'))
+
+        self.client.force_login(self.employee)
+        response, _queries = self._queries(reverse('dashboard'))
+        self.assertContains(response, 'Printer jam')
+        self.assertNotContains(response, 'Other laptop')
@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+import django
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import importer  # noqa: E402
+from tickets.models import Comment, ImportCheckpoint, Ticket, TicketDailyMetric, User  # noqa: E402
+from tickets.search import search_tickets  # noqa: E402
+
+
+class BulkImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('im_staff', 'im_staff@test.com', 'pass12345', role='it_staff')
+
+    def _file(self, content, suffix='.jsonl'):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _jsonl(self, records):
+        return self._file(''.join(json.dumps(r) + '\n' for r in records))
+
+    def _import(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_records', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_users_from_csv_report_bad_rows_and_keep_going(self):
+        path = self._file(
+            'username,email,role,department\n'
+            'im_new,im_new@test.com,employee,Finance\n'
+            'im_staff,dup@test.com,employee,\n'
+            'im_bad,im_bad@test.com,wizard,\n'
+            'im_hr,im_hr@test.com,hr,People\n',
+            suffix='.csv',
+        )
+        out, err = self._import('users', path, '--batch-size=2')
+        self.assertIn('Imported 2 users; 2 records rejected.', out)
+        self.assertIn('line 3: username: Already taken.', err)
+        self.assertIn('line 4: role:', err)
+        self.assertEqual(User.objects.get(username='im_hr').department, 'People')
+        self.assertFalse(User.objects.get(username='im_new').has_usable_password())
+
+    def test_tickets_with_nested_comments_resolve_users_and_derived_data(self):
+        path = self._jsonl([
+            {
+                'title': 'Old VPN outage', 'description': 'Imported history', 'status': 'resolved',
+                'priority': 'high', 'created_by': {'username': 'im_staff'}, 'assigned_to': 'im_staff@test.com',
+                'created_at': '2025-03-01T09:00:00Z', 'updated_at': '2025-03-02T09:00:00Z',
+                'comments': [{'author': 'im_staff', 'content': 'Tunnel restored', 'created_at': '2025-03-02T08:00:00Z'}],
+            },
+            {'title': 'No owner', 'description': 'x', 'created_by': 'ghost'},
+        ])
+        _out, err = self._import('tickets', path)
+        self.assertIn("created_by: Unknown user 'ghost'.", err)
+
+        ticket = Ticket.objects.get(title='Old VPN outage')
+        self.assertEqual((ticket.created_by, ticket.assigned_to), (self.staff, self.staff))
+        self.assertEqual(ticket.created_at.isoformat(), '2025-03-01T09:00:00+00:00')
+        self.assertEqual(ticket.resolved_at, ticket.updated_at)
+        self.assertEqual(ticket.comment_count, 1)
+        self.assertEqual(ticket.comments.get().created_at.isoformat(), '2025-03-02T08:00:00+00:00')
+        self.assertEqual(list(search_tickets(Ticket.objects.all(), 'tunnel')), [ticket])
+        self.assertEqual(TicketDailyMetric.objects.get(priority='high', status='resolved').resolved, 1)
+
+    def test_timestamps_are_kept_without_touching_field_definitions(self):
+        path = self._jsonl([{
+            'title': 'Old outage', 'description': 'x', 'created_by': 'im_staff',
+            'created_at': '2024-01-01T00:00:00Z', 'updated_at': '2024-01-02T00:00:00Z',
+        }])
+        original = Ticket.objects.bulk_create
+        flags = []
+
+        def bulk_create(objs, **kwargs):
+            # What a concurrent save in another thread would see mid-import
+            flags.append(Ticket._meta.get_field('updated_at').auto_now)
+            return original(objs, **kwargs)
+
+        with mock.patch.object(Ticket.objects, 'bulk_create', bulk_create):
+            self._import('tickets', path)
+        self.assertEqual(flags, [True])
+        ticket = Ticket.objects.get(title='Old outage')
+        self.assertEqual(ticket.updated_at.isoformat(), '2024-01-02T00:00:00+00:00')
+
+    def test_standalone_comments_need_an_existing_ticket(self):
+        ticket = Ticket.objects.create(title='Printer', description='x', created_by=self.staff)
+        path = self._jsonl([
+            {'ticket': ticket.pk, 'author': 'im_staff', 'content': 'Replaced toner'},
+            {'ticket': 999999, 'author': 'im_staff', 'content': 'Lost'},
+            'not an object',
+        ])
+        _out, err = self._import('comments', path)
+        self.assertIn('line 2: ticket: Unknown ticket 999999.', err)
+        self.assertIn('line 3: record: Expected a JSON object', err)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.comment_count, 1)
+
+    def test_crashed_import_resumes_after_the_last_committed_batch(self):
+        path = self._jsonl([{'username': f'im_u{i}', 'email': f'im_u{i}@test.com'} for i in range(5)])
+        original = importer.RecordImporter._save_users
+        calls = []
+
+        def crash_on_second_batch(self, users):
+            calls.append(len(users))
+            if len(calls) == 2:
+                raise RuntimeError('worker killed')
+            original(self, users)
+
+        with mock.patch.object(importer.RecordImporter, '_save_users', crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self._import('users', path, '--batch-size=2')
+        self.assertEqual(ImportCheckpoint.objects.get(kind='users').position, 2)
+
+        out, _err = self._import('users', path, '--batch-size=2')
+        self.assertIn('Resuming after record 2.', out)
+        self.assertEqual(User.objects.filter(username__startswith='im_u').count(), 5)
+
+        with self.assertRaises(CommandError):
+            self._import('users', path)
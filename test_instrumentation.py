@@ -0,0 +1,86 @@
+import os
+import re
+import tempfile
+import django
+from django.test import TestCase, override_settings
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.instrumentation import MetricsRegistry, registry, render_prometheus  # noqa: E402
+from tickets.models import User  # noqa: E402
+
+
+def _sample(text, name, view, status='200'):
+    match = re.search(rf'^{name}{{view="{view}",status="{status}"}} (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='metrics_admin', email='metrics_admin@test.com', password='pass', role='admin',
+        )
+        self.employee = User.objects.create_user(
+            username='metrics_emp', email='metrics_emp@test.com', password='pass', role='employee',
+        )
+
+    def test_views_are_recorded_by_url_name_and_status(self):
+        self.client.force_login(self.admin)
+        before = _sample(render_prometheus(registry.collect()), 'http_requests_total', 'dashboard') or 0
+        self.client.get('/')
+        self.client.get('/api/tickets/999999/')
+
+        text = self.client.get('/metrics').content.decode()
+        self.assertEqual(_sample(text, 'http_requests_total', 'dashboard'), before + 1)
+        self.assertGreater(_sample(text, 'db_queries_total', 'dashboard'), 0)
+        self.assertIsNotNone(_sample(text, 'http_requests_total', 'ticket-detail', status='404'))
+        self.assertIn('http_request_duration_seconds_bucket{view="dashboard",status="200",le="+Inf"}', text)
+
+    def test_streamed_responses_are_timed_until_the_body_is_sent(self):
+        self.client.force_login(self.admin)
+        before = registry.snapshot().get(('ticket_export', '200'), [0, 0.0, 0])
+        response = self.client.get('/tickets/export/', {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        # Nothing is recorded until the body has been consumed
+        self.assertEqual(registry.snapshot().get(('ticket_export', '200'), [0])[0], before[0])
+
+        b''.join(response.streaming_content)
+        response.close()
+        after = registry.snapshot()[('ticket_export', '200')]
+        self.assertEqual(after[0], before[0] + 1)
+        # The export's rows are read while streaming and still counted
+        self.assertGreater(after[2], before[2])
+
+    def test_metrics_requires_admin_or_token(self):
+        self.client.force_login(self.employee)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+        self.client.logout()
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer guess').status_code, 403)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class MultiProcessAggregationTests(TestCase):
+
+    def test_workers_sharing_a_directory_report_merged_totals(self):
+        with tempfile.TemporaryDirectory() as directory:
+            worker_a = MetricsRegistry(directory=directory)
+            worker_b = MetricsRegistry(directory=directory)
+            worker_a.observe('ticket_list', 200, 0.02, 5, 0.004)
+            worker_a.observe('ticket_list', 200, 0.3, 7, 0.01)
+            worker_b.observe('ticket_list', 200, 0.02, 5, 0.004)
+            worker_b.flush()
+
+            text = render_prometheus(worker_a.collect())
+
+        self.assertEqual(_sample(text, 'http_requests_total', 'ticket_list'), 3)
+        self.assertEqual(_sample(text, 'db_queries_total', 'ticket_list'), 17)
+        self.assertIn('http_request_duration_seconds_bucket{view="ticket_list",status="200",le="0.025"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="ticket_list",status="200",le="+Inf"} 3', text)
@@ -0,0 +1,77 @@
+import os
+import django
+from datetime import timedelta
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import OutboundEmail, User  # noqa: E402
+from tickets.utils import deliver_queued_emails, queue_email  # noqa: E402
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboundEmailQueueTests(TestCase):
+
+    def test_registration_queues_instead_of_sending(self):
+        response = self.client.post('/register/', {
+            'username': 'newuser', 'email': 'new@test.com', 'full_name': 'New User',
+            'password1': 'Sup3r-secret-pw', 'password2': 'Sup3r-secret-pw',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutboundEmail.objects.get()
+        self.assertEqual(queued.to_email, 'new@test.com')
+        self.assertIn('verify-email', queued.html_body)
+
+        self.assertEqual(deliver_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.STATUS_SENT)
+
+    def test_worker_drains_in_batches(self):
+        for i in range(5):
+            queue_email(f'Notice {i}', f'user{i}@test.com', body='Hello')
+        self.assertEqual(deliver_queued_emails(batch_size=3), (3, 0))
+        self.assertEqual(deliver_queued_emails(batch_size=3), (2, 0))
+        self.assertEqual(deliver_queued_emails(batch_size=3), (0, 0))
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_BACKEND='test_outbox.FailingBackend')
+    def test_failures_back_off_then_give_up(self):
+        queued = queue_email('Notice', 'user@test.com', body='Hello')
+        self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 1))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('SMTP unavailable', queued.last_error)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+
+        # Not due yet
+        self.assertEqual(deliver_queued_emails(max_attempts=2), (0, 0))
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        deliver_queued_emails(max_attempts=2)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboundEmail.STATUS_FAILED)
+
+    def test_expired_claim_is_retried(self):
+        queue_email('Notice', 'user@test.com', body='Hello')
+        OutboundEmail.objects.update(
+            status=OutboundEmail.STATUS_SENDING, next_attempt_at=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(deliver_queued_emails(), (1, 0))
+
+    def test_resend_verification_queues_email(self):
+        user = User.objects.create_user('pending', 'pending@test.com', 'pass12345', is_active=False)
+        self.client.get(f'/resend-verification/{user.id}/')
+        self.assertTrue(OutboundEmail.objects.filter(to_email='pending@test.com').exists())
@@ -0,0 +1,80 @@
+import os
+import django
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Ticket, User  # noqa: E402
+from tickets.pagination import keyset_paginate  # noqa: E402
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('emp1', 'emp1@test.com', 'pass12345')
+        base = timezone.now()
+        for i in range(25):
+            ticket = Ticket.objects.create(
+                title=f'Ticket {i}', description='Printer broken',
+                status='open' if i % 2 else 'closed', created_by=cls.admin,
+            )
+            # Pairs of tickets share a timestamp so the id tie-break matters
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=base - timedelta(minutes=i // 2))
+        cls.expected = list(Ticket.objects.order_by('-created_at', '-id'))
+
+    def test_walks_forward_and_back_without_gaps(self):
+        seen, cursor, pages = [], None, []
+        while True:
+            page = keyset_paginate(Ticket.objects.all(), cursor, 10)
+            pages.append(page)
+            seen.extend(page.object_list)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = keyset_paginate(Ticket.objects.all(), pages[-1].previous_cursor, 10)
+        self.assertEqual(back.object_list, pages[-2].object_list)
+        self.assertTrue(back.has_next)
+
+    def test_deep_page_issues_no_count(self):
+        page = keyset_paginate(Ticket.objects.all(), None, 10)
+        with self.assertNumQueries(1):
+            keyset_paginate(Ticket.objects.all(), page.next_cursor, 10)
+
+    def test_ticket_list_cursor_mode_keeps_filters(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('ticket_list'), {'cursor': '', 'status': 'open'})
+        page = response.context['page_obj']
+        self.assertTrue(all(t.status == 'open' for t in page))
+        self.assertIn('status=open', response.context['next_url'])
+
+        response = self.client.get(reverse('ticket_list') + response.context['next_url'])
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertIsNone(response.context['next_url'])
+
+    def test_api_cursor_mode(self):
+        self.client.force_login(self.admin)
+        first = self.client.get('/api/tickets/', {'cursor': ''}).json()
+        self.assertNotIn('count', first)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(ids, [t.id for t in self.expected[:20]])
+
+    def test_api_invalid_cursor(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/api/tickets/', {'cursor': 'garbage'}).status_code, 404)
+
+    def test_cursor_mode_respects_scope(self):
+        self.client.force_login(self.employee)
+        response = self.client.get('/api/tickets/', {'cursor': ''}).json()
+        self.assertEqual(response['results'], [])
@@ -0,0 +1,116 @@
+import os
+import django
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import rollups  # noqa: E402
+from tickets.models import Comment, Ticket, TicketDailyMetric, User  # noqa: E402
+
+
+class DailyMetricsRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff1', 'staff1@test.com', 'pass12345', role='it_staff')
+        cls.employee = User.objects.create_user('emp1', 'emp1@test.com', 'pass12345')
+
+    def _snapshot(self):
+        return sorted(
+            TicketDailyMetric.objects.values_list(
+                'day', 'priority', 'status', 'opened', 'resolved', 'entered', 'exited'
+            )
+        )
+
+    def test_creation_and_transitions_update_rollup(self):
+        today = timezone.localdate()
+        ticket = Ticket.objects.create(title='A', description='x', created_by=self.employee, priority='high')
+        Ticket.objects.create(title='B', description='x', created_by=self.employee, priority='low')
+        self.assertEqual(rollups.backlog_by_priority(today), {'low': 1, 'medium': 0, 'high': 1, 'urgent': 0})
+
+        ticket.update_status('in_progress', self.staff)
+        ticket.update_status('resolved', self.staff)
+        report = rollups.daily_report(today, today)[0]
+        self.assertEqual((report['opened'], report['resolved']), (2, 1))
+        self.assertIsNotNone(report['mean_hours_to_resolve'])
+        self.assertEqual(rollups.backlog_by_priority(today)['high'], 0)
+
+    def test_priority_change_moves_backlog(self):
+        ticket = Ticket.objects.create(title='A', description='x', created_by=self.employee, priority='low')
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.priority = 'urgent'
+        ticket.save()
+        backlog = rollups.backlog_by_priority(timezone.localdate())
+        self.assertEqual((backlog['low'], backlog['urgent']), (0, 1))
+
+    def test_bulk_endpoint_keeps_rollup_in_step(self):
+        tickets = [Ticket.objects.create(title=f'T{i}', description='x', created_by=self.employee) for i in range(3)]
+        self.client.force_login(self.staff)
+        self.client.post('/api/tickets/bulk/', {
+            'ids': [t.id for t in tickets], 'operation': 'status', 'value': 'resolved',
+        }, content_type='application/json')
+        today = timezone.localdate()
+        self.assertEqual(rollups.daily_report(today, today)[0]['resolved'], 3)
+        self.assertEqual(rollups.backlog_by_priority(today)['medium'], 0)
+
+    def test_api_patch_counts_status_change_once(self):
+        ticket = Ticket.objects.create(title='A', description='x', created_by=self.employee)
+        self.client.force_login(self.staff)
+        response = self.client.patch(
+            f'/api/tickets/{ticket.pk}/', {'status': 'resolved'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        today = timezone.localdate()
+        metrics = {
+            row.status: (row.entered, row.exited, row.resolved)
+            for row in TicketDailyMetric.objects.filter(day=today, priority='medium')
+        }
+        self.assertEqual(metrics, {'open': (1, 1, 0), 'resolved': (1, 0, 1)})
+        ticket.refresh_from_db()
+        self.assertIsNotNone(ticket.resolved_at)
+        self.assertEqual(
+            list(ticket.comments.values_list('content', flat=True)), ['Status changed from Open to Resolved'],
+        )
+
+    def test_rebuild_matches_incremental(self):
+        ticket = Ticket.objects.create(title='A', description='x', created_by=self.employee)
+        ticket.update_status('in_progress', self.staff)
+        ticket.update_status('resolved', self.staff)
+        other = Ticket.objects.create(title='B', description='x', created_by=self.employee, priority='urgent')
+        other.delete()
+        Ticket.objects.create(title='C', description='x', created_by=self.employee, priority='urgent')
+        incremental = rollups.backlog_by_priority(timezone.localdate())
+
+        rollups.rebuild()
+        self.assertEqual(rollups.backlog_by_priority(timezone.localdate()), incremental)
+        today = timezone.localdate()
+        self.assertEqual(rollups.daily_report(today, today)[0]['resolved'], 1)
+
+    def test_rebuild_replays_history_on_original_days(self):
+        ticket = Ticket.objects.create(title='A', description='x', created_by=self.employee)
+        comment = Comment.objects.create(
+            ticket=ticket, author=self.staff, is_system_message=True,
+            content='Status changed from Open to Resolved',
+        )
+        past = timezone.now() - timedelta(days=3)
+        Ticket.objects.filter(pk=ticket.pk).update(status='resolved', created_at=past - timedelta(hours=5), resolved_at=past)
+        Comment.objects.filter(pk=comment.pk).update(created_at=past)
+
+        rollups.rebuild()
+        day = timezone.localdate(past)
+        report = rollups.daily_report(day, day)[0]
+        self.assertEqual(report['resolved'], 1)
+        self.assertEqual(report['mean_hours_to_resolve'], 5.0)
+
+    def test_report_endpoint(self):
+        Ticket.objects.create(title='A', description='x', created_by=self.employee)
+        self.client.force_login(self.staff)
+        body = self.client.get('/api/reports/', {'days': 7}).json()
+        self.assertEqual(len(body['daily']), 7)
+        self.assertEqual(body['daily'][-1]['opened'], 1)
+        self.client.force_login(self.employee)
+        self.assertEqual(self.client.get('/api/reports/').status_code, 403)
@@ -0,0 +1,87 @@
+import os
+import django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Ticket, Comment, User, TicketSearchTerm  # noqa: E402
+from tickets.search import search_tickets, highlight  # noqa: E402
+
+
+class TicketSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.employee = User.objects.create_user('emp1', 'emp1@test.com', 'pass12345')
+        cls.in_title = Ticket.objects.create(
+            title='Printer jammed', description='Paper stuck in tray two', created_by=cls.admin,
+        )
+        cls.in_description = Ticket.objects.create(
+            title='Office equipment', description='The printer on floor 3 is jammed again', created_by=cls.employee,
+        )
+        cls.in_comment = Ticket.objects.create(
+            title='Cannot print', description='Nothing happens', created_by=cls.admin,
+        )
+        Comment.objects.create(ticket=cls.in_comment, author=cls.admin, content='Looks like the printer is jammed')
+
+    def test_results_are_ranked(self):
+        results = list(search_tickets(Ticket.objects.all(), 'printer jammed'))
+        self.assertEqual(results, [self.in_title, self.in_description, self.in_comment])
+
+    def test_all_terms_must_match(self):
+        results = search_tickets(Ticket.objects.all(), 'printer tray')
+        self.assertEqual(list(results), [self.in_title])
+
+    def test_index_follows_edits(self):
+        self.in_description.description = 'Monitor flickers'
+        self.in_description.save()
+        results = search_tickets(Ticket.objects.all(), 'jammed')
+        self.assertNotIn(self.in_description, results)
+        self.in_description.delete()
+        self.assertFalse(TicketSearchTerm.objects.filter(ticket_id=self.in_description.pk).exists())
+
+    def test_status_and_assignment_saves_do_not_reindex(self):
+        ticket = Ticket.objects.get(pk=self.in_title.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            ticket.update_status('in_progress', self.admin)
+            ticket.assigned_to = self.admin
+            ticket.save()
+        # Neither the ticket's text nor the system comment is (re)indexed
+        self.assertFalse([q for q in ctx.captured_queries if 'tickets_ticketsearch' in q['sql']])
+        ticket.title = 'Scanner jammed'
+        ticket.save()
+        self.assertIn(ticket, search_tickets(Ticket.objects.all(), 'scanner'))
+
+    def test_comment_edits_are_reindexed(self):
+        comment = Comment.objects.create(ticket=self.in_title, author=self.admin, content='Replaced the fuser')
+        self.assertIn(self.in_title, search_tickets(Ticket.objects.all(), 'fuser'))
+        comment.content = 'Replaced the roller'
+        comment.save()
+        self.assertNotIn(self.in_title, search_tickets(Ticket.objects.all(), 'fuser'))
+        self.assertIn(self.in_title, search_tickets(Ticket.objects.all(), 'roller'))
+
+    def test_system_messages_are_not_indexed(self):
+        self.in_title.update_status('resolved', self.admin)
+        self.assertFalse(search_tickets(Ticket.objects.all(), 'resolved').exists())
+
+    def test_highlight_escapes_and_marks(self):
+        snippet = highlight('<b>Printer</b> is jammed', 'printer')
+        self.assertEqual(snippet, '&lt;b&gt;<mark>Printer</mark>&lt;/b&gt; is jammed')
+
+    def test_ticket_list_search_respects_scope(self):
+        self.client.force_login(self.employee)
+        response = self.client.get(reverse('ticket_list'), {'search': 'printer'})
+        self.assertEqual(list(response.context['page_obj']), [self.in_description])
+        self.assertContains(response, '<mark>printer</mark>')
+
+    def test_api_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/tickets/', {'search': 'jammed'})
+        ids = [row['id'] for row in response.json()['results']]
+        self.assertEqual(ids, [self.in_title.id, self.in_description.id, self.in_comment.id])
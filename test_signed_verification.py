@@ -0,0 +1,103 @@
+import os
+import re
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import verification  # noqa: E402
+from tickets.models import EmailVerification, OutboundEmail, User  # noqa: E402
+
+SIGNED_LINK = re.compile(r'/verify-email/s/([^/"]+)/')
+
+
+def signed_link(email):
+    return SIGNED_LINK.search(OutboundEmail.objects.filter(to_email=email).latest('pk').html_body).group(0)
+
+
+@override_settings(EMAIL_VERIFICATION_TOKENS='signed')
+class SignedTokenTests(TestCase):
+
+    def _register(self, username):
+        return self.client.post(reverse('register'), {
+            'username': username, 'email': f'{username}@test.com', 'full_name': 'Signed User',
+            'password1': 'testpass123', 'password2': 'testpass123', 'role': 'employee',
+        })
+
+    def test_registration_stores_nothing_and_link_activates(self):
+        self._register('signed_new')
+        user = User.objects.get(username='signed_new')
+        self.assertFalse(user.is_active)
+        self.assertFalse(EmailVerification.objects.exists())
+
+        link = signed_link(user.email)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(link)
+        self.assertTemplateUsed(response, 'tickets/verified_success.html')
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT')])
+        user.refresh_from_db()
+        self.assertTrue(user.is_active)
+
+    def test_link_works_once(self):
+        user = User.objects.create_user('signed_once', 'signed_once@test.com', 'pass12345', is_active=False)
+        path = verification.verification_path(user)
+        self.client.get(path)
+        self.assertTemplateUsed(self.client.get(path), 'tickets/invalid_link.html')
+
+    def test_disabled_account_is_not_reactivated(self):
+        user = User.objects.create_user('signed_off', 'signed_off@test.com', 'pass12345')
+        User.objects.filter(pk=user.pk).update(is_active=False, last_login=timezone.now())
+        response = self.client.get(verification.verification_path(user))
+        self.assertTemplateUsed(response, 'tickets/invalid_link.html')
+        self.assertFalse(User.objects.get(pk=user.pk).is_active)
+
+    def test_expired_and_tampered_links(self):
+        user = User.objects.create_user('signed_old', 'signed_old@test.com', 'pass12345', is_active=False)
+        path = verification.verification_path(user)
+        later = timezone.now() + timedelta(hours=25)
+        with mock.patch('django.core.signing.time.time', return_value=later.timestamp()):
+            self.assertTemplateUsed(self.client.get(path), 'tickets/link_expired.html')
+        self.assertTemplateUsed(self.client.get(path[:-3] + 'x/'), 'tickets/invalid_link.html')
+        self.assertFalse(User.objects.get(pk=user.pk).is_active)
+
+    def test_model_links_keep_working(self):
+        user = User.objects.create_user('signed_legacy', 'signed_legacy@test.com', 'pass12345', is_active=False)
+        row = EmailVerification.objects.create(user=user)
+        response = self.client.get(reverse('verify_email', args=[row.token]))
+        self.assertTemplateUsed(response, 'tickets/verified_success.html')
+        self.assertFalse(EmailVerification.objects.exists())
+
+
+class ConvertCommandTests(TestCase):
+
+    def test_pending_rows_become_signed_links(self):
+        pending = User.objects.create_user('conv_pending', 'conv_pending@test.com', 'pass12345', is_active=False)
+        active = User.objects.create_user('conv_active', 'conv_active@test.com', 'pass12345')
+        stale = User.objects.create_user('conv_stale', 'conv_stale@test.com', 'pass12345', is_active=False)
+        EmailVerification.objects.create(user=pending)
+        EmailVerification.objects.create(user=active)
+        EmailVerification.objects.create(user=stale, created_at=timezone.now() - timedelta(days=3))
+
+        out = StringIO()
+        call_command('convert_email_verifications', '--base-url', 'https://help.test', '--dry-run', stdout=out)
+        self.assertIn('Would send 1 signed links and delete 2 stale rows.', out.getvalue())
+        self.assertEqual(EmailVerification.objects.count(), 3)
+
+        call_command('convert_email_verifications', '--base-url', 'https://help.test/', stdout=StringIO())
+        self.assertFalse(EmailVerification.objects.exists())
+        self.assertEqual(list(OutboundEmail.objects.values_list('to_email', flat=True)), [pending.email])
+        self.assertIn('https://help.test/verify-email/s/', OutboundEmail.objects.get().html_body)
+
+        self.client.get(signed_link(pending.email))
+        self.assertTrue(User.objects.get(pk=pending.pk).is_active)
@@ -0,0 +1,169 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import sla  # noqa: E402
+from tickets.models import Comment, Ticket, User  # noqa: E402
+
+TARGETS = {
+    'urgent': {'response': 1, 'resolve': 4},
+    'high': {'response': 4, 'resolve': 24},
+    'medium': {'response': 8, 'resolve': 72},
+    'low': {'response': 24, 'resolve': 120},
+}
+
+
+@override_settings(SLA_TARGETS=TARGETS, SLA_WARNING_MINUTES=60)
+class DeadlineTests(TestCase):
+
+    def assertDue(self, due, start, hours):
+        # The clock starts in pre_save, a moment before created_at is stamped
+        self.assertAlmostEqual(due, start + timedelta(hours=hours), delta=timedelta(seconds=1))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('sla_emp', 'sla_emp@test.com', 'pass12345')
+        cls.staff = User.objects.create_user('sla_staff', 'sla_staff@test.com', 'pass12345', role='it_staff')
+
+    def _ticket(self, **fields):
+        return Ticket.objects.create(title='VPN down', description='...', created_by=self.employee, **fields)
+
+    def test_new_ticket_gets_both_deadlines(self):
+        ticket = self._ticket(priority='high')
+        self.assertDue(ticket.response_due_at, ticket.created_at, 4)
+        self.assertDue(ticket.resolve_due_at, ticket.created_at, 24)
+
+    def test_priority_change_keeps_the_clock_start(self):
+        ticket = self._ticket(priority='low')
+        created = ticket.created_at
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.priority = 'urgent'
+        ticket.save()
+        ticket.refresh_from_db()
+        self.assertDue(ticket.resolve_due_at, created, 4)
+
+    def test_status_changes_stop_and_restart_clocks(self):
+        ticket = Ticket.objects.get(pk=self._ticket().pk)
+        ticket.update_status('in_progress', self.staff)
+        self.assertIsNone(ticket.response_due_at)
+        self.assertIsNotNone(ticket.resolve_due_at)
+
+        ticket.update_status('resolved', self.staff)
+        self.assertIsNone(ticket.resolve_due_at)
+
+        before = timezone.now()
+        ticket.update_status('open', self.staff)
+        self.assertGreaterEqual(ticket.resolve_due_at, before + timedelta(hours=72))
+
+    def test_form_and_api_updates_move_deadlines(self):
+        ticket = self._ticket(priority='low')
+        self.client.force_login(self.staff)
+        self.client.post(reverse('ticket_update', args=[ticket.pk]), {
+            'title': ticket.title, 'description': ticket.description,
+            'status': 'open', 'priority': 'urgent',
+        })
+        ticket.refresh_from_db()
+        self.assertDue(ticket.response_due_at, ticket.created_at, 1)
+
+        self.client.patch(f'/api/tickets/{ticket.pk}/', {'status': 'in_progress'}, content_type='application/json')
+        ticket.refresh_from_db()
+        self.assertIsNone(ticket.response_due_at)
+
+    def test_bulk_api_moves_deadlines(self):
+        tickets = [self._ticket(priority='low') for _ in range(2)]
+        self.client.force_login(self.staff)
+        self.client.post('/api/tickets/bulk/', {
+            'ids': [t.pk for t in tickets], 'operation': 'priority', 'value': 'urgent',
+        }, content_type='application/json')
+        for ticket in Ticket.objects.filter(pk__in=[t.pk for t in tickets]):
+            self.assertDue(ticket.resolve_due_at, ticket.created_at, 4)
+
+        self.client.post('/api/tickets/bulk/', {
+            'ids': [t.pk for t in tickets], 'operation': 'status', 'value': 'closed',
+        }, content_type='application/json')
+        self.assertFalse(Ticket.objects.filter(pk__in=[t.pk for t in tickets], resolve_due_at__isnull=False).exists())
+
+
+@override_settings(SLA_TARGETS=TARGETS, SLA_WARNING_MINUTES=30)
+class SweeperTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('sw_emp', 'sw_emp@test.com', 'pass12345')
+
+    def _ticket(self, **fields):
+        return Ticket.objects.create(title='Printer', description='...', created_by=self.employee, **fields)
+
+    def test_sweep_warns_then_breaches_once(self):
+        ticket = self._ticket(priority='urgent')
+        now = ticket.created_at
+
+        sla.sweep(now=now)
+        self.assertEqual(ticket.comments.count(), 0)
+
+        # Response due in one hour: warned from 30 minutes before
+        sla.sweep(now=now + timedelta(minutes=31))
+        self.assertEqual(list(ticket.comments.values_list('content', flat=True)), [
+            f"SLA warning: first response due {timezone.localtime(ticket.response_due_at):%Y-%m-%d %H:%M}",
+        ])
+        sla.sweep(now=now + timedelta(minutes=32))
+        self.assertEqual(ticket.comments.count(), 1)
+
+        sla.sweep(now=now + timedelta(hours=2))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.response_escalation, sla.BREACHED)
+        self.assertTrue(ticket.comments.filter(content__startswith='SLA breached: first response').exists())
+        self.assertEqual(ticket.comment_count, ticket.comments.count())
+
+        sla.sweep(now=now + timedelta(hours=3))
+        self.assertEqual(ticket.comments.filter(content__startswith='SLA breached').count(), 1)
+
+    def test_late_ticket_skips_the_warning(self):
+        ticket = self._ticket(priority='urgent')
+        sla.sweep(now=ticket.created_at + timedelta(hours=5))
+        notes = list(ticket.comments.values_list('content', flat=True))
+        self.assertEqual(len(notes), 2)
+        self.assertTrue(all(note.startswith('SLA breached') for note in notes))
+
+    def test_escalation_notes_have_no_author(self):
+        staff = User.objects.create_user('sw_staff', 'sw_staff@test.com', 'pass12345', role='it_staff')
+        ticket = self._ticket(priority='urgent', assigned_to=staff)
+        sla.sweep(now=ticket.created_at + timedelta(hours=5))
+        self.assertEqual(set(ticket.comments.values_list('author', 'is_system_message')), {(None, True)})
+
+        self.client.force_login(staff)
+        self.assertContains(self.client.get(reverse('ticket_detail', args=[ticket.pk])), 'SLA breached')
+        comments = self.client.get(f'/api/tickets/{ticket.pk}/').json()['comments']
+        self.assertEqual([comment['author'] for comment in comments], [None, None])
+
+    def test_sweep_reads_only_tickets_due(self):
+        for _ in range(5):
+            self._ticket(priority='low')
+        due = self._ticket(priority='urgent')
+        with CaptureQueriesContext(connection) as ctx:
+            counts = sla.sweep(now=due.created_at + timedelta(minutes=45), batch_size=2)
+        self.assertEqual(counts[('response', sla.WARNED)], 1)
+        self.assertEqual(counts[('resolve', sla.WARNED)], 0)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        # One claim per (deadline, step) plus the follow-up claim after the escalated batch
+        self.assertEqual(len(selects), 7)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_command_reports(self):
+        ticket = self._ticket(priority='urgent')
+        Ticket.objects.filter(pk=ticket.pk).update(response_due_at=timezone.now() - timedelta(minutes=1))
+        out = StringIO()
+        call_command('sweep_sla', stdout=out)
+        self.assertIn('First response: 1 breached.', out.getvalue())
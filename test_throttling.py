@@ -0,0 +1,131 @@
+import os
+from unittest import mock
+
+import django
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Ticket, User  # noqa: E402
+from tickets.throttling import take_token  # noqa: E402
+
+AUTH_RATES = {
+    'login.ip': '4/min',
+    'login.account': '2/min',
+    'register.ip': '2/hour',
+    'register.account': '2/hour',
+    'resend_verification.ip': '2/hour',
+    'resend_verification.account': '1/hour',
+}
+
+
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_allows_a_burst_then_refills(self):
+        with mock.patch('tickets.throttling.time.time', return_value=1000.0):
+            self.assertEqual([take_token('t', 'a', '3/min') for _ in range(3)], [0, 0, 0])
+            self.assertAlmostEqual(take_token('t', 'a', '3/min'), 20.0)
+            # Other identities have their own bucket
+            self.assertEqual(take_token('t', 'b', '3/min'), 0)
+        with mock.patch('tickets.throttling.time.time', return_value=1020.0):
+            self.assertEqual(take_token('t', 'a', '3/min'), 0)
+            self.assertGreater(take_token('t', 'a', '3/min'), 0)
+
+
+@override_settings(AUTH_THROTTLE_RATES=AUTH_RATES)
+class AuthThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('th_user', 'th_user@test.com', 'pass12345')
+
+    def setUp(self):
+        cache.clear()
+
+    def _login(self, username, remote_addr='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'username': username, 'password': 'wrong'}, REMOTE_ADDR=remote_addr,
+        )
+
+    def test_login_is_limited_per_account(self):
+        self.assertEqual(self._login('th_user').status_code, 200)
+        self.assertEqual(self._login('TH_USER', '10.0.0.2').status_code, 200)
+        response = self._login('th_user', '10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_login_is_limited_per_ip(self):
+        for name in ('a1', 'a2', 'a3', 'a4'):
+            self.assertEqual(self._login(name).status_code, 200)
+        self.assertEqual(self._login('a5').status_code, 429)
+        self.assertEqual(self._login('a5', '10.0.0.9').status_code, 200)
+
+    def test_rejection_skips_orm_and_password_hasher(self):
+        for _ in range(2):
+            self._login('th_user')
+        with mock.patch('tickets.models.User.check_password') as check_password, \
+                CaptureQueriesContext(connection) as ctx:
+            response = self._login('th_user')
+        self.assertEqual(response.status_code, 429)
+        check_password.assert_not_called()
+        self.assertEqual(ctx.captured_queries, [])
+
+    def test_login_form_is_not_throttled(self):
+        for _ in range(6):
+            self.assertEqual(self.client.get(reverse('login')).status_code, 200)
+
+    def test_resend_verification_is_limited_per_account(self):
+        url = reverse('resend_verification', args=[self.user.pk])
+        with mock.patch('tickets.views.send_welcome_email'):
+            self.client.get(url, REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.2').status_code, 429)
+
+
+class ApiThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('th_staff', 'th_staff@test.com', 'pass12345', role='it_staff')
+        cls.other = User.objects.create_user('th_other', 'th_other@test.com', 'pass12345', role='it_staff')
+        cls.ticket = Ticket.objects.create(title='Locked out', description='VPN', created_by=cls.staff)
+
+    def setUp(self):
+        cache.clear()
+
+    def _rates(self, **rates):
+        base = {'user': '100/min', 'tickets': '100/min', 'tickets_bulk': '100/min', 'comments': '100/min'}
+        return override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_CLASSES': [
+            'tickets.throttling.UserTokenBucketThrottle',
+            'tickets.throttling.EndpointTokenBucketThrottle',
+        ], 'DEFAULT_THROTTLE_RATES': dict(base, **rates)})
+
+    def test_endpoint_rate_is_per_user(self):
+        url = reverse('ticket-comments', args=[self.ticket.pk])
+        with self._rates(comments='2/min'):
+            self.client.force_login(self.staff)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response)
+            # The rest of the API is still available
+            self.assertEqual(self.client.get('/api/tickets/').status_code, 200)
+
+            self.client.force_login(self.other)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_user_rate_covers_every_endpoint(self):
+        with self._rates(user='2/min'):
+            self.client.force_login(self.staff)
+            self.client.get('/api/tickets/')
+            self.client.get(reverse('ticket-comments', args=[self.ticket.pk]))
+            self.assertEqual(self.client.get('/api/tickets/').status_code, 429)
@@ -0,0 +1,132 @@
+import asyncio
+import os
+from unittest import mock
+
+import django
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.events import InProcessBroker, can_receive, get_broker  # noqa: E402
+from tickets.models import Comment, Ticket, User  # noqa: E402
+
+
+@override_settings(TICKET_EVENT_STREAM=True)
+class TicketEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('ev_admin', 'ev_admin@test.com', 'pass12345', role='admin')
+        cls.staff = User.objects.create_user('ev_staff', 'ev_staff@test.com', 'pass12345', role='it_staff')
+        cls.employee = User.objects.create_user('ev_emp', 'ev_emp@test.com', 'pass12345')
+        cls.other = User.objects.create_user('ev_other', 'ev_other@test.com', 'pass12345')
+        cls.ticket = Ticket.objects.create(title='Printer jam', description='Tray 2', created_by=cls.employee)
+
+    async def _published(self, action):
+        """Events ``action`` publishes once it commits, caught by a throwaway subscriber."""
+        def commit():
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+
+        subscription = get_broker().subscribe()
+        try:
+            await sync_to_async(commit)()
+            received = []
+            while (event := await subscription.get(0.05)) is not None:
+                received.append(event)
+            return received
+        finally:
+            subscription.close()
+
+    async def test_update_status_publishes_ticket_and_comment_events(self):
+        events = await self._published(lambda: self.ticket.update_status('in_progress', self.admin))
+        self.assertEqual([e['type'] for e in events], ['ticket', 'comment'])
+        self.assertEqual(events[0]['data']['status'], 'in_progress')
+        self.assertEqual(events[1]['data']['content'], 'Status changed from Open to In Progress')
+        self.assertEqual(events[1]['data']['author']['username'], 'ev_admin')
+
+    async def test_events_follow_ticket_visibility(self):
+        events = await self._published(
+            lambda: Comment.objects.create(ticket=self.ticket, author=self.employee, content='Still jammed')
+        )
+        self.assertTrue(can_receive(self.admin, events[0]))
+        self.assertTrue(can_receive(self.employee, events[0]))
+        self.assertTrue(can_receive(self.staff, events[0]))
+        self.assertFalse(can_receive(self.other, events[0]))
+
+        assigned_elsewhere = dict(events[0], assigned_to=self.admin.pk)
+        self.assertFalse(can_receive(self.staff, assigned_elsewhere))
+
+    async def test_nothing_is_published_before_commit(self):
+        subscription = get_broker().subscribe()
+        try:
+            # TestCase never commits, so the on_commit publish is discarded
+            await sync_to_async(self.ticket.update_status)('resolved', self.admin)
+            self.assertIsNone(await subscription.get(0.05))
+        finally:
+            subscription.close()
+
+    async def test_stream_relays_only_matching_events(self):
+        await sync_to_async(self.async_client.force_login)(self.employee)
+        response = await self.async_client.get('/tickets/events/', {'ticket': self.ticket.pk})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+
+        hidden = await sync_to_async(Ticket.objects.create)(title='Other', description='x', created_by=self.other)
+        for ticket in (hidden, self.ticket):
+            get_broker().publish({
+                'type': 'ticket', 'ticket': ticket.pk, 'created_by': ticket.created_by_id,
+                'assigned_to': None, 'data': {'id': ticket.pk},
+            })
+        chunk = await anext(chunks)
+        self.assertTrue(chunk.startswith(b'id: '))
+        self.assertIn(f'event: ticket\ndata: {{"id": {self.ticket.pk}}}'.encode(), chunk)
+        await chunks.aclose()
+
+    def test_slow_subscriber_is_flagged_for_resync(self):
+        broker = InProcessBroker(max_queue=1)
+
+        async def run():
+            subscription = broker.subscribe()
+            broker.publish({'type': 'ticket'})
+            broker.publish({'type': 'ticket'})
+            first = await subscription.get(0.05)
+            return first, subscription.overflowed
+
+        first, overflowed = asyncio.run(run())
+        self.assertEqual(first['id'], 1)
+        self.assertTrue(overflowed)
+
+    def test_stream_requires_login(self):
+        response = self.client.get('/tickets/events/')
+        self.assertEqual(response.status_code, 403)
+
+
+class DisabledStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('ev_off', 'ev_off@test.com', 'pass12345')
+        cls.ticket = Ticket.objects.create(title='Monitor', description='Flickers', created_by=cls.employee)
+
+    def setUp(self):
+        self.client.force_login(self.employee)
+
+    def test_stream_is_off_by_default(self):
+        self.assertEqual(self.client.get('/tickets/events/').status_code, 404)
+
+    def test_pages_do_not_open_a_stream(self):
+        for url in ('/', f'/tickets/{self.ticket.pk}/'):
+            self.assertNotContains(self.client.get(url), 'EventSource(')
+        with override_settings(TICKET_EVENT_STREAM=True):
+            self.assertContains(self.client.get(f'/tickets/{self.ticket.pk}/'), 'EventSource(')
+
+    def test_nothing_is_published(self):
+        with mock.patch.object(get_broker(), 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.ticket.update_status('resolved', self.employee)
+        publish.assert_not_called()
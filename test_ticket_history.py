@@ -0,0 +1,160 @@
+import os
+from datetime import timedelta
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import workload  # noqa: E402
+from tickets.models import Comment, Ticket, TicketEvent, User  # noqa: E402
+
+
+def logged(ticket):
+    return list(ticket.history.values_list('event_type', 'old_value', 'new_value', 'actor_id'))
+
+
+class EventRecordingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('hist_emp', 'hist_emp@test.com', 'pass12345')
+        cls.staff = User.objects.create_user('hist_staff', 'hist_staff@test.com', 'pass12345', role='it_staff')
+        cls.other = User.objects.create_user('hist_other', 'hist_other@test.com', 'pass12345', role='it_staff')
+
+    def _ticket(self, **fields):
+        return Ticket.objects.create(title='Laptop', description='...', created_by=self.employee, **fields)
+
+    def test_update_status_and_assign_are_logged_with_actor(self):
+        ticket = self._ticket()
+        self.assertEqual(logged(ticket), [])
+
+        ticket.update_status('in_progress', self.staff)
+        self.client.force_login(self.staff)
+        self.client.post(f'/api/tickets/{ticket.pk}/assign/', {'user_id': self.other.pk}, content_type='application/json')
+        self.assertEqual(logged(ticket), [
+            ('status', 'open', 'in_progress', self.staff.pk),
+            ('assignment', '', str(self.other.pk), self.staff.pk),
+        ])
+
+    def test_form_update_logs_each_changed_field_once(self):
+        ticket = self._ticket(assigned_to=self.staff)
+        self.client.force_login(self.staff)
+        self.client.post(reverse('ticket_update', args=[ticket.pk]), {
+            'title': ticket.title, 'description': ticket.description,
+            'status': 'resolved', 'priority': 'high', 'assigned_to': self.staff.pk,
+        })
+        self.assertEqual(sorted(logged(ticket)[1:]), [
+            ('priority', 'medium', 'high', self.staff.pk),
+            ('status', 'open', 'resolved', self.staff.pk),
+        ])
+
+    def test_api_patch_logs_one_event_per_change(self):
+        ticket = self._ticket()
+        self.client.force_login(self.staff)
+        self.client.patch(f'/api/tickets/{ticket.pk}/', {'status': 'resolved'}, content_type='application/json')
+        self.assertEqual(logged(ticket), [('status', 'open', 'resolved', self.staff.pk)])
+
+    def test_bulk_api_logs_changed_tickets_only(self):
+        tickets = [self._ticket() for _ in range(3)]
+        tickets[0].update_status('closed', self.staff)
+        self.client.force_login(self.staff)
+        self.client.post('/api/tickets/bulk/', {
+            'ids': [t.pk for t in tickets], 'operation': 'status', 'value': 'closed',
+        }, content_type='application/json')
+        self.assertEqual(TicketEvent.objects.filter(event_type='status', new_value='closed').count(), 3)
+        self.assertEqual(logged(tickets[1]), [('status', 'open', 'closed', self.staff.pk)])
+
+    @override_settings(AUTO_ASSIGN_TICKETS=True)
+    def test_system_assignments_have_no_actor(self):
+        ticket = self._ticket()
+        self.assertEqual(logged(ticket), [('assignment', '', str(ticket.assigned_to_id), None)])
+
+        with self.settings(AUTO_ASSIGN_TICKETS=False):
+            queued = self._ticket()
+        workload.rebalance(include_assigned=False)
+        self.assertEqual(len(logged(queued)), 1)
+
+
+class EventApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('hapi_emp', 'hapi_emp@test.com', 'pass12345')
+        cls.staff = User.objects.create_user('hapi_staff', 'hapi_staff@test.com', 'pass12345', role='it_staff')
+        cls.ticket = Ticket.objects.create(title='VPN', description='...', created_by=cls.employee)
+        cls.ticket.update_status('in_progress', cls.staff)
+        cls.ticket.update_status('resolved', cls.staff)
+
+    def test_ticket_timeline(self):
+        self.client.force_login(self.employee)
+        response = self.client.get(f'/api/tickets/{self.ticket.pk}/history/')
+        self.assertEqual(
+            [(e['old_value'], e['new_value'], e['actor_name']) for e in response.json()],
+            [('open', 'in_progress', 'hapi_staff'), ('in_progress', 'resolved', 'hapi_staff')],
+        )
+
+    def test_event_log_filters(self):
+        self.client.force_login(self.staff)
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        response = self.client.get('/api/ticket-events/', {'event_type': 'status', 'since': since})
+        self.assertEqual([e['new_value'] for e in response.json()['results']], ['resolved', 'in_progress'])
+        response = self.client.get('/api/ticket-events/', {'until': since})
+        self.assertEqual(response.json()['results'], [])
+        self.assertEqual(self.client.get('/api/ticket-events/', {'since': 'yesterday'}).status_code, 400)
+
+    def test_event_log_is_staff_only(self):
+        self.client.force_login(self.employee)
+        self.assertEqual(self.client.get('/api/ticket-events/').status_code, 403)
+
+
+class BackfillTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('hbf_emp', 'hbf_emp@test.com', 'pass12345')
+        cls.staff = User.objects.create_user('hbf_staff', 'hbf_staff@test.com', 'pass12345', role='it_staff')
+
+    def _note(self, ticket, content, minutes):
+        comment = Comment.objects.create(ticket=ticket, author=self.staff, content=content, is_system_message=True)
+        Comment.objects.filter(pk=comment.pk).update(created_at=ticket.created_at + timedelta(minutes=minutes))
+
+    def test_backfill_parses_system_comments_once(self):
+        ticket = Ticket.objects.create(title='Old', description='...', created_by=self.employee)
+        self._note(ticket, 'Ticket assigned to hbf_staff', 1)
+        self._note(ticket, 'Status changed from Open to In Progress', 2)
+        self._note(ticket, 'Status changed from In Progress to Resolved', 3)
+        self._note(ticket, 'Ticket assigned to someone_deleted', 4)
+        self._note(ticket, 'SLA warning: resolution due soon', 5)
+
+        out = StringIO()
+        call_command('backfill_ticket_history', stdout=out)
+        self.assertIn('Created 3 ticket events', out.getvalue())
+        self.assertEqual(logged(ticket), [
+            ('assignment', '', str(self.staff.pk), self.staff.pk),
+            ('status', 'open', 'in_progress', self.staff.pk),
+            ('status', 'in_progress', 'resolved', self.staff.pk),
+        ])
+        self.assertEqual(ticket.history.last().created_at, ticket.created_at + timedelta(minutes=3))
+
+        call_command('backfill_ticket_history', stdout=StringIO())
+        self.assertEqual(TicketEvent.objects.count(), 3)
+
+    def test_live_comments_are_not_replayed(self):
+        ticket = Ticket.objects.create(title='New', description='...', created_by=self.employee)
+        ticket.update_status('in_progress', self.staff)
+        call_command('backfill_ticket_history', stdout=StringIO())
+        self.assertEqual(len(logged(ticket)), 1)
+
+    def test_status_comment_round_trip(self):
+        content = Ticket.status_comment('open', 'in_progress')
+        self.assertEqual(content, 'Status changed from Open to In Progress')
+        self.assertEqual(Ticket.parse_status_comment(content), 'in_progress')
+        self.assertIsNone(Ticket.parse_status_comment('Status changed from Open to Somewhere'))
+        self.assertIsNone(Ticket.parse_status_comment('Ticket assigned to hbf_staff'))
@@ -0,0 +1,180 @@
+import os
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets.models import Ticket, Comment, User  # noqa: E402
+
+
+class TicketQueryCountTests(TestCase):
+    """List surfaces must cost a fixed number of queries regardless of page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.staff = User.objects.create_user('staff1', 'staff1@test.com', 'pass12345', role='it_staff')
+        cls.employee = User.objects.create_user('emp1', 'emp1@test.com', 'pass12345', role='employee')
+
+    def _make_tickets(self, count):
+        start = Ticket.objects.count()
+        for i in range(start, start + count):
+            creator = User.objects.create_user(f'creator{i}', f'creator{i}@test.com', 'pass12345')
+            ticket = Ticket.objects.create(
+                title=f'Ticket {i}', description='Printer is broken',
+                created_by=creator, assigned_to=self.staff,
+            )
+            Comment.objects.create(ticket=ticket, author=creator, content='Any update?')
+
+    def _count(self, url):
+        # Warm the session and user caches so only the view's own queries differ
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_ticket_list_query_count_is_constant(self):
+        self.client.force_login(self.admin)
+        self._make_tickets(2)
+        small = self._count(reverse('ticket_list'))
+        self._make_tickets(8)
+        self.assertEqual(self._count(reverse('ticket_list')), small)
+        self.assertLessEqual(small, 5)
+
+    def test_api_list_query_count_is_constant(self):
+        self.client.force_login(self.admin)
+        self._make_tickets(2)
+        small = self._count('/api/tickets/')
+        self._make_tickets(8)
+        self.assertEqual(self._count('/api/tickets/'), small)
+
+    def test_ticket_detail_preloads_comment_authors(self):
+        self.client.force_login(self.admin)
+        self._make_tickets(1)
+        ticket = Ticket.objects.get()
+        url = reverse('ticket_detail', args=[ticket.id])
+        small = self._count(url)
+        for i in range(5):
+            author = User.objects.create_user(f'helper{i}', f'helper{i}@test.com', 'pass12345', role='it_staff')
+            Comment.objects.create(ticket=ticket, author=author, content=f'Step {i}')
+        self.assertEqual(self._count(url), small)
+
+    def test_explain_queries_explains_the_dashboard_aggregate(self):
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        section = out.getvalue().split('== dashboard stats (staff scope)')[1].split('== ')[0]
+        with CaptureQueriesContext(connection) as ctx:
+            Ticket.objects.visible_to(self.staff).stats()
+        # The printed statement is the one stats() runs, with its per-status filtered counts
+        self.assertIn('COUNT(', section)
+        self.assertEqual(section.strip().splitlines()[0].count('COUNT('), ctx.captured_queries[0]['sql'].count('COUNT('))
+
+    def test_visible_to_scopes_by_role(self):
+        other = User.objects.create_user('other', 'other@test.com', 'pass12345')
+        own = Ticket.objects.create(title='Mine', description='x', created_by=self.employee)
+        unassigned = Ticket.objects.create(title='Queue', description='x', created_by=other)
+        Ticket.objects.create(
+            title='Elsewhere', description='x', created_by=other,
+            assigned_to=User.objects.create_user('staff2', 'staff2@test.com', 'pass12345', role='it_staff'),
+        )
+
+        self.assertEqual(Ticket.objects.visible_to(self.admin).count(), 3)
+        self.assertEqual(set(Ticket.objects.visible_to(self.staff)), {own, unassigned})
+        self.assertEqual(list(Ticket.objects.visible_to(self.employee)), [own])
+
+
+class TicketApiRepresentationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.ticket = Ticket.objects.create(title='VPN down', description='x', created_by=cls.admin)
+        for i in range(3):
+            Comment.objects.create(ticket=cls.ticket, author=cls.admin, content=f'Update {i}')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_list_is_compact(self):
+        row = self.client.get('/api/tickets/').json()['results'][0]
+        self.assertNotIn('comments', row)
+        self.assertEqual(row['comment_count'], 3)
+        self.assertEqual(row['created_by_name'], 'admin1')
+        self.assertIsNone(row['assigned_to_name'])
+
+    def test_list_can_expand_comments(self):
+        row = self.client.get('/api/tickets/', {'expand': 'comments'}).json()['results'][0]
+        self.assertEqual(len(row['comments']), 3)
+
+    def test_retrieve_embeds_comments(self):
+        body = self.client.get(f'/api/tickets/{self.ticket.id}/').json()
+        self.assertEqual([c['content'] for c in body['comments']], ['Update 0', 'Update 1', 'Update 2'])
+
+    def test_actions_return_the_thread_with_their_system_comment(self):
+        body = self.client.post(
+            f'/api/tickets/{self.ticket.id}/update_status/', {'status': 'in_progress'}, content_type='application/json',
+        ).json()
+        self.assertEqual(body['comment_count'], 4)
+        self.assertEqual(body['comments'][-1]['content'], 'Status changed from Open to In Progress')
+
+        body = self.client.post(
+            f'/api/tickets/{self.ticket.id}/assign/', {'user_id': self.admin.pk}, content_type='application/json',
+        ).json()
+        self.assertEqual(body['comment_count'], 5)
+        self.assertEqual([c['content'] for c in body['comments']][-2:], [
+            'Status changed from Open to In Progress', 'Ticket assigned to admin1',
+        ])
+
+
+class CommentThreadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin1', 'admin1@test.com', 'pass12345', role='admin')
+        cls.ticket = Ticket.objects.create(title='VPN down', description='x', created_by=cls.admin)
+        for i in range(45):
+            Comment.objects.create(ticket=cls.ticket, author=cls.admin, content=f'Step {i}')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_comment_summary_follows_writes(self):
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        self.assertEqual(stale.comment_count, 45)
+
+        stale.update_status('in_progress', self.admin)
+        newest = Comment.objects.latest('created_at')
+        stale.title = 'VPN still down'
+        stale.save()  # must not write back the in-memory count
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.comment_count, 46)
+        self.assertEqual(self.ticket.last_comment_at, newest.created_at)
+
+        newest.delete()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.comment_count, 45)
+        self.assertLess(self.ticket.last_comment_at, newest.created_at)
+
+    def test_api_pages_comments_newest_first(self):
+        url = f'/api/tickets/{self.ticket.pk}/comments/'
+        contents = []
+        while url:
+            body = self.client.get(url).json()
+            self.assertEqual(body['count'], 45)
+            contents.extend(c['content'] for c in body['results'])
+            url = body['next']
+        self.assertEqual(contents, [f'Step {i}' for i in reversed(range(45))])
+
+    def test_detail_page_renders_only_the_newest_comments(self):
+        response = self.client.get(reverse('ticket_detail', args=[self.ticket.pk]))
+        self.assertEqual([c.content for c in response.context['comments']], [f'Step {i}' for i in range(25, 45)])
+        self.assertContains(response, 'Load older comments')
@@ -0,0 +1,188 @@
+import os
+from io import StringIO
+from unittest import mock
+
+import django
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Set up Django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticket_system.settings')
+django.setup()
+
+from tickets import workload  # noqa: E402
+from tickets.models import StaffWorkload, Ticket, TicketEvent, User  # noqa: E402
+
+
+def loads():
+    return {row.user_id: (row.open_tickets, row.weight) for row in StaffWorkload.objects.all() if row.open_tickets}
+
+
+class WorkloadCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('wl_emp', 'wl_emp@test.com', 'pass12345')
+        cls.alice = User.objects.create_user('wl_alice', 'wl_alice@test.com', 'pass12345', role='it_staff')
+        cls.bob = User.objects.create_user('wl_bob', 'wl_bob@test.com', 'pass12345', role='it_staff')
+
+    def _ticket(self, **fields):
+        fields.setdefault('priority', 'medium')
+        return Ticket.objects.create(title='Ticket', description='...', created_by=self.employee, **fields)
+
+    def test_counters_follow_ticket_writes(self):
+        ticket = self._ticket(assigned_to=self.alice, priority='urgent')
+        self.assertEqual(loads(), {self.alice.pk: (1, 5)})
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.priority = 'low'
+        ticket.save()
+        self.assertEqual(loads(), {self.alice.pk: (1, 1)})
+
+        ticket.assigned_to = self.bob
+        ticket.save()
+        self.assertEqual(loads(), {self.bob.pk: (1, 1)})
+
+        ticket.update_status('resolved', self.bob)
+        self.assertEqual(loads(), {})
+
+        ticket.update_status('open', self.bob)
+        self.assertEqual(loads(), {self.bob.pk: (1, 1)})
+        ticket.delete()
+        self.assertEqual(loads(), {})
+
+    def test_bulk_api_keeps_counters(self):
+        tickets = [self._ticket(assigned_to=self.alice) for _ in range(3)]
+        self.client.force_login(self.alice)
+        response = self.client.post('/api/tickets/bulk/', {
+            'ids': [t.pk for t in tickets[:2]], 'operation': 'assign', 'value': self.bob.pk,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.client.post('/api/tickets/bulk/', {
+            'ids': [tickets[2].pk], 'operation': 'priority', 'value': 'urgent',
+        }, content_type='application/json')
+        self.assertEqual(loads(), {self.alice.pk: (1, 5), self.bob.pk: (2, 4)})
+        self.assertEqual(loads(), {k: tuple(v) for k, v in workload._open_totals().items()})
+
+    def test_api_patch_keeps_counters(self):
+        ticket = self._ticket(assigned_to=self.alice, status='in_progress', priority='high')
+        self.client.force_login(self.alice)
+        response = self.client.patch(f'/api/tickets/{ticket.pk}/', {'status': 'resolved'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StaffWorkload.objects.get(user=self.alice).open_tickets, 0)
+        self.assertEqual(loads(), {})
+
+    def test_rebuild_matches_incremental_counters(self):
+        self._ticket(assigned_to=self.alice, priority='high')
+        self._ticket(assigned_to=self.bob)
+        self._ticket(assigned_to=self.bob, status='closed')
+        expected = loads()
+        StaffWorkload.objects.all().delete()
+        call_command('rebalance_tickets', '--rebuild', stdout=StringIO())
+        self.assertEqual(loads(), expected)
+
+
+@override_settings(AUTO_ASSIGN_TICKETS=True)
+class AutoAssignTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('aa_emp', 'aa_emp@test.com', 'pass12345', department='Finance')
+        cls.alice = User.objects.create_user('aa_alice', 'aa_alice@test.com', 'pass12345', role='it_staff')
+        cls.bob = User.objects.create_user('aa_bob', 'aa_bob@test.com', 'pass12345', role='it_staff')
+
+    def _ticket(self, **fields):
+        fields.setdefault('created_by', self.employee)
+        return Ticket.objects.create(title='Ticket', description='...', **fields)
+
+    def test_new_ticket_goes_to_lowest_weighted_load(self):
+        self._ticket(assigned_to=self.alice, priority='urgent')
+        self._ticket(assigned_to=self.bob, priority='low')
+        self._ticket(assigned_to=self.bob, priority='low')
+        # Bob has more tickets but less weight
+        self.assertEqual(self._ticket(priority='high').assigned_to, self.bob)
+        self.assertEqual(self._ticket(priority='high').assigned_to, self.alice)
+
+    def test_pick_is_one_query(self):
+        for _ in range(3):
+            User.objects.create_user(f'aa_extra{_}', f'aa_extra{_}@test.com', 'pass12345', role='it_staff')
+        with CaptureQueriesContext(connection) as ctx:
+            workload.pick_assignee()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_department_is_preferred(self):
+        carol = User.objects.create_user('aa_carol', 'aa_carol@test.com', 'pass12345', role='it_staff', department='Finance')
+        self._ticket(assigned_to=carol, priority='urgent')
+        self.assertEqual(self._ticket().assigned_to, carol)
+        with self.settings(AUTO_ASSIGN_MATCH_DEPARTMENT=False):
+            self.assertNotEqual(self._ticket().assigned_to, carol)
+
+    def test_reopened_unassigned_ticket_is_assigned(self):
+        with self.settings(AUTO_ASSIGN_TICKETS=False):
+            ticket = self._ticket(status='closed')
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.update_status('open', self.alice)
+        self.assertIsNotNone(Ticket.objects.get(pk=ticket.pk).assigned_to_id)
+
+    def test_explicit_assignee_is_kept(self):
+        self._ticket(assigned_to=self.bob, priority='urgent')
+        self.assertEqual(self._ticket(assigned_to=self.bob).assigned_to, self.bob)
+
+    @override_settings(AUTO_ASSIGN_TICKETS=False)
+    def test_disabled_by_default_setting(self):
+        self.assertIsNone(self._ticket().assigned_to)
+
+
+class RebalanceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user('rb_emp', 'rb_emp@test.com', 'pass12345')
+        cls.alice = User.objects.create_user('rb_alice', 'rb_alice@test.com', 'pass12345', role='it_staff')
+        cls.bob = User.objects.create_user('rb_bob', 'rb_bob@test.com', 'pass12345', role='it_staff')
+
+    def _ticket(self, **fields):
+        return Ticket.objects.create(title='Ticket', description='...', created_by=self.employee, **fields)
+
+    def test_rebalance_spreads_open_tickets_and_queue(self):
+        for _ in range(4):
+            self._ticket(assigned_to=self.alice)
+        started = self._ticket(assigned_to=self.alice, status='in_progress')
+        queued = self._ticket(priority='urgent')
+
+        out = StringIO()
+        call_command('rebalance_tickets', '--dry-run', stdout=out)
+        self.assertIn('Would move', out.getvalue())
+        self.assertEqual(Ticket.objects.filter(assigned_to=self.bob).count(), 0)
+
+        moves = workload.rebalance()
+        self.assertNotIn(started.pk, moves)
+        self.assertEqual(Ticket.objects.get(pk=started.pk).assigned_to, self.alice)
+        self.assertEqual(Ticket.objects.filter(assigned_to__isnull=True).count(), 0)
+        self.assertIn(queued.pk, moves)
+        # 5 x medium (2) + 1 x urgent (5) = 15, split 8 / 7 at best
+        self.assertEqual(sorted(weight for _open, weight in loads().values()), [7, 8])
+        self.assertEqual(loads(), {k: tuple(v) for k, v in workload._open_totals().items()})
+
+    def test_unassigned_only_leaves_assignments(self):
+        for _ in range(3):
+            self._ticket(assigned_to=self.alice)
+        self._ticket()
+        moves = workload.rebalance(include_assigned=False)
+        self.assertEqual(list(moves.values()), [(None, self.bob.pk)])
+
+    def test_tickets_closed_after_planning_are_not_logged(self):
+        kept = self._ticket()
+        closed = self._ticket()
+        plan = workload.plan_rebalance()
+        self.assertEqual(set(plan[0]), {kept.pk, closed.pk})
+        Ticket.objects.filter(pk=closed.pk).update(status='closed')
+
+        with mock.patch.object(workload, 'plan_rebalance', return_value=plan):
+            moves = workload.rebalance()
+        self.assertEqual(list(moves), [kept.pk])
+        self.assertIsNone(Ticket.objects.get(pk=closed.pk).assigned_to)
+        events = TicketEvent.objects.filter(event_type=TicketEvent.ASSIGNMENT)
+        self.assertEqual(list(events.values_list('ticket_id', flat=True)), [kept.pk])
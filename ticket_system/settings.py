@@ -36,19 +36,95 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tickets.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tickets.auth_cache.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'ticket_system.urls'
 
+# ================= CACHE & SESSIONS =================
+# CACHE_BACKEND is "locmem" (default), "file", "redis", "memcached" or any
+# Django cache backend path; CACHE_LOCATION is its directory, URL or name.
+# locmem is per process, so multi-worker deployments want a shared backend.
+_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION", str(BASE_DIR / ".cache") if CACHE_BACKEND == "file" else "it-support"
+        ),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", "300")),
+    }
+}
+# Sessions are read through the cache and written through to the database
+SESSION_ENGINE = os.getenv("SESSION_ENGINE", "django.contrib.sessions.backends.cached_db")
+# The authenticated user is cached per session user for this many seconds
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", "60"))
+# API token lookups (see tickets/tokens.py) are cached for this many seconds
+API_TOKEN_CACHE_TIMEOUT = int(os.getenv("API_TOKEN_CACHE_TIMEOUT", "60"))
+# Upper bound for rendered page fragments; their keys change with the data anyway
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "600"))
+
+# ================= METRICS =================
+# Workers flush their counters into METRICS_DIR so /metrics reports the
+# whole server; leave unset for single-process in-memory metrics.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# Prometheus scrapes with "Authorization: Bearer <token>"; unset means admins only
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# ================= TICKET EVENT STREAM =================
+# /tickets/events/ pushes ticket changes over Server-Sent Events. Each open
+# page holds a connection for TICKET_EVENT_STREAM_SECONDS, which ties up a
+# whole worker under WSGI (the gunicorn deploy in render.yaml), so it stays
+# off unless TICKET_EVENT_STREAM=True and the app is served by an ASGI
+# server. The in-process broker only reaches streams in the same process;
+# point TICKET_EVENT_BROKER at a shared broker to fan out across workers.
+TICKET_EVENT_STREAM = os.getenv("TICKET_EVENT_STREAM", "False") == "True"
+TICKET_EVENT_BROKER = os.getenv("TICKET_EVENT_BROKER", "tickets.events.InProcessBroker")
+TICKET_EVENT_HEARTBEAT = float(os.getenv("TICKET_EVENT_HEARTBEAT", "15"))
+TICKET_EVENT_STREAM_SECONDS = float(os.getenv("TICKET_EVENT_STREAM_SECONDS", "600"))
+
+# ================= AUTO-ASSIGNMENT =================
+# Route new and reopened unassigned tickets to the IT staff member with the
+# lowest open workload, weighted by priority, preferring the creator's department
+AUTO_ASSIGN_TICKETS = os.getenv("AUTO_ASSIGN_TICKETS", "False") == "True"
+AUTO_ASSIGN_MATCH_DEPARTMENT = os.getenv("AUTO_ASSIGN_MATCH_DEPARTMENT", "True") == "True"
+AUTO_ASSIGN_PRIORITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 5}
+
+# ================= SLA =================
+# Hours until the first response (the ticket leaves Open) and until
+# resolution, per priority. `manage.py sweep_sla` posts a warning
+# SLA_WARNING_MINUTES before a deadline and a breach note after it.
+SLA_TARGETS = {
+    'urgent': {'response': 1, 'resolve': 4},
+    'high': {'response': 4, 'resolve': 24},
+    'medium': {'response': 8, 'resolve': 72},
+    'low': {'response': 24, 'resolve': 120},
+}
+SLA_WARNING_MINUTES = int(os.getenv("SLA_WARNING_MINUTES", "60"))
+
+# ================= EMAIL VERIFICATION =================
+# "model" stores an EmailVerification row per link; "signed" sends a
+# timestamped token signed with SECRET_KEY and stores nothing. Links of
+# either kind expire after EMAIL_VERIFICATION_MAX_AGE_HOURS.
+EMAIL_VERIFICATION_TOKENS = os.getenv("EMAIL_VERIFICATION_TOKENS", "model")
+EMAIL_VERIFICATION_MAX_AGE_HOURS = int(os.getenv("EMAIL_VERIFICATION_MAX_AGE_HOURS", "24"))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -164,12 +240,36 @@ LOGOUT_REDIRECT_URL = 'login'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # Integrations: "Authorization: Token <key>"; listed second so anonymous requests still get 403
+        'tickets.tokens.ApiTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Token buckets (see tickets/throttling.py): a per-user budget plus per-endpoint budgets
+    'DEFAULT_THROTTLE_CLASSES': [
+        'tickets.throttling.UserTokenBucketThrottle',
+        'tickets.throttling.EndpointTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'user': os.getenv('API_THROTTLE_USER', '600/min'),
+        'tickets': '300/min',
+        'tickets_bulk': '20/min',
+        'comments': '120/min',
+    },
+}
+
+# Per client IP and per targeted account, for the open auth views
+AUTH_THROTTLE_RATES = {
+    'login.ip': '20/min',
+    'login.account': '5/min',
+    'register.ip': '10/hour',
+    'register.account': '3/hour',
+    'resend_verification.ip': '10/hour',
+    'resend_verification.account': '3/hour',
+    'api_token.ip': '60/min',
 }
 
 # CORS settings
@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from tickets.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/', include('tickets.api_urls')),
     path('', include('tickets.urls')),
 ]
@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Ticket, Comment, EmailVerification
+from .models import User, Ticket, Comment, EmailVerification, OutboundEmail, ImportCheckpoint, StaffWorkload, TicketEvent, ApiToken
+from . import tokens
 from .models import EmailVerification
 
 
@@ -48,4 +49,69 @@ class EmailVerificationAdmin(admin.ModelAdmin):
 admin.site.register(EmailVerification, EmailVerificationAdmin)
 
 
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
 
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'kind', 'position', 'imported', 'failed', 'updated_at', 'completed_at')
+    list_filter = ('kind',)
+    readonly_fields = ('started_at', 'updated_at')
+
+
+@admin.register(StaffWorkload)
+class StaffWorkloadAdmin(admin.ModelAdmin):
+    list_display = ('user', 'open_tickets', 'weight')
+    ordering = ('weight', 'open_tickets')
+    readonly_fields = ('user', 'open_tickets', 'weight')
+
+
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    list_display = ('ticket', 'event_type', 'old_value', 'new_value', 'actor', 'created_at')
+    list_filter = ('event_type', 'created_at')
+    raw_id_fields = ('ticket', 'actor')
+
+    # The log is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'scope', 'prefix', 'created_at', 'expires_at', 'last_used_at', 'revoked_at')
+    list_filter = ('scope', 'revoked_at')
+    search_fields = ('name', 'prefix', 'user__username')
+    raw_id_fields = ('user',)
+    readonly_fields = ('prefix', 'created_by', 'created_at', 'last_used_at', 'revoked_at')
+    actions = ['revoke_tokens']
+
+    def get_readonly_fields(self, request, obj=None):
+        # The owner of an issued token is fixed; revoke it and issue a new one instead
+        if obj is not None:
+            return self.readonly_fields + ('user',)
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        obj.created_by = request.user
+        key = tokens.assign_key(obj)
+        super().save_model(request, obj, form, change)
+        self.message_user(request, f'Token key (shown only once): {key}', messages.WARNING)
+
+    @admin.action(description='Revoke selected tokens')
+    def revoke_tokens(self, request, queryset):
+        for token in queryset.filter(revoked_at__isnull=True):
+            tokens.revoke(token)
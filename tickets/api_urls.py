@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .api_views import TicketViewSet, CommentViewSet
+from .api_views import TicketViewSet, CommentViewSet, ReportViewSet, TicketEventViewSet
 
 router = DefaultRouter()
 router.register(r'tickets', TicketViewSet, basename='ticket')
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'reports', ReportViewSet, basename='report')
+router.register(r'ticket-events', TicketEventViewSet, basename='ticket-event')
 
 urlpatterns = [
     path('', include(router.urls)),
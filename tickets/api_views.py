@@ -2,13 +2,23 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.utils.urls import replace_query_param
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Ticket, Comment, User
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from .models import Ticket, Comment, TicketEvent, User
+from .search import search_tickets
+from .pagination import COMMENT_PAGE_SIZE, InvalidCursor, TicketPagination, keyset_paginate
+from .stats import invalidate_dashboard_stats
+from .conditional import conditional_response, page_validators, ticket_validators
+from . import events, history, rollups, sla, workload
 from .serializers import (
-    TicketSerializer, TicketCreateSerializer, TicketUpdateSerializer,
-    CommentSerializer, CommentCreateSerializer
+    TicketSerializer, TicketListSerializer, TicketCreateSerializer, TicketUpdateSerializer,
+    CommentSerializer, CommentCreateSerializer, BulkTicketOperationSerializer, TicketEventSerializer
 )
 
 
@@ -17,38 +27,89 @@ class TicketViewSet(viewsets.ModelViewSet):
     ViewSet for Ticket CRUD operations
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = TicketPagination
+    throttle_scope = 'tickets'
+    throttle_scopes = {'bulk': 'tickets_bulk', 'add_comment': 'comments', 'comments': 'comments'}
+    # Columns a list validator reads per row (created_at for keyset cursors)
+    VALIDATOR_FIELDS = ('id', 'created_at', 'updated_at', 'comment_count', 'last_comment_at')
+    
+    def _compact_list(self):
+        """List responses skip comments unless the client asks for ?expand=comments."""
+        expand = self.request.query_params.get('expand', '')
+        return self.action == 'list' and 'comments' not in expand.split(',')
     
     def get_queryset(self):
-        user = self.request.user
-        
-        if user.is_admin():
-            return Ticket.objects.all()
-        elif user.is_it_staff():
-            return Ticket.objects.filter(
-                Q(assigned_to=user) | Q(assigned_to__isnull=True) | Q(created_by=user)
-            )
+        queryset = Ticket.objects.visible_to(self.request.user)
+        if self.action in ('comments', 'history'):
+            return queryset
+        if self._compact_list():
+            queryset = queryset.for_list()
         else:
-            return Ticket.objects.filter(created_by=user)
+            queryset = queryset.for_detail()
+        search_query = self.request.query_params.get('search')
+        if self.action == 'list' and search_query:
+            queryset = search_tickets(queryset, search_query)
+        return queryset
     
     def get_serializer_class(self):
+        if self._compact_list():
+            return TicketListSerializer
         if self.action == 'create':
             return TicketCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return TicketUpdateSerializer
         return TicketSerializer
     
+    def _list_validators(self, request):
+        """
+        Validators for the page this request will serve: the same filters,
+        search and paging, reading only the columns a validator needs.
+        """
+        paginator = self.pagination_class()
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None).only(*self.VALIDATOR_FIELDS)
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        if paginator.keyset_page is None:
+            paging = paginator.page.paginator.count
+        else:
+            paging = (paginator.keyset_page.has_next, paginator.keyset_page.has_previous)
+        return page_validators(page, request.user.ticket_scope, paging, request.get_full_path())
+    
+    def list(self, request, *args, **kwargs):
+        validators = self._list_validators(request)
+        return conditional_response(request, validators, lambda: super(TicketViewSet, self).list(request, *args, **kwargs))
+    
+    def retrieve(self, request, *args, **kwargs):
+        validators = None
+        if str(kwargs.get('pk', '')).isdigit():
+            validators = ticket_validators(
+                Ticket.objects.visible_to(request.user).filter(pk=kwargs['pk']),
+                request.user.ticket_scope, request.get_full_path(),
+            )
+        return conditional_response(request, validators, lambda: super(TicketViewSet, self).retrieve(request, *args, **kwargs))
+    
+    def _reloaded(self, ticket):
+        """
+        The ticket re-read after a write; the preloaded thread and comment
+        summary predate any system comment it added. Not scoped by
+        visibility, since assigning may move the ticket out of the caller's view.
+        """
+        return Ticket.objects.for_detail().get(pk=ticket.pk)
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     def perform_update(self, serializer):
-        ticket = self.get_object()
+        # One save of the serializer's instance, so the tracked-field receivers see each change once
+        ticket = serializer.instance
         old_status = ticket.status
-        serializer.save()
-        
-        # Handle status change
-        ticket.refresh_from_db()
-        if old_status != ticket.status:
-            ticket.update_status(ticket.status, self.request.user)
+        new_status = serializer.validated_data.get('status', old_status)
+        with transaction.atomic():
+            if new_status != old_status:
+                ticket.set_status(new_status)
+            ticket.changed_by = self.request.user
+            serializer.save()
+            if new_status != old_status:
+                ticket.add_status_comment(old_status, self.request.user)
     
     @action(detail=True, methods=['post'])
     def add_comment(self, request, pk=None):
@@ -64,6 +125,36 @@ class TicketViewSet(viewsets.ModelViewSet):
             return Response(CommentSerializer(comment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['get'])
+    def comments(self, request, pk=None):
+        """
+        One page of the comment thread, newest first. ``next`` links to the
+        older comments; pass ``?cursor=`` from it to keep loading.
+        """
+        ticket = self.get_object()
+        try:
+            page = keyset_paginate(
+                ticket.comments.select_related('author'),
+                request.query_params.get('cursor'),
+                COMMENT_PAGE_SIZE,
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        next_url = None
+        if page.has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', page.next_cursor)
+        return Response({
+            'count': ticket.comment_count,
+            'next': next_url,
+            'results': CommentSerializer(page.object_list, many=True).data,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """The ticket's status, priority and assignment changes, oldest first."""
+        ticket = self.get_object()
+        return Response(TicketEventSerializer(ticket.history.select_related('actor'), many=True).data)
+    
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         """Update ticket status"""
@@ -90,7 +181,117 @@ class TicketViewSet(viewsets.ModelViewSet):
             )
         
         ticket.update_status(new_status, request.user)
-        return Response(TicketSerializer(ticket).data)
+        return Response(TicketSerializer(self._reloaded(ticket)).data)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Apply one status, priority or assignment change to many tickets.
+        
+        Visibility is checked in one query, the change is applied with one
+        UPDATE and system comments are written with one bulk insert, all in
+        a single transaction. Each requested id gets its own result entry.
+        """
+        if not (request.user.is_it_staff() or request.user.is_admin()):
+            return Response(
+                {'error': 'Permission denied'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = BulkTicketOperationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        ids = serializer.validated_data['ids']
+        operation = serializer.validated_data['operation']
+        value = serializer.validated_data['value']
+        assignee = serializer.validated_data.get('assignee')
+        
+        field = {'status': 'status', 'priority': 'priority', 'assign': 'assigned_to_id'}[operation]
+        new_value = assignee.pk if assignee else value
+        
+        with transaction.atomic():
+            current = {
+                row['id']: row
+                for row in Ticket.objects.visible_to(request.user)
+                .filter(id__in=ids)
+                .select_for_update()
+                .values('id', 'status', 'priority', 'assigned_to_id', 'created_at', 'response_due_at', 'resolve_due_at')
+            }
+            changed = [
+                ticket_id for ticket_id in ids
+                if ticket_id in current and current[ticket_id][field] != new_value
+            ]
+            
+            if changed:
+                now = timezone.now()
+                updates = {field: new_value, 'updated_at': now}
+                if operation == 'status' and value in ('resolved', 'closed'):
+                    timestamp = f'{value}_at'
+                    # UPDATE reads pre-update values, so this only stamps real transitions
+                    updates[timestamp] = Case(
+                        When(~Q(status=value), then=Value(now)),
+                        default=F(timestamp),
+                    )
+                if operation in ('status', 'priority'):
+                    updates.update(sla.bulk_deadline_updates((current[i] for i in changed), field, value, now))
+                
+                if operation == 'status':
+                    notes = {
+                        ticket_id: Ticket.status_comment(current[ticket_id]['status'], value) for ticket_id in changed
+                    }
+                elif operation == 'assign':
+                    notes = {ticket_id: f"Ticket assigned to {assignee.username}" for ticket_id in changed}
+                else:
+                    notes = {}
+                comments = []
+                if notes:
+                    comments = Comment.objects.bulk_create([
+                        Comment(ticket_id=ticket_id, author=request.user, content=content, is_system_message=True)
+                        for ticket_id, content in notes.items()
+                    ])
+                    # bulk_create skips post_save; fold the thread summary into the UPDATE
+                    updates['comment_count'] = F('comment_count') + 1
+                    updates['last_comment_at'] = Value(comments[0].created_at)
+                Ticket.objects.filter(id__in=changed).update(**updates)
+                
+                # QuerySet.update() skips post_save, so maintain derived data here
+                rollups.record_bulk_transitions(
+                    [(current[i]['priority'], current[i]['status'], current[i]['created_at']) for i in changed],
+                    now,
+                    new_priority=value if operation == 'priority' else None,
+                    new_status=value if operation == 'status' else None,
+                )
+                workload.record_changes(
+                    (workload.row_state(current[i]), workload.row_state(dict(current[i], **{field: new_value})))
+                    for i in changed
+                )
+                history.record_changes(((i, current[i], {field: new_value}) for i in changed), request.user, now)
+                transaction.on_commit(invalidate_dashboard_stats)
+                
+                # One read of the new state feeds the ticket and comment events
+                if events.enabled():
+                    refreshed = {
+                        ticket.pk: ticket
+                        for ticket in Ticket.objects.filter(id__in=changed).select_related('assigned_to')
+                    }
+                    for ticket in refreshed.values():
+                        events.publish_ticket(ticket)
+                    for comment in comments:
+                        events.publish_comment(comment, refreshed[comment.ticket_id])
+        
+        changed_ids = set(changed)
+        results = []
+        for ticket_id in ids:
+            if ticket_id not in current:
+                results.append({'id': ticket_id, 'success': False, 'error': 'Not found'})
+            else:
+                results.append({'id': ticket_id, 'success': True, 'changed': ticket_id in changed_ids})
+        
+        return Response({
+            'operation': operation,
+            'updated': len(changed_ids),
+            'results': results,
+        })
     
     @action(detail=True, methods=['post'])
     def assign(self, request, pk=None):
@@ -118,18 +319,20 @@ class TicketViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        ticket.assigned_to = user
-        ticket.save()
-        
-        # Create system comment
-        Comment.objects.create(
-            ticket=ticket,
-            author=request.user,
-            content=f"Ticket assigned to {user.username}",
-            is_system_message=True
-        )
+        with transaction.atomic():
+            ticket.assigned_to = user
+            ticket.changed_by = request.user
+            ticket.save()
+            
+            # Create system comment
+            Comment.objects.create(
+                ticket=ticket,
+                author=request.user,
+                content=f"Ticket assigned to {user.username}",
+                is_system_message=True
+            )
         
-        return Response(TicketSerializer(ticket).data)
+        return Response(TicketSerializer(self._reloaded(ticket)).data)
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -138,6 +341,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = CommentSerializer
+    throttle_scope = 'comments'
     
     def get_queryset(self):
         ticket_id = self.request.query_params.get('ticket_id')
@@ -157,3 +361,75 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         serializer.save(author=self.request.user, ticket=ticket)
 
+
+class ReportViewSet(viewsets.ViewSet):
+    """
+    Ticket trend reports read from the daily metrics rollup (IT staff/admin)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        if not (request.user.is_it_staff() or request.user.is_admin()):
+            raise PermissionDenied('Only IT staff and administrators can view reports.')
+        
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 366)
+        except ValueError:
+            return Response(
+                {'error': 'days must be an integer'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        return Response({
+            'start': start,
+            'end': end,
+            'daily': rollups.daily_report(start, end),
+            'backlog_by_priority': rollups.backlog_by_priority(end),
+        })
+
+
+class TicketEventViewSet(viewsets.ViewSet):
+    """
+    The ticket event log across tickets for time-range analytics (IT
+    staff/admin), newest first with keyset paging. Filters: ``event_type``,
+    ``ticket``, and ISO 8601 ``since`` / ``until`` bounds on the event time.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        user = request.user
+        if not (user.is_it_staff() or user.is_admin()):
+            raise PermissionDenied('Only IT staff and administrators can read the event log.')
+        
+        events = TicketEvent.objects.select_related('actor')
+        if not user.is_admin():
+            events = events.filter(ticket__in=Ticket.objects.visible_to(user))
+        params = request.query_params
+        if params.get('event_type'):
+            events = events.filter(event_type=params['event_type'])
+        if params.get('ticket'):
+            if not params['ticket'].isdigit():
+                return Response({'error': 'ticket must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            events = events.filter(ticket_id=params['ticket'])
+        for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            if params.get(param):
+                moment = parse_datetime(params[param])
+                if moment is None:
+                    return Response({'error': f'{param} must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+                if timezone.is_naive(moment):
+                    moment = timezone.make_aware(moment)
+                events = events.filter(**{lookup: moment})
+        
+        try:
+            page = keyset_paginate(events, params.get('cursor'), history.EVENT_PAGE_SIZE)
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        next_url = None
+        if page.has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', page.next_cursor)
+        return Response({
+            'next': next_url,
+            'results': TicketEventSerializer(page.object_list, many=True).data,
+        })
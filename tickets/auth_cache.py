@@ -0,0 +1,64 @@
+# ================= AUTHENTICATED USER CACHE =================
+#
+# AuthenticationMiddleware loads the User row on every request. With
+# cache-backed sessions the session lookup is already served from the
+# cache, so the user is cached too: the session names the user id, and
+# the user object lives under a short-TTL key for that id. User saves and
+# deletes drop the key (see signals), so role and is_active changes apply
+# on the very next request.
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def get_cached_user(request):
+    """
+    Drop-in for ``django.contrib.auth.get_user`` that serves the user from
+    the cache. The session auth hash is still verified on every request,
+    so a password change logs out other sessions exactly as before.
+    """
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = _load_user(request)
+    return request._cached_user
+
+
+def _load_user(request):
+    user_id = request.session.get(auth.SESSION_KEY)
+    backend_path = request.session.get(auth.BACKEND_SESSION_KEY)
+    if user_id is None or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+        return user
+
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(session_hash, user.get_session_auth_hash())):
+        # Secret key fallbacks and flushing the stale session are Django's call
+        return auth.get_user(request)
+    user.backend = backend_path
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware whose ``request.user`` comes from the user cache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
@@ -0,0 +1,90 @@
+# ================= CONDITIONAL GET =================
+#
+# ETag / Last-Modified validators for ticket responses. The validators come
+# from one aggregate query over the tickets' updated_at and their
+# denormalized comment summary, so a poll of an unchanged resource is answered with 304 Not Modified
+# before anything is rendered or serialized. Lists are validated by the
+# page actually served (page_validators) rather than by every visible ticket,
+# and HTML pages with forms fold in the CSRF secret they embed.
+
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def _etag(fingerprint):
+    return 'W/"%s"' % hashlib.md5(repr(fingerprint).encode(), usedforsecurity=False).hexdigest()
+
+
+def ticket_validators(tickets, *variant):
+    """
+    Return ``(etag, last_modified)`` describing the current state of the
+    ``tickets`` queryset, or ``None`` when it is empty.
+
+    ``variant`` (role scope, URL, ...) is folded into the ETag so different
+    representations of the same tickets never share a validator. Ticket and
+    comment counts are included so deletions change the ETag too.
+    """
+    state = tickets.order_by().aggregate(
+        ticket_total=Count('id'),
+        updated=Max('updated_at'),
+        comment_total=Sum('comment_count'),
+        commented=Max('last_comment_at'),
+    )
+    if not state['ticket_total']:
+        return None
+
+    last_modified = max(filter(None, (state['updated'], state['commented'])))
+    etag = _etag((state['ticket_total'], state['updated'], state['comment_total'], state['commented'], variant))
+    return etag, last_modified
+
+
+def page_validators(tickets, *variant):
+    """
+    ``(etag, last_modified)`` for one fetched page of tickets, which must
+    carry ``updated_at``, ``comment_count`` and ``last_comment_at``, or
+    ``None`` when the page is empty. Paging state that shapes the response
+    (total count, whether more pages follow) belongs in ``variant``.
+    """
+    if not tickets:
+        return None
+    last_modified = max(
+        moment for ticket in tickets for moment in (ticket.updated_at, ticket.last_comment_at) if moment
+    )
+    rows = [(ticket.pk, ticket.updated_at, ticket.comment_count, ticket.last_comment_at) for ticket in tickets]
+    return _etag((rows, variant)), last_modified
+
+
+def form_page_variant(request):
+    """
+    Validator variant for an HTML page that embeds a CSRF token: the CSRF
+    secret, so a page cached before the token rotated (logging in again)
+    is never revalidated and re-shown with a stale token.
+    """
+    get_token(request)
+    return request.META['CSRF_COOKIE']
+
+
+def conditional_response(request, validators, render):
+    """
+    Answer ``request`` with 304 when its If-None-Match / If-Modified-Since
+    headers match ``validators``; otherwise call ``render()``. Either way
+    the response carries the validators and must be revalidated on reuse.
+    """
+    if validators is None or request.method not in ('GET', 'HEAD'):
+        return render()
+
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        response = render()
+        if not 200 <= response.status_code < 300:
+            return response
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,70 @@
+# ================= EMPLOYEE DIRECTORY =================
+#
+# Server-side search and paging for Employee Management and the user
+# typeahead. Every search word must occur, case-insensitively, in the
+# username, email, name or department, and only the columns the directory
+# shows are read. On PostgreSQL, trigram GIN indexes over exactly the
+# UPPER(column::text) expressions Django's icontains compares (migration
+# 0018) turn those substring matches into index scans; other backends
+# scan the users table, which stays cheap at directory sizes.
+
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from .models import User
+
+SEARCH_FIELDS = ('username', 'email', 'full_name', 'first_name', 'last_name', 'department')
+# Everything the directory table and display_name read
+LISTED_FIELDS = ('id', 'username', 'email', 'full_name', 'first_name', 'last_name', 'department', 'role', 'is_active')
+
+PAGE_SIZE = 25
+TYPEAHEAD_LIMIT = 10
+# Shorter fragments match most of the directory and cannot use trigrams
+TYPEAHEAD_MIN_LENGTH = 2
+MAX_SEARCH_WORDS = 5
+
+
+def search_users(queryset, query):
+    """Narrow ``queryset`` to users matching every word of ``query``."""
+    for word in query.split()[:MAX_SEARCH_WORDS]:
+        matches = Q()
+        for field in SEARCH_FIELDS:
+            matches |= Q(**{f'{field}__icontains': word})
+        queryset = queryset.filter(matches)
+    return queryset
+
+
+def directory(query=''):
+    """The Employee Management listing: listed columns only, in id order."""
+    users = User.objects.only(*LISTED_FIELDS).order_by('id')
+    if query:
+        users = search_users(users, query)
+    return users
+
+
+def typeahead(query, limit=TYPEAHEAD_LIMIT):
+    """
+    Up to ``limit`` active users matching ``query`` as JSON-ready dicts,
+    usernames starting with the first word ahead of other matches.
+    """
+    query = query.strip()
+    if len(query) < TYPEAHEAD_MIN_LENGTH:
+        return []
+    first_word = query.split()[0]
+    users = (
+        search_users(User.objects.filter(is_active=True), query)
+        .annotate(rank=Case(
+            When(username__istartswith=first_word, then=Value(0)), default=Value(1), output_field=IntegerField(),
+        ))
+        .only(*LISTED_FIELDS)
+        .order_by('rank', 'username')[:limit]
+    )
+    return [
+        {
+            'id': user.pk,
+            'username': user.username,
+            'name': user.display_name,
+            'email': user.email,
+            'department': user.department,
+        }
+        for user in users
+    ]
@@ -0,0 +1,240 @@
+# ================= TICKET EVENT STREAM =================
+#
+# Ticket changes (saves, status updates, assignments, new comments) are
+# published to a pluggable broker once their transaction commits, and the
+# Server-Sent Events view below relays them to every connected user allowed
+# to see the ticket, so open pages update over one long-lived connection
+# instead of polling. TICKET_EVENT_BROKER names the broker class; the
+# default InProcessBroker fans out within one ASGI process.
+#
+# Each open stream holds its connection for TICKET_EVENT_STREAM_SECONDS,
+# which under WSGI means a whole worker, so the feature is off unless
+# TICKET_EVENT_STREAM is set. Turn it on only when the app is served by an
+# ASGI server and, with more than one process, a shared broker; while it
+# is off nothing is published and pages do not open a stream.
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import Http404, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+# How long an EventSource waits before reconnecting after the stream ends
+RECONNECT_MILLISECONDS = 3000
+
+
+class EventBroker:
+    """
+    Pub/sub backend interface. ``publish`` is called from synchronous
+    request code; ``subscribe`` is called from an async view and returns
+    a subscription whose ``get(timeout)`` coroutine yields event dicts.
+    """
+
+    def publish(self, event):
+        raise NotImplementedError
+
+    def subscribe(self):
+        raise NotImplementedError
+
+
+class Subscription:
+    """One listener's bounded queue, bound to the event loop that reads it."""
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        # Set when events were dropped; the stream tells the client to resync
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Thread-safe hand-off from a publisher to this subscription's loop."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has shut down under a connection that never closed cleanly
+            self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Next event, or ``None`` if nothing arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(EventBroker):
+    """
+    Fan-out to subscribers in this process. Suitable for a single ASGI
+    worker and for tests; multi-process deployments need a broker backed
+    by shared infrastructure.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, event):
+        with self._lock:
+            event = dict(event, id=next(self._ids))
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    def subscribe(self):
+        subscription = Subscription(self, self.max_queue)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+def enabled():
+    """Whether live updates are switched on (TICKET_EVENT_STREAM)."""
+    return getattr(settings, 'TICKET_EVENT_STREAM', False)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """The process-wide broker named by TICKET_EVENT_BROKER."""
+    path = getattr(settings, 'TICKET_EVENT_BROKER', 'tickets.events.InProcessBroker')
+    return import_string(path)()
+
+
+# ---------------- publishing ----------------
+
+def ticket_payload(ticket):
+    """The ticket fields a list row or detail header needs to redraw itself."""
+    return {
+        'id': ticket.pk,
+        'title': ticket.title,
+        'status': ticket.status,
+        'priority': ticket.priority,
+        'assigned_to': ticket.assigned_to_id,
+        'assigned_to_name': ticket.assigned_to.username if ticket.assigned_to_id else None,
+        'updated_at': ticket.updated_at,
+    }
+
+
+def publish(event_type, ticket_id, created_by_id, assigned_to_id, data):
+    """
+    Publish one event after the current transaction commits. The creator
+    and assignee travel with the event so streams can apply the same role
+    scoping as ``TicketQuerySet.visible_to`` without a query per event.
+    """
+    if not enabled():
+        return
+    event = {
+        'type': event_type,
+        'ticket': ticket_id,
+        'created_by': created_by_id,
+        'assigned_to': assigned_to_id,
+        'data': data,
+    }
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def publish_ticket(ticket):
+    if not enabled():
+        return
+    publish('ticket', ticket.pk, ticket.created_by_id, ticket.assigned_to_id, ticket_payload(ticket))
+
+
+def publish_comment(comment, ticket):
+    from .serializers import CommentSerializer
+
+    if not enabled():
+        return
+    publish(
+        'comment', ticket.pk, ticket.created_by_id, ticket.assigned_to_id,
+        dict(CommentSerializer(comment).data, ticket=ticket.pk),
+    )
+
+
+def can_receive(user, event):
+    """In-memory mirror of ``TicketQuerySet.visible_to`` for one event."""
+    if user.is_admin():
+        return True
+    if user.is_it_staff():
+        return event['assigned_to'] in (None, user.pk) or event['created_by'] == user.pk
+    return event['created_by'] == user.pk
+
+
+# ---------------- streaming ----------------
+
+def _format(event_type, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event_type}')
+    lines.append(f'data: {json.dumps(data, cls=DjangoJSONEncoder)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _stream(user, ticket_id):
+    heartbeat = getattr(settings, 'TICKET_EVENT_HEARTBEAT', 15)
+    # Bounded so permission changes and deploys are picked up on reconnect
+    deadline = time.monotonic() + getattr(settings, 'TICKET_EVENT_STREAM_SECONDS', 600)
+    subscription = get_broker().subscribe()
+    try:
+        yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+        while time.monotonic() < deadline:
+            event = await subscription.get(heartbeat)
+            if subscription.overflowed:
+                # This client fell behind and missed events; it must reload
+                yield _format('resync', {})
+                return
+            if event is None:
+                yield ': keepalive\n\n'
+            elif (ticket_id is None or event['ticket'] == ticket_id) and can_receive(user, event):
+                yield _format(event['type'], event['data'], event['id'])
+    finally:
+        subscription.close()
+
+
+def _authenticated_user(request):
+    return request.user if request.user.is_authenticated else None
+
+
+async def ticket_event_stream(request):
+    """
+    Server-Sent Events feed of ticket changes visible to the current user,
+    optionally narrowed to one ticket with ``?ticket=<id>``. Requires an
+    ASGI server; under WSGI each open stream would hold a worker, so it
+    404s unless TICKET_EVENT_STREAM is on.
+    """
+    if not enabled():
+        raise Http404('Live updates are disabled.')
+    user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        return HttpResponseForbidden('Forbidden')
+
+    ticket_id = request.GET.get('ticket')
+    ticket_id = int(ticket_id) if ticket_id and ticket_id.isdigit() else None
+
+    response = StreamingHttpResponse(_stream(user, ticket_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
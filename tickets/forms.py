@@ -1,6 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from .models import Ticket, Comment, User
+from .models import ApiToken, Ticket, Comment, User
 from django.contrib.auth import get_user_model
 
 class TicketForm(forms.ModelForm):
@@ -154,3 +154,36 @@ class AdminUserForm(forms.ModelForm):
             'is_active': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+
+
+class ApiTokenForm(forms.Form):
+    """
+    Issue an API token from Employee Management. The owner is entered by
+    username rather than picked from a list of every user. The issuer sees
+    the key, so HR may only issue tokens for roles at or below its own.
+    """
+    # Owners HR may issue for; an IT staff or admin key would let HR act with their powers
+    HR_OWNER_ROLES = ('employee', 'hr')
+    username = forms.CharField(max_length=150, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    name = forms.CharField(
+        max_length=100,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g. Monitoring'}),
+    )
+    scope = forms.ChoiceField(choices=ApiToken.SCOPE_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
+    expires_at = forms.DateTimeField(
+        required=False,
+        widget=forms.DateTimeInput(attrs={'class': 'form-control', 'type': 'datetime-local'}),
+        help_text='Leave empty for a token that does not expire.',
+    )
+
+    def __init__(self, *args, issuer=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.issuer = issuer
+
+    def clean_username(self):
+        owner = User.objects.filter(username=self.cleaned_data['username'], is_active=True).first()
+        if owner is None:
+            raise forms.ValidationError('No active user with this username.')
+        if self.issuer is not None and self.issuer.is_hr() and (owner.is_admin() or owner.role not in self.HR_OWNER_ROLES):
+            raise forms.ValidationError('HR staff can only issue tokens for employees and HR staff.')
+        return owner
@@ -0,0 +1,46 @@
+# ================= FRAGMENT CACHING =================
+#
+# The expensive parts of ticket pages (the detail header, the comment
+# thread, the dashboard stat cards and recent-tickets block) are wrapped in
+# {% cache %} blocks whose keys carry the versions of what they render:
+# the ticket's updated_at and comment activity, the dashboard stats
+# version, the viewer's role scope, and a users version that signals bump
+# when a username or role changes. Writes move the key instead of deleting
+# entries, so a fragment can never outlive the data it shows.
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .stats import stats_version
+
+USERS_VERSION_KEY = 'fragments:users_version'
+# User fields rendered inside cached fragments (names and role labels)
+RENDERED_USER_FIELDS = {'username', 'role'}
+
+
+def users_version():
+    version = cache.get(USERS_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(USERS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(USERS_VERSION_KEY)
+    return version
+
+
+def invalidate_user_fragments():
+    """Retire every fragment that renders a username or role label."""
+    try:
+        cache.incr(USERS_VERSION_KEY)
+    except ValueError:
+        cache.add(USERS_VERSION_KEY, time.time_ns(), None)
+
+
+def fragment_context():
+    """Template context shared by every cached fragment's key."""
+    return {
+        'fragment_timeout': getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600),
+        'users_version': users_version(),
+        'stats_version': stats_version(),
+    }
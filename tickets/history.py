@@ -0,0 +1,129 @@
+# ================= TICKET EVENT LOG =================
+#
+# Status, priority and assignment changes are appended to TicketEvent as
+# compact rows in the transaction that makes them, so a ticket's timeline
+# and time-range reports are index range scans rather than LIKE scans over
+# system comment text. Model saves are logged by a post_save receiver;
+# the bulk API and rebalancing write with QuerySet.update() and log
+# through ``record_changes``. ``backfill`` turns the system comments written
+# before the log existed into events.
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Comment, Ticket, TicketEvent, User
+
+# Ticket attribute -> event type
+LOGGED_FIELDS = (
+    ('status', TicketEvent.STATUS),
+    ('priority', TicketEvent.PRIORITY),
+    ('assigned_to_id', TicketEvent.ASSIGNMENT),
+)
+EVENT_PAGE_SIZE = 100
+
+_ASSIGN_COMMENT_PREFIX = 'Ticket assigned to '
+
+
+def _raw(value):
+    return '' if value is None else str(value)
+
+
+def event_rows(ticket_id, before, after, actor_id=None, when=None):
+    """
+    Unsaved TicketEvents for the logged fields whose value differs between
+    ``before`` and ``after`` (mappings keyed by ticket attribute; fields
+    missing from ``after`` are left out).
+    """
+    when = when or timezone.now()
+    return [
+        TicketEvent(
+            ticket_id=ticket_id, actor_id=actor_id, event_type=event_type,
+            old_value=_raw(before.get(field)), new_value=_raw(after[field]), created_at=when,
+        )
+        for field, event_type in LOGGED_FIELDS
+        if field in after and _raw(before.get(field)) != _raw(after[field])
+    ]
+
+
+def record_changes(changes, actor=None, when=None):
+    """
+    Log changes written with QuerySet.update(). ``changes`` yields
+    ``(ticket id, before, after)`` triples as taken by ``event_rows``.
+    """
+    when = when or timezone.now()
+    actor_id = actor.pk if actor else None
+    rows = [row for ticket_id, before, after in changes for row in event_rows(ticket_id, before, after, actor_id, when)]
+    TicketEvent.objects.bulk_create(rows, batch_size=1000)
+
+
+def record_ticket_saved(ticket, created):
+    """Log one save's changes; must run before the rollup re-snapshots tracked fields."""
+    after = {field: getattr(ticket, field) for field, _event_type in LOGGED_FIELDS}
+    if created:
+        # Starting status and priority are on the ticket row; only an initial assignee is an event
+        before = {'status': ticket.status, 'priority': ticket.priority}
+    else:
+        before = dict(after, **getattr(ticket, '_loaded_values', {}))
+    actor, ticket.changed_by = ticket.changed_by, None
+    record_changes([(ticket.pk, before, after)], actor)
+
+
+# ---------------- backfill ----------------
+
+def _parse(content, user_ids):
+    """``(field, new value)`` for a status or assignment system comment, or None."""
+    status = Ticket.parse_status_comment(content)
+    if status is not None:
+        return 'status', status
+    if content.startswith(_ASSIGN_COMMENT_PREFIX):
+        username = content[len(_ASSIGN_COMMENT_PREFIX):]
+        if username in user_ids:
+            return 'assigned_to_id', user_ids[username]
+    return None
+
+
+def backfill(chunk_size=2000):
+    """
+    Append events parsed from "Status changed from X to Y" and "Ticket
+    assigned to <username>" system comments, in one streaming pass.
+
+    Comments written once the log existed already have their events, so
+    each ticket only replays comments older than its first event, which
+    also makes a second run a no-op. A status comment's old value is taken
+    from the preceding one, so tickets start from Open; assignments start
+    from unassigned. Comments naming unknown users are skipped. Returns
+    the number of events created.
+    """
+    first_logged = dict(
+        TicketEvent.objects.values_list('ticket_id').annotate(first=Min('created_at')).order_by()
+    )
+    user_ids = dict(User.objects.values_list('username', 'pk'))
+    comments = (
+        Comment.objects.filter(is_system_message=True)
+        .filter(Q(content__startswith=Ticket.STATUS_COMMENT_PREFIX) | Q(content__startswith=_ASSIGN_COMMENT_PREFIX))
+        .order_by('ticket_id', 'created_at', 'id')
+        .values_list('ticket_id', 'author_id', 'content', 'created_at')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    created = 0
+    pending = []
+    state, state_ticket = {}, None
+    with transaction.atomic():
+        for ticket_id, author_id, content, created_at in comments:
+            if ticket_id != state_ticket:
+                state, state_ticket = {'status': 'open', 'assigned_to_id': None}, ticket_id
+            if ticket_id in first_logged and created_at >= first_logged[ticket_id]:
+                continue
+            parsed = _parse(content, user_ids)
+            if parsed is None:
+                continue
+            field, value = parsed
+            pending.extend(event_rows(ticket_id, state, {field: value}, author_id, created_at))
+            state[field] = value
+            if len(pending) >= chunk_size:
+                created += len(TicketEvent.objects.bulk_create(pending))
+                pending = []
+        created += len(TicketEvent.objects.bulk_create(pending))
+    return created
@@ -0,0 +1,395 @@
+# ================= BULK IMPORT =================
+#
+# Streams users, tickets and comments from JSONL or CSV files in the shapes
+# the API and the ticket export produce. Records are validated and written
+# in batches with bulk_create, user references are resolved by username or
+# email through a lookup cache that is filled one query per batch, and bad
+# records are reported without stopping the import. An ImportCheckpoint
+# commits with every batch, so a crashed import resumes where it stopped.
+
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import rollups, search, sla, workload
+from .models import Comment, Ticket, User
+from .stats import invalidate_dashboard_stats
+
+IMPORT_KINDS = ('users', 'tickets', 'comments')
+IMPORT_FORMATS = ('jsonl', 'csv')
+# Rows per timestamp-restoring UPDATE, keeping its CASE parameters well inside backend limits
+TIMESTAMP_CHUNK_SIZE = 200
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported; ``errors`` maps field names to messages."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def bulk_create_with_timestamps(model, objects, fields, batch_size=None):
+    """
+    bulk_create ``objects`` keeping their supplied values for the auto_now /
+    auto_now_add ``fields``, which the insert overwrites with the current
+    time. The values are written back with one CASE UPDATE per chunk, in
+    the caller's transaction, and restored on the instances; the shared
+    field definitions are never touched, so concurrent saves are unaffected.
+    """
+    supplied = [{name: getattr(obj, name) for name in fields} for obj in objects]
+    model.objects.bulk_create(objects, batch_size=batch_size)
+    rows = list(zip(objects, supplied))
+    for start in range(0, len(rows), TIMESTAMP_CHUNK_SIZE):
+        chunk = rows[start:start + TIMESTAMP_CHUNK_SIZE]
+        model.objects.filter(pk__in=[obj.pk for obj, _values in chunk]).update(**{
+            name: Case(
+                *[When(pk=obj.pk, then=Value(values[name])) for obj, values in chunk],
+                output_field=model._meta.get_field(name),
+            )
+            for name in fields
+        })
+    for obj, values in rows:
+        for name, value in values.items():
+            setattr(obj, name, value)
+
+
+def read_records(path, file_format=None):
+    """
+    Yield ``(line, record)`` pairs from a JSONL or CSV file without reading
+    it into memory. Unparseable JSON lines are yielded as RecordError.
+    """
+    file_format = file_format or ('csv' if str(path).lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as fh:
+        if file_format == 'csv':
+            reader = csv.DictReader(fh)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_number, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = RecordError({'record': f'Invalid JSON: {e}'})
+            else:
+                if not isinstance(record, dict):
+                    record = RecordError({'record': 'Expected a JSON object'})
+            yield line_number, record
+
+
+class UserLookup:
+    """
+    Username or email -> user id for the whole import. Unknown references
+    are fetched one query per batch and misses are cached too.
+    """
+
+    def __init__(self):
+        self._ids = {}
+
+    @staticmethod
+    def key(reference):
+        # Nested user objects (as in TicketSerializer) are matched on username, then email
+        if isinstance(reference, dict):
+            reference = reference.get('username') or reference.get('email')
+        if isinstance(reference, str) and reference.strip():
+            return reference.strip()
+        return None
+
+    def prefetch(self, references):
+        missing = {key for key in map(self.key, references) if key and key not in self._ids}
+        if not missing:
+            return
+        self._ids.update(dict.fromkeys(missing))
+        for pk, username, email in (
+            User.objects.filter(Q(username__in=missing) | Q(email__in=missing)).values_list('id', 'username', 'email')
+        ):
+            self.remember(pk, username, email)
+
+    def remember(self, pk, username, email):
+        self._ids[username] = pk
+        if email:
+            self._ids[email] = pk
+
+    def resolve(self, reference):
+        return self._ids.get(self.key(reference))
+
+
+# ---------------- field validation ----------------
+
+def _text(record, field, errors, required=False, max_length=None):
+    value = record.get(field)
+    value = '' if value is None else str(value)
+    if required and not value.strip():
+        errors[field] = 'This field is required.'
+    elif max_length and len(value) > max_length:
+        errors[field] = f'At most {max_length} characters.'
+    return value
+
+
+def _choice(record, field, choices, default, errors):
+    value = record.get(field) or default
+    if value not in dict(choices):
+        errors[field] = f'Must be one of: {", ".join(dict(choices))}.'
+    return value
+
+
+def _flag(record, field, default):
+    value = record.get(field)
+    if value in (None, ''):
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _datetime(record, field, errors, default=None):
+    value = record.get(field)
+    if value in (None, ''):
+        return default
+    parsed = parse_datetime(str(value))
+    if parsed is None:
+        errors[field] = 'Not an ISO 8601 datetime.'
+        return default
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _user(record, field, lookup, errors, required=False):
+    reference = record.get(field)
+    if reference in (None, ''):
+        if required:
+            errors[field] = 'This field is required.'
+        return None
+    if lookup.key(reference) is None:
+        errors[field] = 'Refer to users by username or email.'
+        return None
+    user_id = lookup.resolve(reference)
+    if user_id is None:
+        errors[field] = f'Unknown user {lookup.key(reference)!r}.'
+    return user_id
+
+
+# ---------------- importer ----------------
+
+class RecordImporter:
+    """Validate and insert one kind of record a batch at a time."""
+
+    def __init__(self, kind, batch_size=1000):
+        if kind not in IMPORT_KINDS:
+            raise ValueError(f'Unknown import kind: {kind}')
+        self.kind = kind
+        self.batch_size = batch_size
+        self.lookup = UserLookup()
+        self._known_tickets = set()
+        self._batch_keys = set()
+
+    def run(self, records, checkpoint, report):
+        """
+        Import ``(line, record)`` pairs after ``checkpoint.position``.
+        ``report(line, errors)`` is called for every rejected record once
+        its batch has committed.
+        """
+        records = islice(records, checkpoint.position, None)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch, checkpoint, report)
+        checkpoint.completed_at = timezone.now()
+        checkpoint.save(update_fields=['completed_at', 'updated_at'])
+
+    def _import_batch(self, batch, checkpoint, report):
+        self._prefetch([record for _line, record in batch if not isinstance(record, RecordError)])
+        self._batch_keys = set()
+
+        valid, failures = [], []
+        for line, record in batch:
+            try:
+                if isinstance(record, RecordError):
+                    raise record
+                valid.append((line, getattr(self, f'_build_{self.kind}')(record)))
+            except RecordError as e:
+                failures.append((line, e.errors))
+
+        with transaction.atomic():
+            imported, insert_failures = self._insert(valid)
+            failures.extend(insert_failures)
+            checkpoint.position += len(batch)
+            checkpoint.imported += imported
+            checkpoint.failed += len(failures)
+            checkpoint.save(update_fields=['position', 'imported', 'failed', 'updated_at'])
+
+        for line, errors in sorted(failures, key=lambda failure: failure[0]):
+            report(line, errors)
+
+    def _prefetch(self, records):
+        """One query for the batch's unseen user references (and, for comments, tickets)."""
+        references = []
+        for record in records:
+            if self.kind == 'users':
+                references += [record.get('username'), record.get('email')]
+            elif self.kind == 'tickets':
+                references += [record.get('created_by'), record.get('assigned_to')]
+                thread = record.get('comments')
+                if isinstance(thread, list):
+                    references += [item.get('author') for item in thread if isinstance(item, dict)]
+            else:
+                references.append(record.get('author'))
+        self.lookup.prefetch(references)
+
+        if self.kind == 'comments':
+            ids = {int(r['ticket']) for r in records if str(r.get('ticket') or '').isdigit()}
+            self._known_tickets = set(Ticket.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    def _insert(self, valid):
+        """Bulk insert; if the batch violates a constraint, retry row by row to isolate the culprits."""
+        if not valid:
+            return 0, []
+        try:
+            with transaction.atomic():
+                getattr(self, f'_save_{self.kind}')([obj for _line, obj in valid])
+            return len(valid), []
+        except IntegrityError:
+            pass
+
+        imported, failures = 0, []
+        for line, obj in valid:
+            try:
+                with transaction.atomic():
+                    getattr(self, f'_save_{self.kind}')([obj])
+                imported += 1
+            except IntegrityError as e:
+                failures.append((line, {'record': str(e)}))
+        return imported, failures
+
+    # ---- users ----
+
+    def _build_users(self, record):
+        errors = {}
+        username = _text(record, 'username', errors, required=True, max_length=150).strip()
+        email = _text(record, 'email', errors, required=True, max_length=254).strip()
+        for field, value in (('username', username), ('email', email)):
+            if value and (self.lookup.resolve(value) is not None or value in self._batch_keys):
+                errors[field] = 'Already taken.'
+        user = User(
+            username=username,
+            email=email,
+            role=_choice(record, 'role', User.ROLE_CHOICES, 'employee', errors),
+            first_name=_text(record, 'first_name', errors, max_length=150),
+            last_name=_text(record, 'last_name', errors, max_length=150),
+            full_name=_text(record, 'full_name', errors, max_length=150),
+            phone=_text(record, 'phone', errors, max_length=20),
+            department=_text(record, 'department', errors, max_length=100),
+            is_active=_flag(record, 'is_active', True),
+        )
+        if errors:
+            raise RecordError(errors)
+        self._batch_keys.update((username, email))
+        # Without a password the account is unusable until it is reset
+        user.password = make_password(record.get('password') or None)
+        return user
+
+    def _save_users(self, users):
+        User.objects.bulk_create(users)
+        for user in users:
+            self.lookup.remember(user.pk, user.username, user.email)
+
+    # ---- tickets ----
+
+    def _build_comment(self, record, errors, prefix=''):
+        comment_errors = {}
+        is_system_message = _flag(record, 'is_system_message', False)
+        comment = Comment(
+            # System messages may have no author (see tickets/sla.py)
+            author_id=_user(record, 'author', self.lookup, comment_errors, required=not is_system_message),
+            content=_text(record, 'content', comment_errors, required=True),
+            is_system_message=is_system_message,
+            created_at=_datetime(record, 'created_at', comment_errors, default=timezone.now()),
+        )
+        errors.update({f'{prefix}{field}': message for field, message in comment_errors.items()})
+        return comment
+
+    def _build_tickets(self, record):
+        errors = {}
+        status = _choice(record, 'status', Ticket.STATUS_CHOICES, 'open', errors)
+        created_at = _datetime(record, 'created_at', errors, default=timezone.now())
+        updated_at = _datetime(record, 'updated_at', errors, default=created_at)
+        ticket = Ticket(
+            title=_text(record, 'title', errors, required=True, max_length=200),
+            description=_text(record, 'description', errors, required=True),
+            status=status,
+            priority=_choice(record, 'priority', Ticket.PRIORITY_CHOICES, 'medium', errors),
+            created_by_id=_user(record, 'created_by', self.lookup, errors, required=True),
+            assigned_to_id=_user(record, 'assigned_to', self.lookup, errors),
+            created_at=created_at,
+            updated_at=updated_at,
+            resolved_at=_datetime(
+                record, 'resolved_at', errors, default=updated_at if status in ('resolved', 'closed') else None,
+            ),
+            closed_at=_datetime(record, 'closed_at', errors, default=updated_at if status == 'closed' else None),
+        )
+
+        # Nested threads, as written by the NDJSON export with comments
+        thread = record.get('comments') or []
+        if not isinstance(thread, list):
+            thread = []
+        comments = []
+        for index, item in enumerate(thread):
+            if not isinstance(item, dict):
+                errors[f'comments[{index}]'] = 'Expected an object.'
+                continue
+            comments.append(self._build_comment(item, errors, prefix=f'comments[{index}].'))
+        if errors:
+            raise RecordError(errors)
+        return ticket, comments
+
+    def _save_tickets(self, rows):
+        tickets = [ticket for ticket, _comments in rows]
+        for ticket in tickets:
+            sla.schedule(ticket)
+        bulk_create_with_timestamps(Ticket, tickets, ('created_at', 'updated_at'))
+        comments = []
+        for ticket, thread in rows:
+            for comment in thread:
+                comment.ticket = ticket
+                comments.append(comment)
+        bulk_create_with_timestamps(Comment, comments, ('created_at',))
+
+        # bulk_create bypasses signals, so derived data is maintained here
+        ids = [ticket.pk for ticket in tickets]
+        if comments:
+            Ticket.objects.filter(id__in={c.ticket_id for c in comments}).refresh_comment_stats()
+        rollups.record_imported_tickets(tickets)
+        workload.record_changes((None, workload.ticket_state(ticket)) for ticket in tickets)
+        search.rebuild_index(Ticket.objects.filter(id__in=ids).order_by('pk'))
+        transaction.on_commit(invalidate_dashboard_stats)
+
+    # ---- comments ----
+
+    def _build_comments(self, record):
+        errors = {}
+        ticket_id = record.get('ticket')
+        if not str(ticket_id or '').isdigit():
+            errors['ticket'] = 'Ticket id is required.'
+        elif int(ticket_id) not in self._known_tickets:
+            errors['ticket'] = f'Unknown ticket {ticket_id}.'
+        comment = self._build_comment(record, errors)
+        if errors:
+            raise RecordError(errors)
+        comment.ticket_id = int(ticket_id)
+        return comment
+
+    def _save_comments(self, comments):
+        bulk_create_with_timestamps(Comment, comments, ('created_at',))
+        ids = {comment.ticket_id for comment in comments}
+        Ticket.objects.filter(id__in=ids).refresh_comment_stats()
+        search.rebuild_index(Ticket.objects.filter(id__in=ids).order_by('pk'))
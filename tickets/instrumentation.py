@@ -0,0 +1,221 @@
+# ================= REQUEST INSTRUMENTATION =================
+#
+# Per-view latency histograms, query counts and query time, keyed by the
+# resolved URL name and response status, exposed at /metrics in the
+# Prometheus text format. Each process aggregates in memory; when
+# METRICS_DIR is set, processes periodically flush snapshots there and
+# /metrics merges every file, so gunicorn workers report one total.
+# Streaming responses (exports, the event stream) are observed when their
+# body has been sent or the client goes away, not when the view returns.
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Series value layout: [requests, latency_sum, db_queries, db_seconds, *bucket_counts]
+_FIXED = 4
+
+
+class MetricsRegistry:
+    """Thread-safe in-process aggregate of request metrics."""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.filename = f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        self._series = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def observe(self, view, status, seconds, queries, query_seconds):
+        key = (view, str(status))
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            values = self._series.get(key)
+            if values is None:
+                values = self._series[key] = [0, 0.0, 0, 0.0] + [0] * (len(LATENCY_BUCKETS) + 1)
+            values[0] += 1
+            values[1] += seconds
+            values[2] += queries
+            values[3] += query_seconds
+            values[_FIXED + bucket] += 1
+        if self.directory and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(values) for key, values in self._series.items()}
+
+    def flush(self):
+        """Atomically write this process's cumulative snapshot to the shared directory."""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        payload = [[view, status, values] for (view, status), values in self.snapshot().items()]
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(payload, fh)
+        os.replace(tmp_path, os.path.join(self.directory, self.filename))
+
+    def collect(self):
+        """Series merged across every process that has flushed to the shared directory."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        merged = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as fh:
+                    payload = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for view, status, values in payload:
+                current = merged.get((view, status))
+                merged[(view, status)] = values if current is None else [a + b for a, b in zip(current, values)]
+        return merged
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(series):
+    lines = []
+
+    def header(name, kind, help_text):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    ordered = sorted(series.items())
+
+    header('http_requests_total', 'counter', 'Requests by resolved URL name and response status.')
+    for (view, status), values in ordered:
+        lines.append(f'http_requests_total{{view="{_label(view)}",status="{status}"}} {values[0]}')
+
+    header('http_request_duration_seconds', 'histogram', 'Request latency by resolved URL name and response status.')
+    for (view, status), values in ordered:
+        labels = f'view="{_label(view)}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), values[_FIXED:]):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[1]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{labels}}} {values[0]}')
+
+    header('db_queries_total', 'counter', 'Database queries issued by requests to each view.')
+    for (view, status), values in ordered:
+        lines.append(f'db_queries_total{{view="{_label(view)}",status="{status}"}} {values[2]}')
+
+    header('db_query_duration_seconds_total', 'counter', 'Time spent in database queries by each view.')
+    for (view, status), values in ordered:
+        lines.append(f'db_query_duration_seconds_total{{view="{_label(view)}",status="{status}"}} {values[3]:.6f}')
+
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(
+    directory=getattr(settings, 'METRICS_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0),
+)
+atexit.register(registry.flush)
+
+
+class _QueryTimer:
+    """connection.execute_wrapper hook that counts and times every query."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def _observed_stream(response, timer, observe):
+    """
+    Wrap ``response.streaming_content`` so ``observe()`` runs once the body
+    is exhausted or closed. Queries a synchronous body issues while it is
+    sent are counted too; an async body's queries run in other threads'
+    connections, so only its duration is recorded.
+    """
+    content = response.streaming_content
+    if response.is_async:
+        async def stream():
+            try:
+                async for chunk in content:
+                    yield chunk
+            finally:
+                observe()
+    else:
+        def stream():
+            try:
+                with connection.execute_wrapper(timer):
+                    yield from content
+            finally:
+                observe()
+    return stream()
+
+
+class RequestMetricsMiddleware:
+    """Record latency, query count and query time for every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else '<unresolved>'
+
+        def observe():
+            registry.observe(view, response.status_code, time.perf_counter() - started, timer.count, timer.seconds)
+
+        if response.streaming:
+            response.streaming_content = _observed_stream(response, timer, observe)
+        else:
+            observe()
+        return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. With METRICS_TOKEN set, requires
+    ``Authorization: Bearer <token>``; otherwise only administrators.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return HttpResponseForbidden('Forbidden')
+    elif not (request.user.is_authenticated and request.user.is_admin()):
+        return HttpResponseForbidden('Forbidden')
+
+    return HttpResponse(
+        render_prometheus(registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
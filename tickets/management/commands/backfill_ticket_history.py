@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tickets import history
+
+
+class Command(BaseCommand):
+    help = "Parse status-change and assignment system comments written before the ticket event log into events."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = history.backfill(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {count} ticket events from system comments.'))
@@ -0,0 +1,139 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tickets.models import Comment, Ticket, User
+
+
+def _percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the main views and API endpoints: p50/p95 latency, query count and peak memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request.')
+        parser.add_argument('--output', help='Write results as JSON to this path.')
+        parser.add_argument('--compare', help='Print p50/p95 deltas against an earlier JSON result.')
+
+    def _endpoints(self):
+        # The longest thread is the worst case for ticket_detail
+        ticket = Ticket.objects.annotate(thread=Count('comments')).order_by('-thread', 'id').first()
+        if ticket is None:
+            raise CommandError('No tickets found; run generate_synthetic_data first.')
+        deep_page = max(Ticket.objects.count() // 10 // 2, 1)
+        return [
+            ('dashboard', 'admin', reverse('dashboard')),
+            ('dashboard', 'it_staff', reverse('dashboard')),
+            ('dashboard', 'employee', reverse('dashboard')),
+            ('ticket_list', 'admin', reverse('ticket_list')),
+            ('ticket_list deep page', 'admin', f"{reverse('ticket_list')}?page={deep_page}"),
+            ('ticket_list cursor', 'admin', f"{reverse('ticket_list')}?cursor="),
+            ('ticket_list search', 'admin', f"{reverse('ticket_list')}?search=printer"),
+            ('ticket_list', 'it_staff', reverse('ticket_list')),
+            ('ticket_detail', 'admin', reverse('ticket_detail', args=[ticket.pk])),
+            ('manage_employees', 'admin', reverse('manage_employees')),
+            ('api ticket-list', 'admin', '/api/tickets/'),
+            ('api ticket-list cursor', 'admin', '/api/tickets/?cursor='),
+            ('api ticket-list expand', 'admin', '/api/tickets/?expand=comments'),
+            ('api ticket-detail', 'admin', f'/api/tickets/{ticket.pk}/'),
+        ]
+
+    def _clients(self):
+        clients = {}
+        for role in ('admin', 'it_staff', 'employee'):
+            user = User.objects.filter(role=role, is_active=True).order_by('id').first()
+            if user is None:
+                raise CommandError(f'No active {role} user found; run generate_synthetic_data first.')
+            client = Client()
+            client.force_login(user)
+            clients[role] = client
+        return clients
+
+    def _measure(self, client, url, repeat, warmup, cold):
+        for _ in range(warmup):
+            client.get(url)
+
+        latencies, queries, peaks, statuses = [], [], [], set()
+        for _ in range(repeat):
+            if cold:
+                cache.clear()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            queries.append(len(ctx.captured_queries))
+            statuses.add(response.status_code)
+
+        return {
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'queries': max(queries),
+            'peak_memory_kb': round(max(peaks) / 1024, 1),
+            'status_codes': sorted(statuses),
+        }
+
+    def handle(self, *args, **options):
+        clients = self._clients()
+        results = {}
+        for name, role, url in self._endpoints():
+            key = f'{name} [{role}]'
+            results[key] = dict(url=url, **self._measure(
+                clients[role], url, options['repeat'], options['warmup'], options['cold'],
+            ))
+            r = results[key]
+            self.stdout.write(
+                f"{key:<40} p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+                f"{r['queries']:>3} queries  {r['peak_memory_kb']:>9.1f} KiB"
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'dataset': {
+                'users': User.objects.count(),
+                'tickets': Ticket.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'options': {k: options[k] for k in ('repeat', 'warmup', 'cold')},
+            'results': results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as fh:
+                baseline = json.load(fh)['results']
+            self.stdout.write(self.style.MIGRATE_HEADING('Change against baseline'))
+            for key, r in results.items():
+                if key not in baseline:
+                    continue
+                b = baseline[key]
+                self.stdout.write(
+                    f"{key:<40} p50 {r['p50_ms'] - b['p50_ms']:>+8.2f} ms  "
+                    f"p95 {r['p95_ms'] - b['p95_ms']:>+8.2f} ms  "
+                    f"queries {r['queries'] - b['queries']:>+3}"
+                )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tickets import verification
+from tickets.utils import send_welcome_email
+
+
+class Command(BaseCommand):
+    help = (
+        "Replace stored EmailVerification rows with signed verification links: pending users "
+        "are sent a new link and expired or spent rows are deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', required=True,
+                            help='Scheme and host the links point at, e.g. https://helpdesk.example.com')
+        parser.add_argument('--dry-run', action='store_true', help='Count the rows without sending or deleting.')
+
+    def handle(self, *args, **options):
+        sent, removed = verification.convert_pending_rows(
+            options['base_url'], send_welcome_email, dry_run=options['dry_run'],
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Would send {sent} signed links and delete {removed} stale rows.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} signed links and deleted {removed} stale rows.'))
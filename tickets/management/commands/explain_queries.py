@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tickets.models import Comment, Ticket, User
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the main ticket view queries to confirm they use indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL/MySQL only; executes the queries).',
+        )
+        parser.add_argument('--format', default=None, help='Backend EXPLAIN format, e.g. text or json.')
+
+    def _sample_user(self, role):
+        # An unsaved stand-in still produces the same SQL shape on an empty database
+        return User.objects.filter(role=role).first() or User(pk=0, role=role)
+
+    def _captured(self, run):
+        """``(sql, params)`` of the last statement ``run()`` executes, exactly as sent."""
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            statements.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            run()
+        return statements[-1]
+
+    def _explain(self, sql, params, options):
+        prefix = connection.ops.explain_query_prefix(options['format'], **options['explain'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+        return '\n'.join(' '.join(str(column) for column in row) for row in rows)
+
+    def handle(self, *args, **options):
+        options['explain'] = {'analyze': True} if options['analyze'] else {}
+        staff = self._sample_user('it_staff')
+        employee = self._sample_user('employee')
+        ticket_id = Ticket.objects.values_list('id', flat=True).first() or 0
+
+        querysets = [
+            ('ticket_list (employee scope)', Ticket.objects.visible_to(employee).for_list()[:10]),
+            ('ticket_list (staff scope)', Ticket.objects.visible_to(staff).for_list()[:10]),
+            ('ticket_list ?status=open', Ticket.objects.filter(status='open').for_list()[:10]),
+            ('ticket_list ?priority=urgent', Ticket.objects.filter(priority='urgent').for_list()[:10]),
+            ('unassigned IT queue', Ticket.objects.filter(assigned_to__isnull=True)[:10]),
+            ('ticket_detail comment thread', Comment.objects.filter(ticket_id=ticket_id).select_related('author')),
+        ]
+        # aggregate() runs at once, so the dashboard's conditional aggregate is captured as executed
+        queries = [
+            ('dashboard stats (staff scope)', *self._captured(lambda: Ticket.objects.visible_to(staff).stats())),
+            *((label, *queryset.query.sql_with_params()) for label, queryset in querysets),
+        ]
+
+        for label, sql, params in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+            self.stdout.write(sql)
+            if params:
+                self.stdout.write(f'params: {tuple(params)!r}')
+            self.stdout.write(self._explain(sql, params, options))
+            self.stdout.write('')
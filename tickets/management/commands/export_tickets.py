@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.export import EXPORT_FORMATS, export_tickets, filter_tickets
+from tickets.models import Ticket, User
+
+
+class Command(BaseCommand):
+    help = "Stream tickets (optionally with comments) as CSV or NDJSON in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--comments', action='store_true', help='Include each ticket\'s comments.')
+        parser.add_argument('--status', help='Only tickets with this status.')
+        parser.add_argument('--priority', help='Only tickets with this priority.')
+        parser.add_argument('--search', help='Only tickets matching this full-text query.')
+        parser.add_argument('--user', help='Export only what this username can see (default: everything).')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout).')
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.all()
+        if options['user']:
+            try:
+                tickets = Ticket.objects.visible_to(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}")
+        tickets = filter_tickets(
+            tickets, status=options['status'], priority=options['priority'], search=options['search'],
+        )
+
+        blocks = export_tickets(tickets, options['format'], options['comments'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                fh.writelines(blocks)
+            self.stderr.write(self.style.SUCCESS(f"Exported tickets to {options['output']}."))
+        else:
+            for block in blocks:
+                self.stdout.write(block, ending='')
@@ -0,0 +1,151 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tickets import sla, workload
+from tickets.importer import bulk_create_with_timestamps
+from tickets.models import Comment, Ticket, User
+from tickets.stats import invalidate_dashboard_stats
+
+# Distributions observed in data.json
+ROLE_WEIGHTS = {'employee': 34, 'it_staff': 3, 'hr': 2, 'admin': 1}
+STATUS_WEIGHTS = {'resolved': 9, 'in_progress': 6, 'open': 3, 'closed': 1}
+PRIORITY_WEIGHTS = {'medium': 10, 'urgent': 4, 'high': 3, 'low': 2}
+COMMENTS_PER_TICKET = 13 / 19
+DEPARTMENTS = [
+    '', 'UI / UX Designer', 'Web Developer', 'Python Developer', 'Platform Admin', 'HR Manager',
+    'Help Desk Technician', 'Site Reliability Engineer', 'Machine Learning Engineer',
+    'Frontend Developer', 'DevOps Engineer', 'Cyber Security Analyst', 'Full Stack Developer',
+    'HR Executive', 'Java Developer',
+]
+DEPARTMENT_WEIGHTS = [20, 4, 3, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
+
+SUBJECTS = ['Laptop', 'Printer', 'VPN', 'Email', 'Monitor', 'Wi-Fi', 'Keyboard', 'Database', 'Outlook', 'Docker']
+PROBLEMS = ['not working', 'running slow', 'overheating', 'keeps disconnecting', 'access denied', 'needs replacement']
+DETAILS = [
+    'It started this morning after the latest update.',
+    'I have already tried restarting it twice.',
+    'Several people on my floor have the same problem.',
+    'The error message says the connection timed out.',
+    'This is blocking a client deliverable due today.',
+]
+REPLIES = [
+    'Can you share a screenshot of the error?',
+    'I have escalated this to the infrastructure team.',
+    'Please try again now, the service was restarted.',
+    'Still happening on my side.',
+    'Thanks, that fixed it.',
+]
+
+
+def _pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic users, tickets and comments with the fixture's role/status/priority mix."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=None, help='Defaults to one user per 5 tickets.')
+        parser.add_argument('--days', type=int, default=365, help='Spread ticket creation over this many days.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='benchmark-pass')
+        parser.add_argument('--skip-indexes', action='store_true',
+                            help='Do not rebuild the search index and metrics rollup afterwards '
+                                 '(workload counters are always rebuilt).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        ticket_total = options['tickets']
+        user_total = options['users'] or max(ticket_total // 5, 10)
+        batch_size = options['batch_size']
+        now = timezone.now()
+        prefix = f"synth{options['seed']}_{User.objects.count()}_"
+
+        # Hash once; every synthetic account shares the password
+        password = make_password(options['password'])
+        users = []
+        for i in range(user_total):
+            role = _pick(rng, ROLE_WEIGHTS) if i >= 4 else list(ROLE_WEIGHTS)[i]
+            users.append(User(
+                username=f'{prefix}{i}',
+                email=f'{prefix}{i}@example.com',
+                full_name=f'Synthetic User {i}',
+                role=role,
+                department=rng.choices(DEPARTMENTS, weights=DEPARTMENT_WEIGHTS)[0],
+                password=password,
+                is_active=True,
+            ))
+        User.objects.bulk_create(users, batch_size=batch_size)
+        users = list(User.objects.filter(username__startswith=prefix).only('id', 'role'))
+        staff = [u for u in users if u.role in ('it_staff', 'admin')]
+        self.stdout.write(f'Created {len(users)} users.')
+
+        created = 0
+        while created < ticket_total:
+            size = min(batch_size, ticket_total - created)
+            with transaction.atomic():
+                tickets = [self._ticket(rng, users, staff, now, options['days']) for _ in range(size)]
+                for ticket in tickets:
+                    # Due times run from the backdated created_at, as the pre_save receiver would set them
+                    sla.schedule(ticket)
+                bulk_create_with_timestamps(Ticket, tickets, ('created_at', 'updated_at'), batch_size=batch_size)
+                comments = []
+                for ticket in tickets:
+                    for _ in range(self._comment_count(rng)):
+                        when = ticket.created_at + (ticket.updated_at - ticket.created_at) * rng.random()
+                        comments.append(Comment(
+                            ticket=ticket,
+                            author=rng.choice(staff) if rng.random() < 0.5 else ticket.created_by,
+                            content=rng.choice(REPLIES),
+                            created_at=when,
+                        ))
+                bulk_create_with_timestamps(Comment, comments, ('created_at',), batch_size=batch_size)
+                Ticket.objects.filter(id__in=[t.pk for t in tickets]).refresh_comment_stats()
+            created += size
+            self.stdout.write(f'Created {created}/{ticket_total} tickets.')
+
+        # bulk_create bypasses signals (comment stats are refreshed per batch above),
+        # so rebuild the other derived data explicitly. Auto-assignment and
+        # rebalancing read the workload counters, so those are always rebuilt.
+        invalidate_dashboard_stats()
+        assignees = workload.rebuild()
+        self.stdout.write(f'Rebuilt workload counters for {assignees} assignees.')
+        if not options['skip_indexes']:
+            call_command('rebuild_search_index', stdout=self.stdout)
+            call_command('rebuild_ticket_metrics', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Synthetic data ready.'))
+
+    def _comment_count(self, rng):
+        # Geometric count with the fixture's mean
+        count = 0
+        while rng.random() < COMMENTS_PER_TICKET / (1 + COMMENTS_PER_TICKET):
+            count += 1
+        return count
+
+    def _ticket(self, rng, users, staff, now, days):
+        status = _pick(rng, STATUS_WEIGHTS)
+        created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        updated_at = min(created_at + timedelta(hours=rng.expovariate(1 / 36)), now)
+        ticket = Ticket(
+            title=f'{rng.choice(SUBJECTS)} {rng.choice(PROBLEMS)}',
+            description=' '.join(rng.sample(DETAILS, 2)),
+            status=status,
+            priority=_pick(rng, PRIORITY_WEIGHTS),
+            created_by=rng.choice(users),
+            assigned_to=rng.choice(staff) if status != 'open' or rng.random() < 0.3 else None,
+            created_at=created_at,
+            updated_at=updated_at,
+        )
+        if status in ('resolved', 'closed'):
+            ticket.resolved_at = updated_at
+        if status == 'closed':
+            ticket.closed_at = updated_at
+        return ticket
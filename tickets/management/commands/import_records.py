@@ -0,0 +1,59 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.importer import IMPORT_FORMATS, IMPORT_KINDS, RecordImporter, read_records
+from tickets.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream users, tickets or comments from a JSONL or CSV file into the database in batches. "
+        "Bad records are reported and skipped; an interrupted import resumes when run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=IMPORT_KINDS)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults from the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--restart', action='store_true', help='Ignore any saved progress for this file.')
+        parser.add_argument('--errors', help='Write rejected records to this JSONL file instead of stderr.')
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(source=path, kind=options['kind'])
+        if options['restart'] and not created:
+            checkpoint.position = checkpoint.imported = checkpoint.failed = 0
+            checkpoint.completed_at = None
+            checkpoint.save()
+        elif checkpoint.completed_at:
+            raise CommandError(
+                f'{path} was already imported ({checkpoint.imported} records); pass --restart to import it again.'
+            )
+        elif checkpoint.position:
+            self.stdout.write(f'Resuming after record {checkpoint.position}.')
+
+        error_file = open(options['errors'], 'a', encoding='utf-8') if options['errors'] else None
+
+        def report(line, errors):
+            if error_file:
+                error_file.write(json.dumps({'line': line, 'errors': errors}) + '\n')
+            else:
+                details = '; '.join(f'{field}: {message}' for field, message in errors.items())
+                self.stderr.write(f'line {line}: {details}')
+
+        try:
+            importer = RecordImporter(options['kind'], batch_size=options['batch_size'])
+            importer.run(read_records(path, options['format']), checkpoint, report)
+        finally:
+            if error_file:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {checkpoint.imported} {options['kind']}; {checkpoint.failed} records rejected."
+        ))
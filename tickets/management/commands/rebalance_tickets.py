@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from tickets import workload
+from tickets.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Even out the open workload of IT staff: assign the unassigned queue and move "
+        "not-yet-started tickets from the busiest staff to the least loaded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--unassigned-only', action='store_true',
+                            help='Only assign unassigned tickets; leave existing assignments alone.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the planned moves without applying them.')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Only recount the staff workload table from the tickets table.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = workload.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Recounted the open workload of {count} assignees.'))
+            return
+
+        moves = workload.rebalance(include_assigned=not options['unassigned_only'], dry_run=options['dry_run'])
+        user_ids = {user_id for pair in moves.values() for user_id in pair if user_id}
+        names = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'username'))
+        for ticket_id, (old_assignee, new_assignee) in sorted(moves.items()):
+            self.stdout.write(f'Ticket {ticket_id}: {names.get(old_assignee, "unassigned")} -> {names[new_assignee]}')
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(moves)} tickets.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Recompute every ticket's comment_count and last_comment_at, e.g. after loaddata."
+
+    def handle(self, *args, **options):
+        count = Ticket.objects.refresh_comment_stats()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed the comment summary of {count} tickets.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+from tickets.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ticket search index (native document or inverted terms) from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        count = rebuild_index(Ticket.objects.order_by('pk'), chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {count} tickets.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tickets import rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily ticket metrics rollup from ticket and status-change history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Replayed {count} tickets into the daily metrics rollup.'))
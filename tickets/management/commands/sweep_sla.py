@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets import sla
+
+
+class Command(BaseCommand):
+    help = "Post SLA warning and breach comments on tickets whose response or resolution deadline is near or past."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping instead of exiting after one pass.')
+        parser.add_argument('--sleep', type=float, default=60.0, help='Seconds to wait between sweeps with --loop.')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = sla.sweep(batch_size=options['batch_size'])
+            for (deadline, level), count in counts.items():
+                if count:
+                    state = 'breached' if level == sla.BREACHED else 'warned'
+                    self.stdout.write(f'{sla.LABELS[deadline]}: {count} {state}.')
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS('SLA sweep complete.'))
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+from collections import Counter
+
+SEARCH_GIN_INDEX = 'ticket_search_document_gin'
+
+# Tokenizer and weights of tickets.search at the time of this migration;
+# rebuild_search_index reindexes with the current ones
+SEARCH_CONFIG = 'english'
+TITLE_WEIGHT, DESCRIPTION_WEIGHT, COMMENT_WEIGHT = 5, 2, 1
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have i in is it its my not of on
+    or our that the this to was we were with you your
+""".split())
+
+
+def tokenize(text):
+    return [
+        token[:64]
+        for token in TOKEN_RE.findall((text or '').lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def create_native_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    TicketSearchDocument = apps.get_model('tickets', 'TicketSearchDocument')
+    index = GinIndex(SearchVector('title', 'body', config=SEARCH_CONFIG), name=SEARCH_GIN_INDEX)
+    schema_editor.add_index(TicketSearchDocument, index)
+
+
+def drop_native_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {SEARCH_GIN_INDEX}')
+
+
+def backfill_search_index(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Comment = apps.get_model('tickets', 'Comment')
+    TicketSearchDocument = apps.get_model('tickets', 'TicketSearchDocument')
+    TicketSearchTerm = apps.get_model('tickets', 'TicketSearchTerm')
+    native = schema_editor.connection.vendor == 'postgresql'
+
+    def term_rows(ticket_id, comment_id, weighted_texts):
+        weights = Counter()
+        for text, weight in weighted_texts:
+            for term in tokenize(text):
+                weights[term] += weight
+        return [
+            TicketSearchTerm(ticket_id=ticket_id, comment_id=comment_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        ]
+
+    for ticket in Ticket.objects.iterator(chunk_size=500):
+        comments = Comment.objects.filter(ticket_id=ticket.pk, is_system_message=False).order_by('created_at')
+        if native:
+            body = '\n'.join([ticket.description, *comments.values_list('content', flat=True)])
+            TicketSearchDocument.objects.create(ticket_id=ticket.pk, title=ticket.title, body=body)
+            continue
+        rows = term_rows(ticket.pk, None, [(ticket.title, TITLE_WEIGHT), (ticket.description, DESCRIPTION_WEIGHT)])
+        for comment in comments:
+            rows.extend(term_rows(ticket.pk, comment.pk, [(comment.content, COMMENT_WEIGHT)]))
+        TicketSearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_ticket_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSearchDocument',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='tickets.ticket')),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TicketSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='tickets.comment')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='tickets.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'ticket'], name='search_term_ticket_idx')],
+            },
+        ),
+        migrations.RunPython(create_native_index, drop_native_index),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_outbound_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('opened', models.PositiveIntegerField(default=0)),
+                ('resolved', models.PositiveIntegerField(default=0)),
+                ('resolution_seconds', models.BigIntegerField(default=0)),
+                ('entered', models.PositiveIntegerField(default=0)),
+                ('exited', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'priority', 'status'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ticketdailymetric',
+            constraint=models.UniqueConstraint(fields=('day', 'priority', 'status'), name='unique_daily_metric_bucket'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:09
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_summary(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Comment = apps.get_model('tickets', 'Comment')
+    thread = Comment.objects.filter(ticket=OuterRef('pk')).order_by().values('ticket')
+    Ticket.objects.update(
+        comment_count=Coalesce(Subquery(thread.annotate(total=Count('id')).values('total')), 0),
+        last_comment_at=Subquery(thread.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_ticket_daily_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_comment_summary, migrations.RunPython.noop),
+    ]
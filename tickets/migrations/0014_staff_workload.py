@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+# Priority weights at the time of this migration; rebalance_tickets --rebuild recounts with current settings
+PRIORITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 5}
+
+
+def backfill_workload(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    StaffWorkload = apps.get_model('tickets', 'StaffWorkload')
+    totals = {}
+    rows = (
+        Ticket.objects.filter(status__in=('open', 'in_progress'), assigned_to__isnull=False)
+        .values_list('assigned_to_id', 'priority')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for user_id, priority, total in rows:
+        open_tickets, weight = totals.get(user_id, (0, 0))
+        totals[user_id] = (open_tickets + total, weight + total * PRIORITY_WEIGHTS.get(priority, 1))
+    StaffWorkload.objects.bulk_create([
+        StaffWorkload(user_id=user_id, open_tickets=open_tickets, weight=weight)
+        for user_id, (open_tickets, weight) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffWorkload',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_tickets', models.IntegerField(default=0)),
+                ('weight', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_workload, migrations.RunPython.noop),
+    ]
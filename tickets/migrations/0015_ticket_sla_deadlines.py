@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:32
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Targets at the time of this migration, in hours: (response, resolution)
+SLA_TARGETS = {'urgent': (1, 4), 'high': (4, 24), 'medium': (8, 72), 'low': (24, 120)}
+
+
+def backfill_deadlines(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    for priority, (response, resolve) in SLA_TARGETS.items():
+        tickets = Ticket.objects.filter(priority=priority)
+        tickets.filter(status='open').update(response_due_at=F('created_at') + timedelta(hours=response))
+        tickets.filter(status__in=('open', 'in_progress')).update(
+            resolve_due_at=F('created_at') + timedelta(hours=resolve),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0014_staff_workload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='resolve_due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='resolve_escalation',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='response_due_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='response_escalation',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['response_escalation', 'response_due_at'], name='ticket_response_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['resolve_escalation', 'resolve_due_at'], name='ticket_resolve_due_idx'),
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0015_ticket_sla_deadlines'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('status', 'Status'), ('priority', 'Priority'), ('assignment', 'Assignment')], max_length=20)),
+                ('old_value', models.CharField(blank=True, max_length=32)),
+                ('new_value', models.CharField(blank=True, max_length=32)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='tickets.ticket')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['ticket', 'created_at'], name='ticket_event_timeline_idx'), models.Index(fields=['event_type', 'created_at'], name='ticket_event_type_idx'), models.Index(fields=['created_at', 'id'], name='ticket_event_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Same list as tickets.directory.SEARCH_FIELDS, frozen for this migration
+SEARCH_FIELDS = ('username', 'email', 'full_name', 'first_name', 'last_name', 'department')
+
+
+def _index_name(field):
+    return f'user_{field}_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    User = apps.get_model('tickets', 'User')
+    table = schema_editor.quote_name(User._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in SEARCH_FIELDS:
+        # The expression icontains compares: UPPER(column::text) LIKE UPPER('%word%')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {_index_name(field)} ON {table} '
+            f'USING gin ((UPPER({schema_editor.quote_name(field)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {_index_name(field)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0017_api_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 import uuid
@@ -45,6 +46,15 @@ class User(AbstractUser):
     def is_admin(self):
         return self.role == 'admin' or self.is_superuser
 
+    @property
+    def ticket_scope(self):
+        """Cache key fragment naming the set of tickets this user can see."""
+        if self.is_admin():
+            return 'all'
+        if self.is_it_staff():
+            return f'staff:{self.pk}'
+        return f'employee:{self.pk}'
+
     @property
     def display_name(self):
         """Prefer full_name, then first/last, then username."""
@@ -55,6 +65,69 @@ class User(AbstractUser):
         return self.username
 
 
+class TicketQuerySet(models.QuerySet):
+    """Role scoping and relation preloading shared by every ticket surface."""
+
+    def visible_to(self, user):
+        """
+        Tickets the given user may see: admins see everything, IT staff see
+        tickets assigned to them, unassigned tickets and their own, everyone
+        else sees only the tickets they created.
+        """
+        if user.is_admin():
+            return self.all()
+        if user.is_it_staff():
+            return self.filter(
+                models.Q(assigned_to=user) | models.Q(assigned_to__isnull=True) | models.Q(created_by=user)
+            )
+        return self.filter(created_by=user)
+
+    def for_list(self):
+        """Preload the users shown in ticket tables (creator and assignee)."""
+        return self.select_related('created_by', 'assigned_to')
+
+    def count_new_comment(self, created_at):
+        """Fold one new comment into the denormalized thread fields with a single UPDATE."""
+        return self.update(
+            comment_count=models.F('comment_count') + 1,
+            last_comment_at=models.Case(
+                models.When(last_comment_at__gt=created_at, then=models.F('last_comment_at')),
+                default=models.Value(created_at),
+            ),
+        )
+
+    def refresh_comment_stats(self):
+        """Recompute ``comment_count`` and ``last_comment_at`` from the comments table."""
+        thread = Comment.objects.filter(ticket=models.OuterRef('pk')).order_by().values('ticket')
+        return self.update(
+            comment_count=Coalesce(models.Subquery(thread.annotate(total=models.Count('id')).values('total')), 0),
+            last_comment_at=models.Subquery(thread.annotate(latest=models.Max('created_at')).values('latest')),
+        )
+
+    def stats(self):
+        """
+        Status and priority counts computed in a single conditional
+        aggregation query. Returns ``(stats, priority_stats)`` dicts.
+        """
+        aggregates = {'total': models.Count('id')}
+        for value, _label in Ticket.STATUS_CHOICES:
+            aggregates[value] = models.Count('id', filter=models.Q(status=value))
+        for value, _label in Ticket.PRIORITY_CHOICES:
+            aggregates[f'priority_{value}'] = models.Count('id', filter=models.Q(priority=value))
+
+        counts = self.order_by().aggregate(**aggregates)
+        stats = {'total': counts['total']}
+        stats.update({value: counts[value] for value, _label in Ticket.STATUS_CHOICES})
+        priority_stats = {value: counts[f'priority_{value}'] for value, _label in Ticket.PRIORITY_CHOICES}
+        return stats, priority_stats
+
+    def for_detail(self):
+        """Preload everything a single ticket page renders, including comment authors."""
+        return self.for_list().prefetch_related(
+            models.Prefetch('comments', queryset=Comment.objects.select_related('author'))
+        )
+
+
 class Ticket(models.Model):
     """Support Ticket model"""
     STATUS_CHOICES = [
@@ -75,21 +148,99 @@ class Ticket(models.Model):
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
-    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='created_tickets')
-    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_tickets')
+    # No single-column FK indexes: ticket_creator_created_idx and
+    # ticket_assignee_created_idx lead with these columns and cover the same lookups
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, related_name='created_tickets')
+    assigned_to = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, db_index=False, related_name='assigned_tickets',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Denormalized thread summary, maintained by the comment write paths
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # SLA deadlines (see tickets/sla.py); null once the clock has stopped
+    response_due_at = models.DateTimeField(null=True, blank=True, editable=False)
+    resolve_due_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # 0 pending, 1 warned, 2 breached; advanced by the sweep_sla command
+    response_escalation = models.PositiveSmallIntegerField(default=0, editable=False)
+    resolve_escalation = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    objects = TicketQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default ordering, the admin "all tickets" scope and keyset paging
+            models.Index(fields=['-created_at', '-id'], name='ticket_created_id_idx'),
+            # Status / priority filters on ticket_list and dashboard counts
+            models.Index(fields=['status', '-created_at'], name='ticket_status_created_idx'),
+            models.Index(fields=['priority', '-created_at'], name='ticket_priority_created_idx'),
+            # Role scoping: employees by creator, IT staff by assignee
+            models.Index(fields=['created_by', '-created_at'], name='ticket_creator_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at'], name='ticket_assignee_created_idx'),
+            # Shared IT queue; partial where the backend supports it
+            models.Index(
+                fields=['-created_at'],
+                name='ticket_unassigned_idx',
+                condition=models.Q(assigned_to__isnull=True),
+            ),
+            # SLA sweeper: one escalation level, due times up to a cutoff
+            models.Index(fields=['response_escalation', 'response_due_at'], name='ticket_response_due_idx'),
+            models.Index(fields=['resolve_escalation', 'resolve_due_at'], name='ticket_resolve_due_idx'),
+        ]
+    
+    # Fields whose transitions feed the daily metrics rollup and staff workloads
+    TRACKED_FIELDS = ('status', 'priority', 'assigned_to_id')
+    # Written only by UPDATE statements; a stale instance must never save them back
+    COMMENT_SUMMARY_FIELDS = ('comment_count', 'last_comment_at')
+    # Indexed text; a full save leaves these out when unchanged so the index is not rebuilt
+    SEARCHABLE_FIELDS = ('title', 'description')
+    # Status change system comments read "Status changed from <old> to <new>";
+    # the rollup and event log backfills parse them with parse_status_comment()
+    STATUS_COMMENT_PREFIX = 'Status changed from '
+    # User responsible for the next save, recorded on its TicketEvent rows
+    changed_by = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tracked_fields()
+        return instance
+    
+    def remember_tracked_fields(self):
+        """Snapshot tracked and searchable values so saves can tell what actually changed."""
+        self._loaded_values = {
+            name: self.__dict__[name]
+            for name in self.TRACKED_FIELDS + self.SEARCHABLE_FIELDS if name in self.__dict__
+        }
+    
+    def _text_unchanged(self, name):
+        loaded = getattr(self, '_loaded_values', {})
+        return name in loaded and loaded[name] == self.__dict__.get(name)
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Like Django's own full save, deferred fields are left alone rather than fetched
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COMMENT_SUMMARY_FIELDS
+                and field.attname not in deferred
+                and not (field.name in self.SEARCHABLE_FIELDS and self._text_unchanged(field.name))
+            ]
+        # post_save receivers write the event log; keep it in the ticket's transaction
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
     
-    def update_status(self, new_status, user):
-        """Update ticket status and track timestamps"""
+    def set_status(self, new_status):
+        """Move to ``new_status`` without saving, stamping resolved_at/closed_at. Returns the old status."""
         old_status = self.status
         self.status = new_status
         
@@ -97,17 +248,26 @@ class Ticket(models.Model):
             self.resolved_at = timezone.now()
         elif new_status == 'closed' and old_status != 'closed':
             self.closed_at = timezone.now()
-        
-        self.save()
-        
-        # Create a comment for status change
-        Comment.objects.create(
+        return old_status
+    
+    def add_status_comment(self, old_status, user):
+        """Create the system comment announcing a status change"""
+        return Comment.objects.create(
             ticket=self,
             author=user,
-            content=f"Status changed from {Ticket.get_status_display_from_value(old_status)} to {self.get_status_display()}",
+            content=Ticket.status_comment(old_status, self.status),
             is_system_message=True
         )
     
+    def update_status(self, new_status, user):
+        """Update ticket status and track timestamps"""
+        old_status = self.set_status(new_status)
+        
+        with transaction.atomic():
+            self.changed_by = user
+            self.save()
+            self.add_status_comment(old_status, user)
+    
     @staticmethod
     def get_status_display_from_value(value):
         """Helper to get display name from status value"""
@@ -116,24 +276,151 @@ class Ticket(models.Model):
                 return choice[1]
         return value
 
+    @staticmethod
+    def status_comment(old_status, new_status):
+        """The text of the system comment announcing a status change"""
+        return (
+            f"{Ticket.STATUS_COMMENT_PREFIX}{Ticket.get_status_display_from_value(old_status)}"
+            f" to {Ticket.get_status_display_from_value(new_status)}"
+        )
+
+    @staticmethod
+    def parse_status_comment(content):
+        """The new status named by a ``status_comment`` text, or None"""
+        if not content.startswith(Ticket.STATUS_COMMENT_PREFIX):
+            return None
+        _old_label, _sep, new_label = content[len(Ticket.STATUS_COMMENT_PREFIX):].partition(' to ')
+        for value, label in Ticket.STATUS_CHOICES:
+            if label == new_label:
+                return value
+        return None
+
 
 class Comment(models.Model):
     """Comments on tickets"""
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='comments')
-    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
+    # Null for automated system messages, such as SLA escalations
+    author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='comments')
     content = models.TextField()
     is_system_message = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Comment threads are always read per ticket in creation order
+            models.Index(fields=['ticket', 'created_at'], name='comment_ticket_created_idx'),
+        ]
     
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.ticket.title}"
+        author = self.author.username if self.author_id else 'System'
+        return f"Comment by {author} on {self.ticket.title}"
+
+
+# ================= SEARCH INDEX MODELS =================
+
+class TicketSearchDocument(models.Model):
+    """
+    Denormalized search text for one ticket (title, description and
+    non-system comments). Used on PostgreSQL, where an expression GIN
+    index over it backs native full-text search.
+    """
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+
+
+class TicketSearchTerm(models.Model):
+    """
+    Inverted index row: one normalized term from a ticket's title and
+    description (comment is null) or from one of its comments. Used on
+    backends without a native full-text index, such as SQLite.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='search_terms')
+    comment = models.ForeignKey(Comment, on_delete=models.CASCADE, null=True, blank=True, related_name='search_terms')
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'ticket'], name='search_term_ticket_idx'),
+        ]
+
+
+# ================= REPORTING ROLLUPS =================
+
+class TicketDailyMetric(models.Model):
+    """
+    Per-day ticket flow for one (priority, status) bucket, maintained
+    incrementally on ticket writes so reports never aggregate Ticket.
+
+    ``entered``/``exited`` count tickets moving into or out of the bucket
+    (creation, status or priority changes, deletion); their running sum is
+    the backlog. ``opened`` counts creations and ``resolved`` plus
+    ``resolution_seconds`` give resolve volume and mean time to resolve.
+    """
+    day = models.DateField()
+    priority = models.CharField(max_length=20, choices=Ticket.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    opened = models.PositiveIntegerField(default=0)
+    resolved = models.PositiveIntegerField(default=0)
+    resolution_seconds = models.BigIntegerField(default=0)
+    entered = models.PositiveIntegerField(default=0)
+    exited = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day', 'priority', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'priority', 'status'], name='unique_daily_metric_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.priority}/{self.status}"
+
+
+# ================= TICKET EVENT LOG =================
+
+class TicketEvent(models.Model):
+    """
+    One status, priority or assignment change of a ticket, appended in the
+    transaction that made it. Values are stored raw: status and priority
+    codes, and the assignee's id ('' for unassigned). Rows are never
+    updated; see tickets/history.py.
+    """
+    STATUS = 'status'
+    PRIORITY = 'priority'
+    ASSIGNMENT = 'assignment'
+    EVENT_CHOICES = [
+        (STATUS, 'Status'),
+        (PRIORITY, 'Priority'),
+        (ASSIGNMENT, 'Assignment'),
+    ]
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='history')
+    # Null for system changes (auto-assignment, rebalancing)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    event_type = models.CharField(max_length=20, choices=EVENT_CHOICES)
+    old_value = models.CharField(max_length=32, blank=True)
+    new_value = models.CharField(max_length=32, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Per-ticket timelines
+            models.Index(fields=['ticket', 'created_at'], name='ticket_event_timeline_idx'),
+            # Time-range analytics, usually for one event type
+            models.Index(fields=['event_type', 'created_at'], name='ticket_event_type_idx'),
+            models.Index(fields=['created_at', 'id'], name='ticket_event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.ticket_id} {self.event_type}: {self.old_value or '-'} -> {self.new_value or '-'}"
 
 
 # ================= EMAIL VERIFICATION MODEL =================
 import uuid
+from django.conf import settings
 from django.utils.timezone import now, timedelta
 
 class EmailVerification(models.Model):
@@ -142,10 +429,139 @@ class EmailVerification(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
     def is_expired(self):
-        return now() > self.created_at + timedelta(hours=24)
+        return now() > self.expires_at
 
     @property
     def expires_at(self):
-        return self.created_at + timedelta(hours=24)
+        hours = getattr(settings, 'EMAIL_VERIFICATION_MAX_AGE_HOURS', 24)
+        return self.created_at + timedelta(hours=hours)
+
+
+# ================= OUTBOUND EMAIL QUEUE =================
+
+class OutboundEmail(models.Model):
+    """
+    Durable outbox row. Request handlers enqueue mail here and the
+    ``send_queued_email`` worker delivers it, so page latency never depends
+    on the SMTP server.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=254, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest next delivery attempt; doubles as the claim lease while sending
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.get_status_display()})"
+
+
+# ================= BULK IMPORT CHECKPOINTS =================
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of one ``import_records`` source. Each batch commits together
+    with this row, so a crashed import resumes after its last committed
+    record instead of starting over.
+    """
+    KIND_CHOICES = [
+        ('users', 'Users'),
+        ('tickets', 'Tickets'),
+        ('comments', 'Comments'),
+    ]
+
+    source = models.CharField(max_length=500)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Records consumed so far, counted from 1; every one is imported or reported
+    position = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'kind'], name='unique_import_source'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} from {self.source} ({self.position} records)"
+
+
+# ================= STAFF WORKLOAD =================
+
+class StaffWorkload(models.Model):
+    """
+    Open tickets assigned to one user, weighted by priority. Maintained
+    incrementally on ticket writes so auto-assignment ranks staff from
+    this table instead of counting each member's tickets.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='workload')
+    open_tickets = models.IntegerField(default=0)
+    weight = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.open_tickets} open (weight {self.weight})"
+
+
+# ================= API TOKENS =================
+
+class ApiToken(models.Model):
+    """
+    Bearer credential for API integrations. Only a SHA-256 digest of the
+    key is stored; the key itself is shown once when the token is issued
+    (see tickets/tokens.py). Read tokens are limited to safe methods.
+    """
+    SCOPE_READ = 'read'
+    SCOPE_WRITE = 'write'
+    SCOPE_CHOICES = [
+        (SCOPE_READ, 'Read only'),
+        (SCOPE_WRITE, 'Read and write'),
+    ]
 
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100)
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, default=SCOPE_READ)
+    # Leading characters of the key, to tell tokens apart in listings
+    prefix = models.CharField(max_length=8)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed when the token is (re)loaded into the cache, not per request
+    last_used_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
 
+    def __str__(self):
+        return f"{self.name} ({self.prefix}…) for {self.user_id}"
+
+    @property
+    def is_active(self):
+        return self.revoked_at is None and (self.expires_at is None or self.expires_at > timezone.now())
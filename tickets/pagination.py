@@ -0,0 +1,134 @@
+# ================= KEYSET PAGINATION =================
+#
+# Opt-in cursor paging keyed on (created_at, id) for ticket lists. A page
+# is fetched by seeking past the previous page's boundary row, so deep
+# pages cost the same as the first one and no COUNT(*) is ever issued.
+
+import base64
+import binascii
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+KEYSET_ORDERING = ('-created_at', '-id')
+# Comments per page of a ticket thread, on the detail page and the API
+COMMENT_PAGE_SIZE = 20
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(ticket, reverse=False):
+    raw = f"{'p' if reverse else 'n'}|{ticket.created_at.isoformat()}|{ticket.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return ``(reverse, created_at, id)`` for a cursor produced by encode_cursor."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if direction not in ('n', 'p') or created_at is None:
+        raise InvalidCursor(token)
+    return direction == 'p', created_at, pk
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, cursor, page_size):
+    """
+    Return the :class:`KeysetPage` of ``queryset`` after (or before) ``cursor``,
+    newest first. Any existing ordering, such as search rank, is replaced by
+    ``(created_at, id)`` so the boundary comparison stays valid.
+    """
+    reverse = False
+    if cursor:
+        reverse, created_at, pk = decode_cursor(cursor)
+        if reverse:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    if reverse:
+        rows = list(queryset.order_by('created_at', 'id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_newer, has_older = has_more, True
+    else:
+        rows = list(queryset.order_by(*KEYSET_ORDERING)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        has_newer, has_older = bool(cursor), has_more
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_older else None,
+        previous_cursor=encode_cursor(rows[0], reverse=True) if rows and has_newer else None,
+    )
+
+
+class TicketPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; passing ``?cursor=`` (empty for the
+    first page) switches to keyset paging with next/previous links and no
+    total count.
+    """
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.keyset_page = None
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        try:
+            self.keyset_page = keyset_paginate(
+                queryset, request.query_params[self.cursor_query_param], self.get_page_size(request),
+            )
+        except InvalidCursor:
+            raise NotFound('Invalid cursor')
+        return self.keyset_page.object_list
+
+    def _cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.keyset_page is None:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self._cursor_link(self.keyset_page.next_cursor),
+            'previous': self._cursor_link(self.keyset_page.previous_cursor),
+            'results': data,
+        })
@@ -0,0 +1,228 @@
+# ================= DAILY TICKET METRICS =================
+#
+# Incremental maintenance of TicketDailyMetric. Every ticket write turns
+# into a handful of counter deltas on (day, priority, status) buckets, so
+# trend reports read rollup rows instead of aggregating Ticket.
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Comment, Ticket, TicketDailyMetric
+
+OPEN_STATUSES = ('open', 'in_progress')
+
+
+def _day(moment):
+    return timezone.localdate(moment)
+
+
+def _resolution_seconds(created_at, resolved_at):
+    return max(int((resolved_at - created_at).total_seconds()), 0)
+
+
+def _add_creation(deltas, when, priority, status):
+    deltas[(_day(when), priority, status, 'opened')] += 1
+    deltas[(_day(when), priority, status, 'entered')] += 1
+
+
+def _add_transition(deltas, when, old_priority, old_status, new_priority, new_status, created_at, resolved_at=None):
+    if (old_priority, old_status) == (new_priority, new_status):
+        return
+    day = _day(when)
+    deltas[(day, old_priority, old_status, 'exited')] += 1
+    deltas[(day, new_priority, new_status, 'entered')] += 1
+    if new_status == 'resolved' and old_status != 'resolved':
+        deltas[(day, new_priority, new_status, 'resolved')] += 1
+        deltas[(day, new_priority, new_status, 'resolution_seconds')] += _resolution_seconds(
+            created_at, resolved_at or when
+        )
+
+
+def _buckets(deltas):
+    buckets = defaultdict(dict)
+    for (day, priority, status, field), amount in deltas.items():
+        if amount:
+            buckets[(day, priority, status)][field] = amount
+    return buckets
+
+
+def _apply(deltas):
+    """Fold counter deltas into the rollup table: one insert plus one UPDATE per bucket."""
+    buckets = _buckets(deltas)
+    if not buckets:
+        return
+
+    TicketDailyMetric.objects.bulk_create(
+        [TicketDailyMetric(day=day, priority=priority, status=status) for day, priority, status in buckets],
+        ignore_conflicts=True,
+    )
+    for (day, priority, status), fields in buckets.items():
+        TicketDailyMetric.objects.filter(day=day, priority=priority, status=status).update(
+            **{field: F(field) + amount for field, amount in fields.items()}
+        )
+
+
+# ---------------- incremental hooks ----------------
+
+def record_ticket_saved(ticket, created):
+    """Roll up a single ticket save (creation, status or priority change)."""
+    now = timezone.now()
+    deltas = Counter()
+    if created:
+        _add_creation(deltas, ticket.created_at or now, ticket.priority, ticket.status)
+    else:
+        loaded = getattr(ticket, '_loaded_values', {})
+        _add_transition(
+            deltas, now,
+            loaded.get('priority', ticket.priority), loaded.get('status', ticket.status),
+            ticket.priority, ticket.status,
+            ticket.created_at, ticket.resolved_at,
+        )
+    _apply(deltas)
+    ticket.remember_tracked_fields()
+
+
+def record_ticket_deleted(ticket):
+    _apply(Counter({(_day(timezone.now()), ticket.priority, ticket.status, 'exited'): 1}))
+
+
+def record_bulk_transitions(rows, now, new_priority=None, new_status=None):
+    """
+    Roll up a QuerySet.update() that bypassed post_save. ``rows`` are
+    ``(priority, status, created_at)`` tuples read before the update.
+    """
+    deltas = Counter()
+    for priority, status, created_at in rows:
+        _add_transition(
+            deltas, now, priority, status,
+            new_priority or priority, new_status or status,
+            created_at,
+        )
+    _apply(deltas)
+
+
+def record_imported_tickets(tickets):
+    """
+    Roll up tickets inserted with bulk_create. Each is replayed as opened
+    at ``created_at`` and moved to its current status when it got there,
+    as ``rebuild`` does for tickets without status-change comments.
+    """
+    deltas = Counter()
+    for ticket in tickets:
+        _add_creation(deltas, ticket.created_at, ticket.priority, 'open')
+        if ticket.status != 'open':
+            when = {'resolved': ticket.resolved_at, 'closed': ticket.closed_at}.get(ticket.status) or ticket.updated_at
+            _add_transition(
+                deltas, when, ticket.priority, 'open', ticket.priority, ticket.status,
+                ticket.created_at, ticket.resolved_at,
+            )
+    _apply(deltas)
+
+
+# ---------------- backfill ----------------
+
+def _status_transitions(comments):
+    """Parse "Status changed from X to Y" system comments into (when, new_status)."""
+    for _ticket_id, content, created_at in comments:
+        status = Ticket.parse_status_comment(content)
+        if status is not None:
+            yield created_at, status
+
+
+def rebuild(chunk_size=2000):
+    """
+    Rebuild the rollup from ticket history in one streaming pass.
+
+    Status history comes from the status-change system comments; the
+    ticket's current status is reconciled at ``updated_at`` when the
+    comments do not account for it. Priority history is not recorded, so
+    each ticket is attributed to its current priority. Returns the number
+    of tickets replayed.
+    """
+    tickets = (
+        Ticket.objects.order_by('id')
+        .values_list('id', 'status', 'priority', 'created_at', 'resolved_at', 'closed_at', 'updated_at')
+        .iterator(chunk_size=chunk_size)
+    )
+    comments = groupby(
+        Comment.objects.filter(is_system_message=True, content__startswith=Ticket.STATUS_COMMENT_PREFIX)
+        .order_by('ticket_id', 'created_at')
+        .values_list('ticket_id', 'content', 'created_at')
+        .iterator(chunk_size=chunk_size),
+        key=lambda row: row[0],
+    )
+
+    deltas = Counter()
+    pending_group = next(comments, None)
+    count = 0
+    for ticket_id, status, priority, created_at, resolved_at, closed_at, updated_at in tickets:
+        history = []
+        while pending_group is not None and pending_group[0] <= ticket_id:
+            if pending_group[0] == ticket_id:
+                history = list(_status_transitions(pending_group[1]))
+            else:
+                list(pending_group[1])  # orphaned comments of a missing ticket
+            pending_group = next(comments, None)
+
+        current = 'open'
+        _add_creation(deltas, created_at, priority, current)
+        for when, new_status in history:
+            _add_transition(deltas, when, priority, current, priority, new_status, created_at)
+            current = new_status
+        if current != status:
+            when = {'resolved': resolved_at, 'closed': closed_at}.get(status) or updated_at
+            _add_transition(deltas, when, priority, current, priority, status, created_at, resolved_at)
+        count += 1
+
+    with transaction.atomic():
+        TicketDailyMetric.objects.all().delete()
+        TicketDailyMetric.objects.bulk_create([
+            TicketDailyMetric(day=day, priority=priority, status=status, **fields)
+            for (day, priority, status), fields in _buckets(deltas).items()
+        ], batch_size=1000)
+    return count
+
+
+# ---------------- reporting ----------------
+
+def daily_report(start, end):
+    """Opened, resolved and mean hours to resolve per day in ``[start, end]``."""
+    rows = (
+        TicketDailyMetric.objects.filter(day__range=(start, end))
+        .values('day')
+        .annotate(opened=Sum('opened'), resolved=Sum('resolved'), resolution_seconds=Sum('resolution_seconds'))
+        .order_by('day')
+    )
+    by_day = {row['day']: row for row in rows}
+    report = []
+    day = start
+    while day <= end:
+        row = by_day.get(day, {'opened': 0, 'resolved': 0, 'resolution_seconds': 0})
+        report.append({
+            'day': day,
+            'opened': row['opened'],
+            'resolved': row['resolved'],
+            'mean_hours_to_resolve': (
+                round(row['resolution_seconds'] / row['resolved'] / 3600, 2) if row['resolved'] else None
+            ),
+        })
+        day += timedelta(days=1)
+    return report
+
+
+def backlog_by_priority(as_of):
+    """Open plus in-progress tickets per priority at the end of ``as_of``."""
+    rows = (
+        TicketDailyMetric.objects.filter(day__lte=as_of, status__in=OPEN_STATUSES)
+        .values('priority')
+        .annotate(total_entered=Sum('entered'), total_exited=Sum('exited'))
+    )
+    backlog = {value: 0 for value, _label in Ticket.PRIORITY_CHOICES}
+    for row in rows:
+        backlog[row['priority']] = row['total_entered'] - row['total_exited']
+    return backlog
@@ -0,0 +1,236 @@
+# ================= TICKET SEARCH =================
+#
+# Ranked full-text search over ticket title, description and comment text.
+# PostgreSQL uses a native tsvector GIN index over TicketSearchDocument;
+# every other backend falls back to the TicketSearchTerm inverted index.
+# Both structures are kept up to date incrementally from signals.
+
+import re
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Concat
+from django.utils.html import escape
+
+from .models import Comment, TicketSearchDocument, TicketSearchTerm
+
+SEARCH_CONFIG = 'english'
+
+TITLE_WEIGHT = 5
+DESCRIPTION_WEIGHT = 2
+COMMENT_WEIGHT = 1
+
+SNIPPET_LENGTH = 160
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have i in is it its my not of on
+    or our that the this to was we were with you your
+""".split())
+
+
+def uses_native_search():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    """Lower-cased terms of at least two characters, stopwords removed."""
+    return [
+        token[:64]
+        for token in _TOKEN_RE.findall((text or '').lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def _term_rows(ticket_id, comment_id, weighted_texts):
+    weights = Counter()
+    for text, weight in weighted_texts:
+        for term in tokenize(text):
+            weights[term] += weight
+    return [
+        TicketSearchTerm(ticket_id=ticket_id, comment_id=comment_id, term=term, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def _document_body(ticket):
+    comments = (
+        Comment.objects.filter(ticket=ticket, is_system_message=False)
+        .order_by('created_at')
+        .values_list('content', flat=True)
+    )
+    return '\n'.join([ticket.description, *comments])
+
+
+# ---------------- index maintenance ----------------
+
+def index_ticket(ticket):
+    """(Re)index a ticket's own title and description."""
+    if uses_native_search():
+        TicketSearchDocument.objects.update_or_create(
+            ticket=ticket, defaults={'title': ticket.title, 'body': _document_body(ticket)},
+        )
+        return
+
+    TicketSearchTerm.objects.filter(ticket=ticket, comment__isnull=True).delete()
+    TicketSearchTerm.objects.bulk_create(_term_rows(ticket.pk, None, [
+        (ticket.title, TITLE_WEIGHT),
+        (ticket.description, DESCRIPTION_WEIGHT),
+    ]))
+
+
+def index_comment(comment, created=False):
+    """
+    Index a new comment, or reindex an edited one. System messages are not
+    searchable. A new comment is the newest in its thread, so its text is
+    appended to the native document instead of re-reading the thread.
+    """
+    if comment.is_system_message:
+        return
+    if uses_native_search():
+        if created:
+            body = Concat(F('body'), Value('\n' + comment.content))
+        else:
+            body = _document_body(comment.ticket)
+        TicketSearchDocument.objects.filter(ticket_id=comment.ticket_id).update(body=body)
+        return
+
+    if not created:
+        TicketSearchTerm.objects.filter(comment=comment).delete()
+    TicketSearchTerm.objects.bulk_create(
+        _term_rows(comment.ticket_id, comment.pk, [(comment.content, COMMENT_WEIGHT)])
+    )
+
+
+def unindex_comment(comment):
+    """Drop a deleted comment's text from the native search document."""
+    if comment.is_system_message:
+        return
+    if uses_native_search():
+        TicketSearchDocument.objects.filter(ticket_id=comment.ticket_id).update(
+            body=_document_body(comment.ticket)
+        )
+    # Inverted index rows go with the comment through ON DELETE CASCADE
+
+
+def rebuild_index(tickets, chunk_size=500):
+    """Rebuild the search index for ``tickets`` from scratch; returns the count."""
+    count = 0
+    chunk = []
+    for ticket in tickets.iterator(chunk_size=chunk_size):
+        chunk.append(ticket)
+        if len(chunk) == chunk_size:
+            count += _rebuild_chunk(chunk)
+            chunk = []
+    if chunk:
+        count += _rebuild_chunk(chunk)
+    return count
+
+
+def _rebuild_chunk(tickets):
+    ids = [ticket.pk for ticket in tickets]
+    comments = (
+        Comment.objects.filter(ticket_id__in=ids, is_system_message=False)
+        .order_by('ticket_id', 'created_at')
+        .values_list('ticket_id', 'id', 'content')
+    )
+
+    if uses_native_search():
+        bodies = {ticket.pk: [ticket.description] for ticket in tickets}
+        for ticket_id, _comment_id, content in comments:
+            bodies[ticket_id].append(content)
+        TicketSearchDocument.objects.filter(ticket_id__in=ids).delete()
+        TicketSearchDocument.objects.bulk_create([
+            TicketSearchDocument(ticket=ticket, title=ticket.title, body='\n'.join(bodies[ticket.pk]))
+            for ticket in tickets
+        ])
+        return len(tickets)
+
+    rows = []
+    for ticket in tickets:
+        rows.extend(_term_rows(ticket.pk, None, [
+            (ticket.title, TITLE_WEIGHT),
+            (ticket.description, DESCRIPTION_WEIGHT),
+        ]))
+    for ticket_id, comment_id, content in comments:
+        rows.extend(_term_rows(ticket_id, comment_id, [(content, COMMENT_WEIGHT)]))
+    TicketSearchTerm.objects.filter(ticket_id__in=ids).delete()
+    TicketSearchTerm.objects.bulk_create(rows, batch_size=2000)
+    return len(tickets)
+
+
+# ---------------- querying ----------------
+
+def search_tickets(tickets, query):
+    """
+    Restrict ``tickets`` to matches for ``query`` (all terms must match),
+    annotated with ``search_rank`` and ordered best first.
+    """
+    if uses_native_search():
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        vector = search_vector('search_document__title', 'search_document__body')
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            tickets.annotate(search=vector, search_rank=SearchRank(vector, search_query))
+            .filter(search=search_query)
+            .order_by('-search_rank', '-created_at')
+        )
+
+    terms = sorted(set(tokenize(query)))
+    if not terms:
+        return tickets.none()
+    return (
+        tickets.filter(search_terms__term__in=terms)
+        .annotate(
+            search_rank=Sum('search_terms__weight'),
+            matched_terms=Count('search_terms__term', distinct=True),
+        )
+        .filter(matched_terms=len(terms))
+        .order_by('-search_rank', '-created_at')
+    )
+
+
+def search_vector(title_field='title', body_field='body'):
+    """The tsvector expression shared by queries and the GIN index."""
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector(title_field, body_field, config=SEARCH_CONFIG)
+
+
+def highlight(text, query, length=SNIPPET_LENGTH):
+    """
+    HTML-escaped excerpt of ``text`` around the first matching term, with
+    every matching word wrapped in ``<mark>``.
+    """
+    text = text or ''
+    terms = set(tokenize(query))
+    matches = [m for m in _TOKEN_RE.finditer(text) if m.group().lower() in terms]
+
+    start = max(matches[0].start() - length // 3, 0) if matches else 0
+    end = min(start + length, len(text))
+
+    pieces = ['…' if start else '']
+    cursor = start
+    for match in matches:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        pieces.append(escape(text[cursor:match.start()]))
+        pieces.append(f'<mark>{escape(match.group())}</mark>')
+        cursor = match.end()
+    pieces.append(escape(text[cursor:end]))
+    if end < len(text):
+        pieces.append('…')
+    return ''.join(pieces)
+
+
+def ticket_snippet(ticket, query):
+    """Highlighted snippet for a search hit, preferring the description."""
+    terms = set(tokenize(query))
+    if terms & set(tokenize(ticket.description)) or not terms & set(tokenize(ticket.title)):
+        return highlight(ticket.description, query)
+    return highlight(ticket.title, query)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Ticket, Comment, User
+from .models import Ticket, Comment, TicketEvent, User
+from .search import ticket_snippet
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -17,7 +18,33 @@ class CommentSerializer(serializers.ModelSerializer):
         read_only_fields = ['author', 'created_at']
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class SearchSnippetMixin(serializers.Serializer):
+    search_snippet = serializers.SerializerMethodField()
+
+    def get_search_snippet(self, obj):
+        """Highlighted match excerpt when the request carries ?search=."""
+        request = self.context.get('request')
+        query = request.query_params.get('search') if request else None
+        return ticket_snippet(obj, query) if query else None
+
+
+class TicketListSerializer(SearchSnippetMixin, serializers.ModelSerializer):
+    """Compact ticket row for list responses; comments are only counted."""
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    assigned_to_name = serializers.CharField(source='assigned_to.username', read_only=True, default=None)
+
+    class Meta:
+        model = Ticket
+        fields = [
+            'id', 'title', 'status', 'priority',
+            'created_by', 'created_by_name', 'assigned_to', 'assigned_to_name',
+            'created_at', 'updated_at', 'comment_count', 'last_comment_at',
+            'response_due_at', 'resolve_due_at', 'search_snippet'
+        ]
+        read_only_fields = fields
+
+
+class TicketSerializer(SearchSnippetMixin, serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
     assigned_to = UserSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
@@ -27,7 +54,8 @@ class TicketSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'description', 'status', 'priority',
             'created_by', 'assigned_to', 'created_at', 'updated_at',
-            'resolved_at', 'closed_at', 'comments'
+            'resolved_at', 'closed_at', 'comment_count', 'last_comment_at',
+            'response_due_at', 'resolve_due_at', 'comments', 'search_snippet'
         ]
         read_only_fields = ['created_by', 'created_at', 'updated_at', 'resolved_at', 'closed_at']
 
@@ -49,3 +77,42 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['content']
 
+
+
+class BulkTicketOperationSerializer(serializers.Serializer):
+    """Payload for POST /api/tickets/bulk/: one operation applied to many tickets."""
+    OPERATION_CHOICES = ['status', 'priority', 'assign']
+    MAX_TICKETS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_TICKETS
+    )
+    operation = serializers.ChoiceField(choices=OPERATION_CHOICES)
+    value = serializers.CharField()
+
+    def validate(self, attrs):
+        operation, value = attrs['operation'], attrs['value']
+        if operation == 'status' and value not in dict(Ticket.STATUS_CHOICES):
+            raise serializers.ValidationError({'value': 'Invalid status'})
+        if operation == 'priority' and value not in dict(Ticket.PRIORITY_CHOICES):
+            raise serializers.ValidationError({'value': 'Invalid priority'})
+        if operation == 'assign':
+            assignee = User.objects.filter(pk=value if value.isdigit() else None).first()
+            if assignee is None:
+                raise serializers.ValidationError({'value': 'User not found'})
+            if not (assignee.is_it_staff() or assignee.is_admin()):
+                raise serializers.ValidationError({'value': 'Can only assign to IT staff or admin'})
+            attrs['assignee'] = assignee
+        # Keep the first occurrence of each id, in request order
+        attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
+
+
+class TicketEventSerializer(serializers.ModelSerializer):
+    """One ticket event log entry; values are raw status/priority codes or assignee ids."""
+    actor_name = serializers.CharField(source='actor.username', read_only=True, default=None)
+
+    class Meta:
+        model = TicketEvent
+        fields = ['id', 'ticket', 'actor', 'actor_name', 'event_type', 'old_value', 'new_value', 'created_at']
+        read_only_fields = fields
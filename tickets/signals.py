@@ -0,0 +1,148 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import events, history, rollups, search, sla, tokens, workload
+from .auth_cache import invalidate_user
+from .fragments import RENDERED_USER_FIELDS, invalidate_user_fragments
+from .models import ApiToken, Comment, Ticket, User
+from .stats import invalidate_dashboard_stats
+
+SEARCHABLE_TICKET_FIELDS = set(Ticket.SEARCHABLE_FIELDS)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached copy so role and is_active changes apply on the next request."""
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_renamed(sender, instance, created, update_fields=None, **kwargs):
+    """Re-render cached fragments that show this user's name or role."""
+    if not created and (update_fields is None or RENDERED_USER_FIELDS & set(update_fields)):
+        invalidate_user_fragments()
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user_fragments()
+
+
+@receiver(post_save, sender=ApiToken)
+@receiver(post_delete, sender=ApiToken)
+def api_token_changed(sender, instance, **kwargs):
+    """Drop the cached lookup so revocation, expiry and scope changes apply on the next request."""
+    tokens.invalidate_token(instance.key_hash)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    """Keep cached dashboard statistics in step with ticket writes."""
+    invalidate_dashboard_stats()
+
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Reindex a ticket's text unless the save provably left it untouched."""
+    if raw:
+        # Fixture loads are indexed afterwards with rebuild_search_index
+        return
+    if created or update_fields is None or SEARCHABLE_TICKET_FIELDS & set(update_fields):
+        search.index_ticket(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+def auto_assign_ticket(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Route new and reopened tickets without an assignee to the least loaded IT staff member."""
+    if not raw and workload.should_auto_assign(instance, update_fields):
+        workload.auto_assign(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+def schedule_sla(sender, instance, raw=False, **kwargs):
+    """Move the SLA deadlines with the ticket's priority and status."""
+    if not raw:
+        sla.schedule(instance)
+
+
+# Connected before roll_up_ticket, which re-snapshots the tracked fields
+@receiver(post_save, sender=Ticket)
+def count_workload(sender, instance, created, raw=False, **kwargs):
+    """Keep StaffWorkload in step with assignment, status and priority changes."""
+    if not raw:
+        workload.record_ticket_saved(instance, created)
+
+
+@receiver(post_save, sender=Ticket)
+def log_ticket_events(sender, instance, created, raw=False, **kwargs):
+    """Append status, priority and assignment changes to the ticket event log."""
+    if not raw:
+        history.record_ticket_saved(instance, created)
+
+
+@receiver(post_delete, sender=Ticket)
+def uncount_workload(sender, instance, **kwargs):
+    workload.record_ticket_deleted(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def roll_up_ticket(sender, instance, created, raw=False, **kwargs):
+    """Feed creations and status/priority transitions into TicketDailyMetric."""
+    if not raw:
+        rollups.record_ticket_saved(instance, created)
+
+
+@receiver(post_delete, sender=Ticket)
+def roll_up_ticket_deletion(sender, instance, **kwargs):
+    rollups.record_ticket_deleted(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def stream_ticket(sender, instance, raw=False, **kwargs):
+    """Push creations, status changes and assignments to open event streams."""
+    if not raw:
+        events.publish_ticket(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def stream_ticket_deletion(sender, instance, **kwargs):
+    events.publish('ticket_deleted', instance.pk, instance.created_by_id, instance.assigned_to_id, {'id': instance.pk})
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, raw=False, **kwargs):
+    """Keep Ticket.comment_count / last_comment_at in step with new comments."""
+    if created and not raw:
+        Ticket.objects.filter(pk=instance.ticket_id).count_new_comment(instance.created_at)
+
+
+@receiver(post_save, sender=Comment)
+def touch_edited_comment(sender, instance, created, raw=False, **kwargs):
+    """An edited comment leaves the comment stats alone, so move updated_at for cache keys and ETags."""
+    if not created and not raw:
+        Ticket.objects.filter(pk=instance.ticket_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+def stream_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.publish_comment(instance, instance.ticket)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    Ticket.objects.filter(pk=instance.ticket_id).refresh_comment_stats()
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        search.index_comment(instance, created)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    search.unindex_comment(instance)
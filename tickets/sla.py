@@ -0,0 +1,170 @@
+# ================= SERVICE LEVEL DEADLINES =================
+#
+# Every ticket carries the time its first response and its resolution are
+# due, derived from the per-priority targets in SLA_TARGETS. A response is
+# due while the ticket is still Open (nobody has picked it up) and a
+# resolution while it is Open or In Progress. Deadlines move with priority
+# and status changes: a new priority keeps the clock's start and swaps the
+# target, a reopened ticket starts a new clock. The sweeper reads only the
+# (escalation level, due time) index ranges that need action, so it never
+# walks the open backlog.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, PositiveSmallIntegerField, Value, When
+from django.utils import timezone
+
+from .models import Comment, Ticket
+from .rollups import OPEN_STATUSES
+
+# Statuses during which each deadline runs
+DEADLINES = {
+    'response': ('open',),
+    'resolve': OPEN_STATUSES,
+}
+LABELS = {'response': 'First response', 'resolve': 'Resolution'}
+
+# Escalation levels stored in <deadline>_escalation
+PENDING, WARNED, BREACHED = 0, 1, 2
+
+
+def target(priority, deadline):
+    """The ``deadline`` ('response' or 'resolve') target for ``priority`` as a timedelta."""
+    return timedelta(hours=settings.SLA_TARGETS[priority][deadline])
+
+
+def warning_window():
+    return timedelta(minutes=getattr(settings, 'SLA_WARNING_MINUTES', 60))
+
+
+def next_deadlines(state, old_priority, start):
+    """
+    New due times for a ticket ``state`` (a mapping with status, priority
+    and the current ``<deadline>_due_at`` values) whose priority was
+    ``old_priority``. A clock that is not running yet starts at ``start``.
+    Returns ``{field: value}`` for the due times and escalation levels
+    that change.
+    """
+    changes = {}
+    for deadline, statuses in DEADLINES.items():
+        field = f'{deadline}_due_at'
+        current = state[field]
+        if state['status'] not in statuses:
+            due = None
+        elif current is not None:
+            due = current - target(old_priority, deadline) + target(state['priority'], deadline)
+        else:
+            due = start + target(state['priority'], deadline)
+        if due != current:
+            changes[field] = due
+            changes[f'{deadline}_escalation'] = PENDING
+    return changes
+
+
+def schedule(ticket, now=None):
+    """Recompute ``ticket``'s due times in memory before it is saved."""
+    now = now or timezone.now()
+    if ticket._state.adding:
+        old_priority, start = ticket.priority, ticket.created_at or now
+    else:
+        old_priority, start = getattr(ticket, '_loaded_values', {}).get('priority', ticket.priority), now
+    state = {
+        'status': ticket.status,
+        'priority': ticket.priority,
+        'response_due_at': ticket.response_due_at,
+        'resolve_due_at': ticket.resolve_due_at,
+    }
+    for field, value in next_deadlines(state, old_priority, start).items():
+        setattr(ticket, field, value)
+
+
+def bulk_deadline_updates(rows, field, value, now):
+    """
+    ``QuerySet.update()`` kwargs that move the deadlines of ``rows`` (values()
+    dicts read before the update) when ``field`` becomes ``value`` on all of
+    them, for the bulk API's single UPDATE.
+    """
+    per_field = {}
+    for row in rows:
+        state = dict(row, **{field: value})
+        for name, new in next_deadlines(state, row['priority'], now).items():
+            per_field.setdefault(name, []).append(When(id=row['id'], then=Value(new)))
+    return {
+        name: Case(
+            *whens, default=F(name),
+            output_field=DateTimeField() if name.endswith('_due_at') else PositiveSmallIntegerField(),
+        )
+        for name, whens in per_field.items()
+    }
+
+
+# ---------------- sweeper ----------------
+
+def _claim(deadline, from_level, cutoff, batch_size):
+    """Lock one batch of tickets at ``from_level`` whose ``deadline`` is due by ``cutoff``."""
+    due = f'{deadline}_due_at'
+    return list(
+        Ticket.objects.filter(**{f'{deadline}_escalation': from_level, f'{due}__lte': cutoff})
+        .order_by(due)
+        .select_for_update(skip_locked=True)
+        .values('id', due)[:batch_size]
+    )
+
+
+def _note(deadline, level, due):
+    when = timezone.localtime(due).strftime('%Y-%m-%d %H:%M')
+    if level == BREACHED:
+        return f"SLA breached: {LABELS[deadline].lower()} was due {when}"
+    return f"SLA warning: {LABELS[deadline].lower()} due {when}"
+
+
+def escalate(deadline, from_level, level, cutoff, batch_size=500):
+    """
+    Escalate one batch from ``from_level`` to ``level`` and add one system
+    comment per ticket, with one bulk insert and one UPDATE. The comments
+    have no author: nobody on the ticket wrote them. Returns the number of
+    tickets escalated.
+    """
+    with transaction.atomic():
+        rows = _claim(deadline, from_level, cutoff, batch_size)
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        comments = Comment.objects.bulk_create([
+            Comment(ticket_id=row['id'], content=_note(deadline, level, row[f'{deadline}_due_at']), is_system_message=True)
+            for row in rows
+        ])
+        # bulk_create skips post_save; fold the thread summary into the UPDATE
+        Ticket.objects.filter(id__in=ids).update(**{
+            f'{deadline}_escalation': level,
+            'comment_count': F('comment_count') + 1,
+            'last_comment_at': Value(comments[0].created_at),
+        })
+    return len(rows)
+
+
+def sweep(now=None, batch_size=500):
+    """
+    Escalate every ticket that is about to breach (within the warning
+    window) or has breached, in batches. Each query is an equality on the
+    escalation level plus a range on the due time, which the (escalation,
+    due time) indexes answer without reading escalated or comfortably
+    early tickets. Returns ``{(deadline, level): count}``.
+    """
+    now = now or timezone.now()
+    steps = (
+        # Breaches first, so a ticket that is already late skips the warning
+        (PENDING, BREACHED, now),
+        (WARNED, BREACHED, now),
+        (PENDING, WARNED, now + warning_window()),
+    )
+    counts = {}
+    for deadline in DEADLINES:
+        for from_level, level, cutoff in steps:
+            total = 0
+            while batch := escalate(deadline, from_level, level, cutoff, batch_size):
+                total += batch
+            counts[(deadline, level)] = counts.get((deadline, level), 0) + total
+    return counts
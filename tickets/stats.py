@@ -0,0 +1,49 @@
+# ================= DASHBOARD STATISTICS =================
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Ticket
+
+STATS_VERSION_KEY = 'dashboard_stats:version'
+
+
+def stats_version():
+    version = cache.get(STATS_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses old keys
+        cache.add(STATS_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(STATS_VERSION_KEY)
+    return version
+
+
+def get_dashboard_stats(user):
+    """
+    Return ``(stats, priority_stats)`` for the tickets visible to ``user``.
+
+    Snapshots are cached per role scope (all / per-staff / per-employee)
+    under the current stats version, so repeat dashboard loads do no
+    database work until a ticket changes.
+    """
+    key = f'dashboard_stats:{stats_version()}:{user.ticket_scope}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = Ticket.objects.visible_to(user).stats()
+        cache.set(key, snapshot, getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 300))
+    return snapshot
+
+
+def invalidate_dashboard_stats():
+    """
+    Retire every cached snapshot at once by bumping the stats version.
+
+    A single ticket can change the counts of many scopes (an unassigned
+    ticket is visible to all IT staff), so scopes are not tracked
+    individually.
+    """
+    try:
+        cache.incr(STATS_VERSION_KEY)
+    except ValueError:
+        cache.add(STATS_VERSION_KEY, time.time_ns(), None)
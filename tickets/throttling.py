@@ -0,0 +1,139 @@
+# ================= THROTTLING =================
+#
+# Cache-backed token buckets. A bucket holds up to N tokens, refills at
+# N per period and each request takes one, so clients get short bursts
+# but a sustained rate of N per period. Rates use DRF's "<N>/<period>"
+# notation. The open auth views are guarded per client IP and per account
+# by ``throttle_auth``; the API uses the DRF throttle classes below. Both
+# reject before any ORM work or password hashing happens.
+#
+# Buckets are read and written without a lock, so concurrent requests on
+# a shared cache can occasionally take the same token; the limits are a
+# load-shedding guard, not an exact quota.
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_AUTH_THROTTLE_RATES = {
+    'login.ip': '20/min',
+    'login.account': '5/min',
+    'register.ip': '10/hour',
+    'register.account': '3/hour',
+    'resend_verification.ip': '10/hour',
+    'resend_verification.account': '3/hour',
+    # API token lookups that miss the cache (see tickets/tokens.py)
+    'api_token.ip': '60/min',
+}
+
+
+def parse_rate(rate):
+    """``'5/min'`` -> ``(5, 60)``: bucket capacity and seconds to refill it."""
+    try:
+        num, period = rate.split('/')
+        return int(num), PERIODS[period[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Invalid throttle rate: {rate!r}')
+
+
+def take_token(scope, ident, rate):
+    """
+    Take one token from the ``scope`` bucket of ``ident``. Returns 0 when
+    the request may proceed, otherwise the seconds until a token is free.
+    """
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    key = f'throttle:{scope}:{hashlib.md5(str(ident).encode()).hexdigest()}'
+    now = time.time()
+    tokens, stamp = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    # An expired bucket is indistinguishable from a full one
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def client_ip(request):
+    """The client address; a reverse proxy must overwrite REMOTE_ADDR with it."""
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(wait):
+    response = HttpResponse('Too many attempts. Please try again later.', status=429, content_type='text/plain')
+    response['Retry-After'] = str(max(1, round(wait)))
+    return response
+
+
+def throttle_auth(scope, account=None, methods=('POST',)):
+    """
+    Guard an open auth view with the ``<scope>.ip`` and ``<scope>.account``
+    rates from AUTH_THROTTLE_RATES. ``account(request, **kwargs)`` names
+    the account an attempt targets (a username, email or user id). Excess
+    attempts get a bare 429 before the view runs.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                rates = getattr(settings, 'AUTH_THROTTLE_RATES', DEFAULT_AUTH_THROTTLE_RATES)
+                wait = take_token(f'{scope}.ip', client_ip(request), rates[f'{scope}.ip'])
+                ident = account(request, **kwargs) if account and not wait else None
+                if ident:
+                    wait = take_token(f'{scope}.account', str(ident).lower(), rates[f'{scope}.account'])
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over ``take_token``; subclasses pick the scope and identity."""
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(f'No throttle rate set for scope {scope!r}')
+        ident = request.user.pk if request.user.is_authenticated else self.get_ident(request)
+        self.wait_seconds = take_token(scope, ident, rate)
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Overall API budget per user (per IP for anonymous requests)."""
+
+    def get_scope(self, request, view):
+        return 'user'
+
+
+class EndpointTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Per-user budget for one endpoint: ``view.throttle_scopes[view.action]``
+    when the action has its own rate, else ``view.throttle_scope``. Views
+    without a scope are only covered by the user budget.
+    """
+
+    def get_scope(self, request, view):
+        action = getattr(view, 'action', None)
+        return getattr(view, 'throttle_scopes', {}).get(action, getattr(view, 'throttle_scope', None))
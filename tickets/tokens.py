@@ -0,0 +1,135 @@
+# ================= API TOKENS =================
+#
+# Per-user tokens let integrations call the API with an
+# "Authorization: Token <key>" header instead of a session and CSRF token.
+# Keys are 256-bit random strings, so an unsalted SHA-256 digest is enough
+# at rest; there is no password hash to run per request. The digest is
+# looked up through the cache: a hit yields the token's user id, scope and
+# expiry, the user comes from the authenticated user cache, and a busy
+# integration authenticates without a database round trip. Saving or
+# deleting a token (revoking included) drops its cache entry. Unknown
+# digests are not cached, since every guessed key would take a cache slot;
+# instead each cache miss takes from a per client IP token bucket
+# (``api_token.ip`` in AUTH_THROTTLE_RATES), so bad keys cannot hammer
+# the table either.
+
+import hashlib
+import secrets
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import authentication, exceptions
+from rest_framework.permissions import SAFE_METHODS
+
+from .auth_cache import user_cache_key
+from .models import ApiToken, User
+from .throttling import DEFAULT_AUTH_THROTTLE_RATES, client_ip, take_token
+
+KEYWORDS = (b'token', b'bearer')
+
+# What the cache holds per live token; also the request's ``auth``
+CachedToken = namedtuple('CachedToken', 'id user_id scope expires_at')
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def token_cache_key(key_hash):
+    return f'api_token:{key_hash}'
+
+
+def invalidate_token(key_hash):
+    cache.delete(token_cache_key(key_hash))
+
+
+def assign_key(token):
+    """Give an unsaved token a fresh key and return it; only its digest is kept."""
+    key = secrets.token_urlsafe(32)
+    token.prefix, token.key_hash = key[:8], hash_key(key)
+    return key
+
+
+def issue(user, name, scope=ApiToken.SCOPE_READ, expires_at=None, created_by=None):
+    """Create a token for ``user``. Returns ``(token, key)``; the key cannot be recovered later."""
+    token = ApiToken(user=user, name=name, scope=scope, expires_at=expires_at, created_by=created_by)
+    key = assign_key(token)
+    token.save()
+    return token, key
+
+
+def revoke(token):
+    if token.revoked_at is None:
+        token.revoked_at = timezone.now()
+        token.save(update_fields=['revoked_at'])
+
+
+def _cache_timeout():
+    return getattr(settings, 'API_TOKEN_CACHE_TIMEOUT', 60)
+
+
+def lookup(key_hash, client=''):
+    """
+    The :class:`CachedToken` for an unrevoked token digest, or None. A
+    cache miss takes a token from ``client``'s ``api_token.ip`` bucket
+    first and raises ``Throttled`` when it is empty.
+    """
+    cache_key = token_cache_key(key_hash)
+    entry = cache.get(cache_key)
+    if entry is None:
+        rates = getattr(settings, 'AUTH_THROTTLE_RATES', DEFAULT_AUTH_THROTTLE_RATES)
+        rate = rates.get('api_token.ip', DEFAULT_AUTH_THROTTLE_RATES['api_token.ip'])
+        wait = take_token('api_token.ip', client, rate)
+        if wait:
+            raise exceptions.Throttled(wait)
+        token = ApiToken.objects.select_related('user').filter(key_hash=key_hash, revoked_at__isnull=True).first()
+        if token is None:
+            return None
+        entry = CachedToken(token.pk, token.user_id, token.scope, token.expires_at)
+        # Once per cache fill, so last use is accurate to the cache timeout
+        ApiToken.objects.filter(pk=token.pk).update(last_used_at=timezone.now())
+        cache.add(user_cache_key(token.user_id), token.user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+        cache.set(cache_key, entry, _cache_timeout())
+    return entry
+
+
+def _cached_user(user_id):
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+    return user
+
+
+class ApiTokenAuthentication(authentication.BaseAuthentication):
+    """DRF authentication for ``Authorization: Token <key>`` (or ``Bearer``)."""
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() not in KEYWORDS:
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            key = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        token = lookup(hash_key(key), client_ip(request))
+        if token is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if token.expires_at is not None and token.expires_at <= timezone.now():
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        user = _cached_user(token.user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        if token.scope == ApiToken.SCOPE_READ and request.method not in SAFE_METHODS:
+            raise exceptions.PermissionDenied('This token is read-only.')
+        return user, token
+
+    def authenticate_header(self, request):
+        return 'Token'
@@ -1,18 +1,24 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from . import views
+from . import events, views
 
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('login/', views.login_view, name='login'),
     path('register/', views.register_view, name='register'),
     path('verify-email/<uuid:token>/', views.verify_email, name='verify_email'),
+    path('verify-email/s/<str:token>/', views.verify_email_signed, name='verify_email_signed'),
     path('logout/', auth_views.LogoutView.as_view(), name='logout'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/<int:user_id>/', views.profile_view, name='profile_detail'),
     path('employees/', views.manage_employees, name='manage_employees'),
+    path('employees/lookup/', views.employee_lookup, name='employee_lookup'),
+    path('employees/tokens/', views.manage_api_tokens, name='manage_api_tokens'),
+    path('employees/tokens/<int:token_id>/revoke/', views.revoke_api_token, name='revoke_api_token'),
     path('tickets/', views.ticket_list, name='ticket_list'),
     path('tickets/create/', views.ticket_create, name='ticket_create'),
+    path('tickets/export/', views.ticket_export, name='ticket_export'),
+    path('tickets/events/', events.ticket_event_stream, name='ticket_events'),
     path('tickets/<int:ticket_id>/', views.ticket_detail, name='ticket_detail'),
     path('tickets/<int:ticket_id>/update/', views.ticket_update, name='ticket_update'),
     path('tickets/<int:ticket_id>/delete/', views.ticket_delete, name='ticket_delete'),
@@ -1,42 +1,135 @@
 # ================= EMAIL UTILS =================
 
 import logging
-from django.core.mail import EmailMultiAlternatives
+from datetime import timedelta
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.utils import timezone
+
+from .models import OutboundEmail
 
 logger = logging.getLogger(__name__)
 
+# A claimed batch that is not finished within this window is retried
+EMAIL_CLAIM_LEASE = timedelta(minutes=10)
+
+
+def queue_email(subject, to_email, body='', html_body='', from_email=None):
+    """Write a message to the outbox; the send_queued_email worker delivers it."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        to_email=to_email,
+        body=body,
+        html_body=html_body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
 def send_welcome_email(user, verify_link):
-    """Send welcome email with verification link"""
+    """Queue welcome email with verification link"""
     subject = "Welcome to IT Support System – Verify Your Email"
 
-    try:
-        html_content = render_to_string(
-            "tickets/welcome_verify.html",
-            {
-                "user": user,
-                "verify_link": verify_link,
-            }
-        )
+    html_content = render_to_string(
+        "tickets/welcome_verify.html",
+        {
+            "user": user,
+            "verify_link": verify_link,
+        }
+    )
+
+    message = queue_email(subject, user.email, html_body=html_content)
+    logger.info(f"Verification email queued for {user.email}")
+    return message
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 60 * 60))
 
-        email = EmailMultiAlternatives(
-            subject,
-            "",
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email]
+
+def _claim_batch(batch_size):
+    """Lease up to ``batch_size`` due messages so concurrent workers skip them."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects
+            .filter(
+                Q(status=OutboundEmail.STATUS_PENDING) | Q(status=OutboundEmail.STATUS_SENDING),
+                next_attempt_at__lte=now,
+            )
+            .order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=ids).update(
+            status=OutboundEmail.STATUS_SENDING,
+            next_attempt_at=now + EMAIL_CLAIM_LEASE,
         )
+    return list(OutboundEmail.objects.filter(id__in=ids))
 
-        email.attach_alternative(html_content, "text/html")
-        result = email.send()
 
-        if result == 1:
-            logger.info(f"Verification email sent successfully to {user.email}")
-        else:
-            logger.error(f"Failed to send verification email to {user.email}")
+def _build_message(outbound, connection):
+    email = EmailMultiAlternatives(
+        outbound.subject,
+        outbound.body,
+        outbound.from_email or settings.DEFAULT_FROM_EMAIL,
+        [outbound.to_email],
+        connection=connection,
+    )
+    if outbound.html_body:
+        email.attach_alternative(outbound.html_body, "text/html")
+    return email
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
 
-        return result
 
-    except Exception as e:
-        logger.error(f"Error sending verification email to {user.email}: {str(e)}")
-        raise
+def deliver_queued_emails(batch_size=50, max_attempts=5):
+    """
+    Deliver one batch from the outbox over a single reused mail connection.
+
+    Failed messages are rescheduled with exponential backoff and marked
+    failed after ``max_attempts``. Returns ``(sent, failed)`` counts.
+    """
+    batch = _claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    for outbound in batch:
+        try:
+            # No-op while the connection is already open
+            connection.open()
+            _build_message(outbound, connection).send()
+            sent.append(outbound.pk)
+        except Exception as e:
+            logger.error(f"Error sending queued email {outbound.pk} to {outbound.to_email}: {str(e)}")
+            failed.append((outbound, str(e)))
+            # The connection may be broken; the next message reopens it
+            _close_quietly(connection)
+    _close_quietly(connection)
+
+    now = timezone.now()
+    OutboundEmail.objects.filter(id__in=sent).update(
+        status=OutboundEmail.STATUS_SENT, sent_at=now, last_error='',
+    )
+    for outbound, error in failed:
+        outbound.attempts += 1
+        outbound.last_error = error
+        if outbound.attempts >= max_attempts:
+            outbound.status = OutboundEmail.STATUS_FAILED
+        else:
+            outbound.status = OutboundEmail.STATUS_PENDING
+            outbound.next_attempt_at = now + _retry_delay(outbound.attempts)
+        outbound.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+    return len(sent), len(failed)
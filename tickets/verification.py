@@ -0,0 +1,114 @@
+# ================= EMAIL VERIFICATION TOKENS =================
+#
+# Verification links come in two kinds, chosen for new links by
+# EMAIL_VERIFICATION_TOKENS:
+#
+# - "model" (default): an EmailVerification row per pending user, looked
+#   up by its UUID when the link is followed.
+# - "signed": a timestamped token signed with SECRET_KEY that names the
+#   user. Following it checks the signature and age in memory and activates
+#   the account with one conditional UPDATE. Nothing is stored, so there is
+#   nothing to expire or clean up. The UPDATE only matches an inactive user
+#   who has never logged in, so a token works once and cannot reactivate an
+#   account an administrator has disabled.
+#
+# Both link kinds stay routed whatever the setting, so links already in
+# inboxes keep working after a switch. ``manage.py
+# convert_email_verifications`` replaces outstanding rows with signed links.
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.urls import reverse
+
+from .auth_cache import invalidate_user
+from .models import EmailVerification, User
+
+SIGNED_TOKEN_SALT = 'tickets.verification.email'
+
+VERIFIED, EXPIRED, INVALID = 'verified', 'expired', 'invalid'
+
+
+def token_mode():
+    return getattr(settings, 'EMAIL_VERIFICATION_TOKENS', 'model')
+
+
+def max_age():
+    return timedelta(hours=getattr(settings, 'EMAIL_VERIFICATION_MAX_AGE_HOURS', 24))
+
+
+def make_signed_token(user):
+    return signing.dumps({'u': user.pk}, salt=SIGNED_TOKEN_SALT)
+
+
+def verification_path(user):
+    """
+    Path of a fresh verification link for ``user`` in the configured mode.
+    Model mode replaces any earlier row, so only the newest link works.
+    """
+    if token_mode() == 'signed':
+        return reverse('verify_email_signed', args=[make_signed_token(user)])
+    EmailVerification.objects.filter(user=user).delete()
+    verification = EmailVerification.objects.create(user=user)
+    return reverse('verify_email', args=[verification.token])
+
+
+def verify_signed_token(token):
+    """Activate the user named by a signed token. Returns VERIFIED, EXPIRED or INVALID."""
+    try:
+        payload = signing.loads(token, salt=SIGNED_TOKEN_SALT, max_age=max_age())
+    except signing.SignatureExpired:
+        return EXPIRED
+    except signing.BadSignature:
+        return INVALID
+    user_id = payload.get('u') if isinstance(payload, dict) else None
+    if not isinstance(user_id, int):
+        return INVALID
+    activated = User.objects.filter(pk=user_id, is_active=False, last_login__isnull=True).update(is_active=True)
+    if not activated:
+        return INVALID
+    # update() skips the post_save receivers
+    invalidate_user(user_id)
+    return VERIFIED
+
+
+def verify_model_token(token):
+    """Activate the user of an EmailVerification row and spend it. Returns VERIFIED, EXPIRED or INVALID."""
+    verification = EmailVerification.objects.select_related('user').filter(token=token).first()
+    if verification is None:
+        return INVALID
+    if verification.is_expired():
+        return EXPIRED
+    user = verification.user
+    user.is_active = True
+    user.save()
+    verification.delete()
+    return VERIFIED
+
+
+def convert_pending_rows(base_url, send, dry_run=False):
+    """
+    Replace outstanding EmailVerification rows with signed links.
+
+    Rows for expired links or already active users are deleted. Each
+    remaining user is sent a signed link via ``send(user, url)`` and the
+    row is deleted, so the old UUID link stops working. Returns ``(sent,
+    removed)``.
+    """
+    rows = EmailVerification.objects.select_related('user').order_by('pk')
+    sent = removed = 0
+    spent = []
+    for verification in rows.iterator(chunk_size=500):
+        user = verification.user
+        if verification.is_expired() or user.is_active:
+            removed += 1
+        else:
+            if not dry_run:
+                path = reverse('verify_email_signed', args=[make_signed_token(user)])
+                send(user, base_url.rstrip('/') + path)
+            sent += 1
+        spent.append(verification.pk)
+    if not dry_run:
+        EmailVerification.objects.filter(pk__in=spent).delete()
+    return sent, removed
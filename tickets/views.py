@@ -1,18 +1,27 @@
 from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponseBadRequest, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate
 from django.contrib import messages
-from django.db.models import Q
 from django.core.paginator import Paginator
 from django.urls import reverse
+from django.utils.http import urlencode
 from django.conf import settings
-from django.core.mail import send_mail
-from .models import Ticket, Comment, User, EmailVerification
+from django.utils.functional import SimpleLazyObject
+from .models import ApiToken, Ticket, Comment, User, EmailVerification
 from .forms import UserProfileForm
 from django.urls import reverse
 from .models import EmailVerification
-from .utils import send_welcome_email
+from . import directory, events, tokens, verification
+from .utils import queue_email, send_welcome_email
+from .stats import get_dashboard_stats
+from .fragments import fragment_context
+from .throttling import throttle_auth
+from .search import search_tickets, ticket_snippet
+from .pagination import COMMENT_PAGE_SIZE, InvalidCursor, keyset_paginate
+from .conditional import conditional_response, form_page_variant, ticket_validators
+from .export import EXPORT_FORMATS, export_response, filter_tickets
 from .forms import (
     TicketForm,
     TicketUpdateForm,
@@ -20,6 +29,7 @@ from .forms import (
     CustomUserCreationForm,
     UserProfileForm,
     AdminUserForm,
+    ApiTokenForm,
 )
 def _send_verification_email(request, verification: EmailVerification) -> None:
     """
@@ -37,15 +47,15 @@ def _send_verification_email(request, verification: EmailVerification) -> None:
         "If you did not create this account, please ignore this email."
     )
 
-    send_mail(
-        subject=subject,
-        message=message,
+    queue_email(
+        subject,
+        verification.user.email,
+        body=message,
         from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', settings.EMAIL_HOST_USER),
-        recipient_list=[verification.user.email],
-        fail_silently=False,
     )
 
 
+@throttle_auth('register', account=lambda request: request.POST.get('email'))
 def register_view(request):
     """User registration view"""
     if request.user.is_authenticated:
@@ -59,11 +69,8 @@ def register_view(request):
             user.is_active = False
             user.save()
 
-            verification = EmailVerification.objects.create(user=user)
             try:
-                verify_url = request.build_absolute_uri(
-                    reverse('verify_email', args=[verification.token])
-                )
+                verify_url = request.build_absolute_uri(verification.verification_path(user))
                 send_welcome_email(user, verify_url)
             except Exception:
                 messages.error(
@@ -84,6 +91,7 @@ def register_view(request):
     return render(request, 'tickets/register.html', {'form': form})
 
 
+@throttle_auth('login', account=lambda request: request.POST.get('username'))
 def login_view(request):
     """Custom login view"""
     if request.method == 'POST':
@@ -104,59 +112,43 @@ def dashboard(request):
     user = request.user
     
     # Get tickets based on user role
-    if user.is_admin():
-        tickets = Ticket.objects.all()
-    elif user.is_it_staff():
-        tickets = Ticket.objects.filter(
-            Q(assigned_to=user) | Q(assigned_to__isnull=True) | Q(created_by=user)
-        )
-    else:
-        tickets = Ticket.objects.filter(created_by=user)
-    
-    # Statistics
-    stats = {
-        'total': tickets.count(),
-        'open': tickets.filter(status='open').count(),
-        'in_progress': tickets.filter(status='in_progress').count(),
-        'resolved': tickets.filter(status='resolved').count(),
-        'closed': tickets.filter(status='closed').count(),
-    }
+    tickets = Ticket.objects.visible_to(user)
     
-    # Recent tickets
-    recent_tickets = tickets[:5]
+    # Statistics (one aggregate query, cached per role scope)
+    stats, priority_stats = get_dashboard_stats(user)
     
-    # Priority breakdown
-    priority_stats = {
-        'urgent': tickets.filter(priority='urgent').count(),
-        'high': tickets.filter(priority='high').count(),
-        'medium': tickets.filter(priority='medium').count(),
-        'low': tickets.filter(priority='low').count(),
-    }
+    # Recent tickets (lazy: only queried when the cached fragment misses)
+    recent_tickets = tickets.for_list()[:5]
     
     context = {
         'stats': stats,
         'recent_tickets': recent_tickets,
         'priority_stats': priority_stats,
         'user': user,
+        'live_updates': events.enabled(),
+        **fragment_context(),
     }
     
     return render(request, 'tickets/dashboard.html', context)
 
 
+def _cursor_url(request, cursor):
+    """Current list URL (filters kept) pointing at another keyset page."""
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop('page', None)
+    params['cursor'] = cursor
+    return f'?{params.urlencode()}'
+
+
 @login_required
 def ticket_list(request):
     """List all tickets with filtering"""
     user = request.user
     
     # Get tickets based on user role
-    if user.is_admin():
-        tickets = Ticket.objects.all()
-    elif user.is_it_staff():
-        tickets = Ticket.objects.filter(
-            Q(assigned_to=user) | Q(assigned_to__isnull=True) | Q(created_by=user)
-        )
-    else:
-        tickets = Ticket.objects.filter(created_by=user)
+    tickets = Ticket.objects.visible_to(user)
     
     # Filtering
     status_filter = request.GET.get('status')
@@ -168,17 +160,34 @@ def ticket_list(request):
     if priority_filter:
         tickets = tickets.filter(priority=priority_filter)
     if search_query:
-        tickets = tickets.filter(
-            Q(title__icontains=search_query) | Q(description__icontains=search_query)
-        )
+        tickets = search_tickets(tickets, search_query)
     
-    # Pagination
-    paginator = Paginator(tickets, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination: keyset (cursor) mode is opt-in via ?cursor= or settings
+    cursor = request.GET.get('cursor')
+    cursor_mode = cursor is not None or getattr(settings, 'TICKET_LIST_CURSOR_PAGINATION', False)
+    next_url = previous_url = None
+    if cursor_mode:
+        try:
+            page_obj = keyset_paginate(tickets.for_list(), cursor, 10)
+        except InvalidCursor:
+            page_obj = keyset_paginate(tickets.for_list(), None, 10)
+        next_url = _cursor_url(request, page_obj.next_cursor)
+        previous_url = _cursor_url(request, page_obj.previous_cursor)
+    else:
+        paginator = Paginator(tickets.for_list(), 10)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+    
+    if search_query:
+        page_obj.object_list = list(page_obj.object_list)
+        for ticket in page_obj.object_list:
+            ticket.search_snippet = ticket_snippet(ticket, search_query)
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'next_url': next_url,
+        'previous_url': previous_url,
         'status_filter': status_filter,
         'priority_filter': priority_filter,
         'search_query': search_query,
@@ -187,6 +196,23 @@ def ticket_list(request):
     return render(request, 'tickets/ticket_list.html', context)
 
 
+@login_required
+def ticket_export(request):
+    """Stream the filtered ticket list as CSV or NDJSON, optionally with comments"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('format must be csv or ndjson')
+    
+    tickets = filter_tickets(
+        Ticket.objects.visible_to(request.user),
+        status=request.GET.get('status'),
+        priority=request.GET.get('priority'),
+        search=request.GET.get('search'),
+    )
+    with_comments = request.GET.get('comments') in ('1', 'true', 'yes')
+    return export_response(request, tickets, export_format, with_comments)
+
+
 @login_required
 def ticket_create(request):
     """Create a new ticket"""
@@ -207,7 +233,20 @@ def ticket_create(request):
 @login_required
 def ticket_detail(request, ticket_id):
     """View ticket details"""
-    ticket = get_object_or_404(Ticket, id=ticket_id)
+    # Pending flash messages must be rendered, so only answer 304 without them
+    if request.method in ('GET', 'HEAD') and not messages.get_messages(request):
+        readable = Ticket.objects.filter(id=ticket_id)
+        if not (request.user.is_admin() or request.user.is_it_staff()):
+            readable = readable.filter(created_by=request.user)
+        validators = ticket_validators(
+            readable, request.user.pk, request.user.role, form_page_variant(request), request.get_full_path(),
+        )
+        return conditional_response(request, validators, lambda: _ticket_detail(request, ticket_id))
+    return _ticket_detail(request, ticket_id)
+
+
+def _ticket_detail(request, ticket_id):
+    ticket = get_object_or_404(Ticket.objects.for_list(), id=ticket_id)
     
     # Check permissions
     if not (request.user.is_admin() or 
@@ -216,8 +255,6 @@ def ticket_detail(request, ticket_id):
         messages.error(request, 'You do not have permission to view this ticket.')
         return redirect('dashboard')
     
-    comments = ticket.comments.all()
-    
     if request.method == 'POST':
         # Handle comment submission
         comment_form = CommentForm(request.POST)
@@ -244,11 +281,30 @@ def ticket_detail(request, ticket_id):
     if request.user.is_it_staff() or request.user.is_admin():
         update_form = TicketUpdateForm(instance=ticket, user=request.user)
     
+    # Newest page of the thread; older pages load from the API (or ?comments_before=).
+    # Lazy, so a cached thread fragment skips the query entirely.
+    comments_before = request.GET.get('comments_before')
+    
+    def newest_comments():
+        thread = ticket.comments.select_related('author')
+        try:
+            return keyset_paginate(thread, comments_before, COMMENT_PAGE_SIZE)
+        except InvalidCursor:
+            return keyset_paginate(thread, None, COMMENT_PAGE_SIZE)
+    
+    comment_page = SimpleLazyObject(newest_comments)
+    
     context = {
         'ticket': ticket,
-        'comments': comments,
+        'comment_page': comment_page,
+        'comments': SimpleLazyObject(lambda: comment_page.object_list[::-1]),
+        'comments_before': comments_before or '',
+        'role_labels': dict(User.ROLE_CHOICES),
+        'status_labels': dict(Ticket.STATUS_CHOICES),
         'comment_form': comment_form,
         'update_form': update_form,
+        'live_updates': events.enabled(),
+        **fragment_context(),
     }
     
     return render(request, 'tickets/ticket_detail.html', context)
@@ -268,6 +324,7 @@ def ticket_update(request, ticket_id):
         form = TicketUpdateForm(request.POST, instance=ticket, user=request.user)
         if form.is_valid():
             old_status = ticket.status
+            ticket.changed_by = request.user
             form.save()
             
             # Handle status change
@@ -305,7 +362,10 @@ def manage_employees(request):
         messages.error(request, 'You do not have permission to access Employee Management.')
         return redirect('dashboard')
 
-    users = User.objects.all().order_by('id')
+    # Search and page travel in the query string, including on the edit form's POST
+    query = request.GET.get('q', '').strip()
+    page_number = request.GET.get('page', '')
+    list_params = urlencode({key: value for key, value in (('q', query), ('page', page_number)) if value})
     selected_user = None
     form = None
     form_class = AdminUserForm if request.user.is_admin() else UserProfileForm
@@ -321,7 +381,7 @@ def manage_employees(request):
         if form.is_valid():
             form.save()
             messages.success(request, f'Updated profile for {selected_user.display_name}.')
-            return redirect('manage_employees')
+            return redirect(f"{reverse('manage_employees')}?{list_params}")
     else:
         user_id = request.GET.get('user_id')
         if user_id:
@@ -333,13 +393,23 @@ def manage_employees(request):
                 form = form_class(instance=selected_user)
 
     context = {
-        'users': users,
+        'page_obj': Paginator(directory.directory(query), directory.PAGE_SIZE).get_page(page_number),
+        'query': query,
+        'list_params': list_params,
         'selected_user': selected_user,
         'form': form,
         'is_admin': request.user.is_admin(),
     }
     return render(request, 'tickets/manage_employees.html', context)
 
+
+@login_required
+def employee_lookup(request):
+    """JSON typeahead for picking a user: ``?q=`` matches username, email, name or department."""
+    if not (request.user.is_hr() or request.user.is_admin()):
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+    return JsonResponse({'results': directory.typeahead(request.GET.get('q', ''))})
+
 @login_required
 def delete_user(request, user_id):
     target_user = get_object_or_404(User, id=user_id)
@@ -363,6 +433,54 @@ def delete_user(request, user_id):
     messages.success(request, "User deleted successfully.")
     return redirect('manage_employees')
 
+
+API_TOKENS_PER_PAGE = 25
+
+
+@login_required
+def manage_api_tokens(request):
+    """HR/Admin view for issuing and revoking API tokens."""
+    if not (request.user.is_hr() or request.user.is_admin()):
+        messages.error(request, 'You do not have permission to manage API tokens.')
+        return redirect('dashboard')
+
+    new_key = None
+    if request.method == 'POST':
+        form = ApiTokenForm(request.POST, issuer=request.user)
+        if form.is_valid():
+            token, new_key = tokens.issue(
+                form.cleaned_data['username'], form.cleaned_data['name'], form.cleaned_data['scope'],
+                form.cleaned_data['expires_at'], created_by=request.user,
+            )
+            # Rendered rather than redirected, so the key never lands in the message storage
+            form = ApiTokenForm(issuer=request.user)
+    else:
+        form = ApiTokenForm(issuer=request.user)
+
+    api_tokens = ApiToken.objects.select_related('user', 'created_by')
+    if request.user.is_hr():
+        api_tokens = api_tokens.exclude(user__role='admin')
+    page = Paginator(api_tokens, API_TOKENS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'tickets/manage_api_tokens.html', {
+        'form': form,
+        'page_obj': page,
+        'new_key': new_key,
+    })
+
+
+@login_required
+def revoke_api_token(request, token_id):
+    if not (request.user.is_hr() or request.user.is_admin()):
+        messages.error(request, 'You do not have permission to manage API tokens.')
+        return redirect('dashboard')
+    token = get_object_or_404(ApiToken.objects.select_related('user'), id=token_id)
+    if request.user.is_hr() and token.user.is_admin():
+        messages.error(request, 'HR staff cannot revoke administrator tokens.')
+    elif request.method == 'POST':
+        tokens.revoke(token)
+        messages.success(request, f'Revoked token "{token.name}" for {token.user.username}.')
+    return redirect('manage_api_tokens')
+
 @login_required
 def profile_view(request):
     user = request.user
@@ -390,33 +508,26 @@ def profile_view(request):
 from django.shortcuts import render
 from .models import EmailVerification
 
-def verify_email(request, token):
-    try:
-        verification = EmailVerification.objects.get(token=token)
-
-        # Check if token is expired
-        if verification.is_expired():
-            return render(request, "tickets/link_expired.html")
+VERIFICATION_TEMPLATES = {
+    verification.VERIFIED: "tickets/verified_success.html",
+    verification.EXPIRED: "tickets/link_expired.html",
+    verification.INVALID: "tickets/invalid_link.html",
+}
 
-        # Activate user
-        user = verification.user
-        user.is_active = True
-        user.save()
 
-        # Delete verification record
-        verification.delete()
+def verify_email(request, token):
+    return render(request, VERIFICATION_TEMPLATES[verification.verify_model_token(token)])
 
-        return render(request, "tickets/verified_success.html")
 
-    except EmailVerification.DoesNotExist:
-        return render(request, "tickets/invalid_link.html")
+def verify_email_signed(request, token):
+    return render(request, VERIFICATION_TEMPLATES[verification.verify_signed_token(token)])
     from django.contrib import messages
 from django.shortcuts import redirect
 
+@throttle_auth('resend_verification', account=lambda request, user_id: user_id, methods=None)
 def resend_verification_email(request, user_id):
     from .models import EmailVerification
     from .utils import send_welcome_email
-    from django.contrib.auth.models import User
     from django.urls import reverse
 
     try:
@@ -425,14 +536,8 @@ def resend_verification_email(request, user_id):
             messages.info(request, "Your email is already verified.")
             return redirect("login")
 
-        # Delete old token if exists
-        EmailVerification.objects.filter(user=user).delete()
-
-        # Create new token
-        verification = EmailVerification.objects.create(user=user)
-        verify_link = request.build_absolute_uri(
-            reverse("verify_email", args=[verification.token])
-        )
+        # Replaces any earlier token in model mode
+        verify_link = request.build_absolute_uri(verification.verification_path(user))
 
         # Send email
         send_welcome_email(user, verify_link)
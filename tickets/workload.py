@@ -0,0 +1,304 @@
+# ================= STAFF WORKLOAD & AUTO-ASSIGNMENT =================
+#
+# StaffWorkload holds every assignee's open tickets weighted by priority.
+# Ticket writes become per-user counter deltas (see signals, the bulk API
+# and the importer), so finding the least loaded IT staff member is one
+# ordered query rather than a COUNT per member. With AUTO_ASSIGN_TICKETS
+# on, new tickets and reopened tickets without an assignee go to that
+# member, preferring staff from the creator's department. ``rebalance``
+# evens out existing queues in memory with a min-heap of staff loads.
+
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import events, history
+from .models import StaffWorkload, Ticket, User
+from .rollups import OPEN_STATUSES
+from .stats import invalidate_dashboard_stats
+
+DEFAULT_PRIORITY_WEIGHTS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 5}
+REOPENED_FROM = ('resolved', 'closed')
+
+
+def priority_weights():
+    return getattr(settings, 'AUTO_ASSIGN_PRIORITY_WEIGHTS', DEFAULT_PRIORITY_WEIGHTS)
+
+
+def _match_department():
+    return getattr(settings, 'AUTO_ASSIGN_MATCH_DEPARTMENT', True)
+
+
+# ---------------- incremental counters ----------------
+
+def _load(state):
+    """``(user id, weight)`` a ticket in ``state`` adds to its assignee, or None."""
+    if state is None:
+        return None
+    assigned_to_id, status, priority = state
+    if assigned_to_id is None or status not in OPEN_STATUSES:
+        return None
+    return assigned_to_id, priority_weights()[priority]
+
+
+def record_changes(changes):
+    """
+    Fold ticket state changes into StaffWorkload. ``changes`` yields
+    ``(before, after)`` pairs of ``(assigned_to_id, status, priority)``,
+    with None for a ticket that did not exist before or no longer does.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            load = _load(state)
+            if load:
+                deltas[load[0]][0] += sign
+                deltas[load[0]][1] += sign * load[1]
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta != [0, 0]}
+    if not deltas:
+        return
+
+    StaffWorkload.objects.bulk_create([StaffWorkload(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+    for user_id, (open_tickets, weight) in deltas.items():
+        StaffWorkload.objects.filter(user_id=user_id).update(
+            open_tickets=F('open_tickets') + open_tickets, weight=F('weight') + weight,
+        )
+
+
+def ticket_state(ticket):
+    return ticket.assigned_to_id, ticket.status, ticket.priority
+
+
+def row_state(row):
+    """``ticket_state`` for a ``values()`` row."""
+    return row['assigned_to_id'], row['status'], row['priority']
+
+
+def record_ticket_saved(ticket, created):
+    """Counter deltas for one save; must run before the rollup re-snapshots tracked fields."""
+    before = None
+    if not created:
+        loaded = getattr(ticket, '_loaded_values', {})
+        before = (
+            loaded.get('assigned_to_id', ticket.assigned_to_id),
+            loaded.get('status', ticket.status),
+            loaded.get('priority', ticket.priority),
+        )
+    record_changes([(before, ticket_state(ticket))])
+
+
+def record_ticket_deleted(ticket):
+    record_changes([(ticket_state(ticket), None)])
+
+
+def _open_totals():
+    """``{user id: [open tickets, weight]}`` from the tickets table in one grouped query."""
+    weights = priority_weights()
+    totals = defaultdict(lambda: [0, 0])
+    rows = (
+        Ticket.objects.filter(status__in=OPEN_STATUSES, assigned_to__isnull=False)
+        .values_list('assigned_to_id', 'priority')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    for user_id, priority, total in rows:
+        totals[user_id][0] += total
+        totals[user_id][1] += total * weights[priority]
+    return totals
+
+
+def _replace_counters(totals):
+    with transaction.atomic():
+        StaffWorkload.objects.all().delete()
+        StaffWorkload.objects.bulk_create([
+            StaffWorkload(user_id=user_id, open_tickets=open_tickets, weight=weight)
+            for user_id, (open_tickets, weight) in totals.items()
+        ], batch_size=1000)
+
+
+def rebuild():
+    """Recompute every StaffWorkload row from the tickets table. Returns the number of assignees."""
+    totals = _open_totals()
+    _replace_counters(totals)
+    return len(totals)
+
+
+# ---------------- automatic assignment ----------------
+
+def pick_assignee(department=''):
+    """The active IT staff member with the lowest weighted open workload."""
+    staff = User.objects.filter(role='it_staff', is_active=True).annotate(
+        load=Coalesce('workload__weight', 0),
+        open_count=Coalesce('workload__open_tickets', 0),
+    )
+    ordering = ['load', 'open_count', 'pk']
+    if department and _match_department():
+        ordering.insert(0, Case(
+            When(department=department, then=Value(0)), default=Value(1), output_field=IntegerField(),
+        ))
+    return staff.order_by(*ordering).first()
+
+
+def should_auto_assign(ticket, update_fields=None):
+    """True for a new or reopened ticket without an assignee, when auto-assignment is on."""
+    if not getattr(settings, 'AUTO_ASSIGN_TICKETS', False) or ticket.assigned_to_id is not None:
+        return False
+    if update_fields is not None and 'assigned_to' not in update_fields:
+        return False
+    if ticket._state.adding:
+        return ticket.status in OPEN_STATUSES
+    previous = getattr(ticket, '_loaded_values', {}).get('status')
+    return ticket.status in OPEN_STATUSES and previous in REOPENED_FROM
+
+
+def auto_assign(ticket):
+    """Assign ``ticket`` in memory to the least loaded IT staff member; the caller saves it."""
+    assignee = pick_assignee(ticket.created_by.department if ticket.created_by_id else '')
+    if assignee is not None:
+        ticket.assigned_to = assignee
+    return assignee
+
+
+# ---------------- batch rebalancing ----------------
+
+class _StaffHeap:
+    """
+    Min-heaps of ``(weight, open tickets, user id)`` over all staff and per
+    department. Loads change in place and stale heap entries are skipped
+    when they surface, so every update is a single push.
+    """
+
+    def __init__(self, staff, totals):
+        self.loads = {user_id: list(totals.get(user_id, (0, 0))) for user_id in staff}
+        self.departments = staff
+        self.heaps = defaultdict(list)
+        for user_id in staff:
+            self._push(user_id)
+
+    def _push(self, user_id):
+        open_tickets, weight = self.loads[user_id]
+        entry = (weight, open_tickets, user_id)
+        heapq.heappush(self.heaps[None], entry)
+        if self.departments[user_id]:
+            heapq.heappush(self.heaps[self.departments[user_id]], entry)
+
+    def add(self, user_id, weight, sign=1):
+        self.loads[user_id][0] += sign
+        self.loads[user_id][1] += sign * weight
+        self._push(user_id)
+
+    def least_loaded(self, department=''):
+        for key in ((department, None) if department else (None,)):
+            heap = self.heaps.get(key)
+            while heap:
+                weight, open_tickets, user_id = heap[0]
+                if self.loads[user_id] == [open_tickets, weight]:
+                    return user_id
+                heapq.heappop(heap)
+        return None
+
+
+def plan_rebalance(include_assigned=True):
+    """
+    Plan assignments that even out the open workload of active IT staff.
+
+    Unassigned open tickets are always placed. With ``include_assigned``,
+    staff above the mean weighted load also give up their not-yet-started
+    (``open``) tickets until they are as close to the mean as they can get
+    without dropping below it. Tickets are then placed heaviest first on the
+    least loaded member (of the creator's department when it has staff),
+    the usual greedy heuristic for balancing jobs. Returns ``(moves,
+    totals)``: ``{ticket id: (old assignee id, new assignee id)}`` and the
+    resulting ``{user id: [open tickets, weight]}``.
+    """
+    weights = priority_weights()
+    match_department = _match_department()
+    staff = dict(User.objects.filter(role='it_staff', is_active=True).values_list('pk', 'department'))
+    totals = _open_totals()
+    if not staff:
+        return {}, totals
+    balancer = _StaffHeap(staff, totals)
+
+    candidates = Q(assigned_to__isnull=True)
+    if include_assigned:
+        candidates |= Q(status='open', assigned_to__in=list(staff))
+    rows = (
+        Ticket.objects.filter(candidates, status__in=OPEN_STATUSES)
+        .order_by('created_at', 'id')
+        .values_list('id', 'priority', 'assigned_to_id', 'created_by__department')
+    )
+
+    pool = []
+    by_owner = defaultdict(list)
+    for ticket_id, priority, assigned_to_id, department in rows:
+        entry = (weights[priority], ticket_id, assigned_to_id, department if match_department else '')
+        if assigned_to_id is None:
+            pool.append(entry)
+        else:
+            by_owner[assigned_to_id].append(entry)
+
+    total_weight = sum(weight for _open, weight in balancer.loads.values()) + sum(entry[0] for entry in pool)
+    mean = total_weight / len(staff)
+    for owner, tickets in by_owner.items():
+        # Heaviest first, skipping any ticket that would take the owner below the mean
+        for entry in sorted(tickets, key=lambda entry: (-entry[0], entry[1])):
+            if balancer.loads[owner][1] - entry[0] >= mean:
+                balancer.add(owner, entry[0], sign=-1)
+                pool.append(entry)
+
+    moves = {}
+    for weight, ticket_id, old_assignee, department in sorted(pool, key=lambda entry: (-entry[0], entry[1])):
+        new_assignee = balancer.least_loaded(department)
+        balancer.add(new_assignee, weight)
+        if new_assignee != old_assignee:
+            moves[ticket_id] = (old_assignee, new_assignee)
+
+    for user_id, load in balancer.loads.items():
+        totals[user_id] = load
+    return moves, totals
+
+
+def rebalance(include_assigned=True, dry_run=False):
+    """
+    Plan and apply a rebalance. Returns the ``moves`` applied, or with
+    ``dry_run`` the planned ones.
+    """
+    moves, _totals = plan_rebalance(include_assigned)
+    if dry_run:
+        return moves
+
+    with transaction.atomic():
+        now = timezone.now()
+        # Lock the planned tickets and re-check them, so a ticket started or
+        # closed since planning stays put and is neither logged nor published
+        current = dict(
+            Ticket.objects.select_for_update()
+            .filter(id__in=list(moves), status__in=OPEN_STATUSES)
+            .values_list('id', 'assigned_to_id')
+        )
+        moves = {
+            ticket_id: (current[ticket_id], new_assignee)
+            for ticket_id, (_old, new_assignee) in moves.items()
+            if ticket_id in current and current[ticket_id] != new_assignee
+        }
+        targets = defaultdict(list)
+        for ticket_id, (_old, new_assignee) in moves.items():
+            targets[new_assignee].append(ticket_id)
+        for user_id, ticket_ids in targets.items():
+            Ticket.objects.filter(id__in=ticket_ids).update(assigned_to_id=user_id, updated_at=now)
+        # QuerySet.update() skips post_save; rebuild the counters, log and tell open pages
+        rebuild()
+        transaction.on_commit(invalidate_dashboard_stats)
+        moved = list(Ticket.objects.filter(id__in=list(moves)).select_related('assigned_to'))
+        history.record_changes((
+            (ticket.pk, {'assigned_to_id': moves[ticket.pk][0]}, {'assigned_to_id': ticket.assigned_to_id})
+            for ticket in moved
+        ), when=now)
+        for ticket in moved:
+            events.publish_ticket(ticket)
+    return moves